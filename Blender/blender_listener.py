@@ -1,42 +1,59 @@
 import bpy
 import socket
 import threading
+import logging
 import math
 import os
 import time 
 from bpy.app.handlers import persistent
 import random
+import sys
+from collections import OrderedDict, deque
+from bpy_extras.object_utils import world_to_camera_view
+from mathutils import Vector
 
 # Configuration
 HOST = 'localhost'
 PORT = 5006  # Make sure this matches your hand tracking script
 
-# Global variables
-selected_object = None
-last_position = None
-last_position_hand2 = None
-last_gesture = None
-last_gesture_hand2 = None
+# Global variables (selection and gesture state is per tracker, see ClientSession)
 delta_smoothing = 0.05  # Movement smoothing factor
 rotation_smoothing = 0.02  # Rotation smoothing factor
 scale_smoothing = 0.02  # Scale smoothing factor
-last_creation_time = 0
 creation_cooldown = 1.0  # Cooldown d'une seconde entre les créations
-position_history = []  # History of positions for smoothing
 history_max_size = 3   # Number of history points to keep
 delta_smoothing = 0.1  # Increase for reactive smoothing
-color_separation_mode = False
-color_planes = []
-painting_mode = False
-paint_trail = []
-current_paint_color = (0.0, 0.8, 1.0, 1.0)  # Start with cyan
+rgb_split_spread = 0.02  # UV offset of the color layers when the RGB split is on
+RGB_SPLIT_PROPERTY = "rgb_split"  # Object property driving the split in the image material
+RGB_SPLIT_NODE = "RGB Split"
+# UV offset direction and extra scale of each color layer (R, G, B)
+RGB_SPLIT_CHANNELS = (((1.0, 0.5), 0.0), ((0.0, 0.0), 1.0), ((-1.0, -0.5), 2.0))
+paint_trail = []  # PaintStroke objects of all clients, oldest first
 paint_thickness = 0.05  # Default thickness
 paint_cooldown = 0.05  # Time between paint points to control density
-last_paint_time = 0
 paint_plane_distance = 5.0  # Fixed distance from camera for all paint strokes
+PAINT_MATERIAL_NAME = "Paint_Stroke_Material"
+PAINT_NODE_GROUP_NAME = "Paint_Stroke_Instances"
+PAINT_COLOR_ATTRIBUTE = "paint_color"
+
+# Image library options
+image_cache_budget_mb = 1024  # Decoded size of images kept in memory before removing the oldest unused ones
+image_proxy_size = 1024  # Longest side of the textures used on planes, 0 for full resolution
+
+# Trackers sharing the scene
+max_clients = 16  # Sessions kept at once, packets from further trackers are ignored
+client_timeout = 30.0  # Seconds without packets before a tracker's session is dropped
+client_rate_limit = 120.0  # Packets per second accepted from each tracker
+client_burst = 30  # Packets a tracker may send at once above its rate
+# Shared-memory rings polled by the main thread, one per tracker on this machine started with
+# --transport shm: rtht_gestures without --client-id, rtht_gestures_<id> with one (or its --shm-name).
+# Trackers whose ring is not listed use UDP; empty to only use UDP
+shm_rings = ["rtht_gestures"]
 
 # Interface options
 show_gestures_overlay = True  # Show gesture info in 3D viewport
+log_level = "INFO"  # Console log level, "DEBUG" logs every selection and image load
+log_stats_interval = 5.0  # Seconds between the aggregated gesture count lines
 last_action_info = "Y2K Art Project initialized"  # Info about last action performed
 
 # Directory paths with fallbacks
@@ -52,18 +69,267 @@ os.makedirs(IMAGES_DIR, exist_ok=True)
 SOUND_SELECT = os.path.join(SOUNDS_DIR, "select.wav")
 SOUND_MOVE = os.path.join(SOUNDS_DIR, "move.wav")
 
+# The shared wire protocol module lives in the project root, next to hand_tracking.py
+for project_dir in (os.path.dirname(blend_dir), os.path.dirname(os.path.dirname(os.path.abspath(__file__)))):
+    if os.path.exists(os.path.join(project_dir, "gesture_protocol.py")) and project_dir not in sys.path:
+        sys.path.append(project_dir)
+
+# Log through a background writer so console output never blocks the main thread
+try:
+    import log_setup
+    log_setup.setup_logging(log_level)
+    log = log_setup.get_logger("blender")
+    has_log_setup = True
+except ImportError:
+    has_log_setup = False
+    log = logging.getLogger("rtht.blender")
+    log.setLevel(log_level)
+    if not log.handlers:
+        log.addHandler(logging.StreamHandler(sys.stdout))
+    log.warning("log_setup.py not found. Logging synchronously without rate limiting.")
+
 # Try to import playsound for sound effects
 try:
     from playsound import playsound
     has_playsound = True
 except ImportError:
     has_playsound = False
-    print("playsound not available. Sound effects disabled.")
+    log.warning("playsound not available. Sound effects disabled.")
+
+# Try to import the wire protocol for binary packets
+try:
+    import gesture_protocol
+    has_gesture_protocol = True
+except ImportError:
+    has_gesture_protocol = False
+    log.warning("gesture_protocol.py not found. Only text packets are supported.")
+
+# Try to import the background image decoder (needs OpenCV or Pillow in Blender's Python)
+try:
+    import texture_cache
+    has_texture_cache = texture_cache.has_decoder
+    if not has_texture_cache:
+        log.warning("Neither OpenCV nor Pillow available. Images load at full resolution on the main thread.")
+except ImportError:
+    has_texture_cache = False
+    log.warning("texture_cache.py not found. Images load at full resolution on the main thread.")
+
+# Try to import the latency histograms (standard library only)
+try:
+    import latency_trace
+    has_latency_trace = True
+except ImportError:
+    has_latency_trace = False
+    log.warning("latency_trace.py not found. Latency tracing disabled.")
+
+# Try to import the same-machine shared-memory transport (standard library only)
+try:
+    import shm_transport
+    has_shm_transport = True
+except ImportError:
+    has_shm_transport = False
+    log.warning("shm_transport.py not found. Only the UDP transport is available.")
 
 # UDP socket and listener thread
 sock = None
 listener_thread = None
 running = True  # Control flag for the thread
+mailbox_interval = 0.01  # Seconds between mailbox drains on the main thread
+latency_dump_interval = 10.0  # Seconds between writes of the latency histograms
+LATENCY_TRACE_FILE = os.path.join(blend_dir, "latency_trace.json")
+
+class PacketMailbox:
+    """Hand-off of decoded packets from the socket thread to Blender's main thread.
+
+    The socket thread only appends to a deque and the main thread only pops
+    from it; both are atomic in CPython so no lock is needed. Each counter
+    is written by a single thread.
+    
+    Packets are tagged with the key of the tracker that sent them. Each
+    tracker gets a token bucket (in the socket thread), so one flooding
+    tracker cannot crowd out the others.
+    """
+    
+    def __init__(self, max_pending=256, rate=client_rate_limit, burst=client_burst):
+        self.max_pending = max_pending
+        self.rate = rate
+        self.burst = burst
+        self._packets = deque()
+        self._buckets = {}   # Client key -> [tokens, last refill time], socket thread only
+        self.received = 0    # Packets decoded by the socket thread
+        self.malformed = 0   # Packets that could not be decoded
+        self.rate_limited = 0  # Packets over their tracker's rate limit
+        self.dropped = 0     # Packets discarded because the main thread fell behind
+        self.coalesced = 0   # Packets superseded by a newer one with the same gestures
+        self.processed = 0   # Packets handed to the gesture handlers
+    
+    def _take_token(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= 4 * max_clients:
+                # Forget trackers that went quiet
+                self._buckets = {k: b for k, b in self._buckets.items() if now - b[1] < client_timeout}
+            bucket = self._buckets[key] = [self.burst, now]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1.0:
+            return False
+        bucket[0] -= 1.0
+        return True
+    
+    def post(self, key, hands, stamps=None):
+        """Queue a tracker's decoded hands and their latency stamps (called from the socket thread)"""
+        self.received += 1
+        if not self._take_token(key, time.monotonic()):
+            self.rate_limited += 1
+            return
+        if len(self._packets) >= self.max_pending:
+            try:
+                self._packets.popleft()
+                self.dropped += 1
+            except IndexError:
+                pass  # The main thread drained it in the meantime
+        self._packets.append((key, hands, stamps if stamps is not None else {}))
+    
+    def drain(self):
+        """Take all pending (key, hands, stamps) packets (called from the main thread).
+        
+        Consecutive packets of a tracker with the same gestures are
+        coalesced into the newest one, so only the latest position per hand
+        is applied. A change of gesture or a gesture start is an edge and is
+        always kept.
+        """
+        batch = []
+        last_index = {}  # Client key -> index of its newest packet in batch
+        while True:
+            try:
+                key, hands, stamps = self._packets.popleft()
+            except IndexError:
+                break
+            i = last_index.get(key)
+            if (i is not None and [hand[0] for hand in batch[i][1]] == [hand[0] for hand in hands]
+                    and not any("start" in hand[3:] for hand in batch[i][1])):
+                batch[i] = (key, hands, stamps)
+                self.coalesced += 1
+            else:
+                last_index[key] = len(batch)
+                batch.append((key, hands, stamps))
+        self.processed += len(batch)
+        return batch
+    
+    def stats(self):
+        """Return the packet counters"""
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "malformed": self.malformed,
+        }
+
+class ClientSession:
+    """Selection and gesture state of one tracker"""
+    
+    def __init__(self, key, name):
+        self.key = key
+        self.name = name
+        self.selected_object = None
+        self.last_position = None
+        self.last_position_hand2 = None
+        self.last_gesture = None
+        self.last_gesture_hand2 = None
+        self.last_two_hand_combo = None  # Gesture pair of the previous two-hand packet
+        self.position_history = []  # History of positions for smoothing
+        self.last_creation_time = 0
+        self.painting_mode = False
+        self.current_stroke = None  # Stroke the next paint point is added to
+        self.current_paint_color = (0.0, 0.8, 1.0, 1.0)  # Start with cyan
+        self.last_paint_time = 0
+        self.action_info = ""  # Last action of this tracker
+        self.last_seen = time.time()
+        self.packets = 0
+
+class SessionTable:
+    """Sessions of the trackers driving the scene, keyed by client ID or address (main thread only).
+    
+    Looking up a session is a dict access, and the only per-session work
+    is the expiry check every few seconds, so the main-thread cost grows
+    linearly with the number of trackers.
+    """
+    
+    def __init__(self, max_sessions=max_clients, timeout=client_timeout):
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        self.sessions = {}
+        self.rejected = 0  # Packets from trackers beyond max_sessions
+        self._last_expiry = time.time()
+    
+    @staticmethod
+    def key_for(client_id, address):
+        """Trackers started with --client-id keep their session across restarts"""
+        return ("id", client_id) if client_id else ("addr", address)
+    
+    @staticmethod
+    def name_for(key):
+        kind, value = key
+        return f"#{value}" if kind == "id" else f"{value[0]}:{value[1]}" if kind == "addr" else str(value)
+    
+    def get(self, key, now=None):
+        """Session of a tracker, created on its first packet; None once the table is full"""
+        now = time.time() if now is None else now
+        session = self.sessions.get(key)
+        if session is None:
+            self.expire(now)
+            if len(self.sessions) >= self.max_sessions:
+                self.rejected += 1
+                log.warning("Too many trackers, ignoring %s", self.name_for(key))
+                return None
+            session = self.sessions[key] = ClientSession(key, self.name_for(key))
+            log.info("New tracker %s", session.name)
+        session.last_seen = now
+        session.packets += 1
+        return session
+    
+    def maybe_expire(self, now=None):
+        now = time.time() if now is None else now
+        if now - self._last_expiry >= 1.0:
+            self.expire(now)
+    
+    def expire(self, now=None):
+        """Drop the sessions of trackers that stopped sending"""
+        now = time.time() if now is None else now
+        self._last_expiry = now
+        for key, session in list(self.sessions.items()):
+            if now - session.last_seen > self.timeout:
+                end_paint_stroke(session)
+                del self.sessions[key]
+                log.info("Tracker %s timed out", session.name)
+    
+    def selected_objects(self):
+        return [session.selected_object for session in self.sessions.values()
+                if session.selected_object is not None]
+    
+    def forget_object(self, obj):
+        """Clear the selection of every session holding obj (about to be deleted)"""
+        for session in self.sessions.values():
+            if session.selected_object is not None and session.selected_object == obj:
+                session.selected_object = None
+    
+    def clear(self):
+        self.sessions.clear()
+
+mailbox = PacketMailbox()
+# Packets polled from the shared-memory rings, posted by the main thread
+shm_mailbox = PacketMailbox()
+shm_readers = []
+sessions = SessionTable()
+# Key of packets handed to handle_data() directly instead of through the socket
+LOCAL_CLIENT = ("local", "local")
+# Main thread only: one line per interval with the gestures applied
+applied_gestures = log_setup.EventCounter(log, "gestures applied", log_stats_interval) if has_log_setup else None
+latency_tracer = latency_trace.LatencyTracer() if has_latency_trace else None
+last_latency_dump = time.time()
 
 def play_sound(sound_type):
     """Play a sound effect if playsound is available"""
@@ -75,16 +341,352 @@ def play_sound(sound_type):
         try:
             playsound(sound_path, block=False)
         except Exception as e:
-            print(f"Could not play sound: {sound_path} - {e}")
+            log.warning("Could not play sound: %s - %s", sound_path, e)
     else:
-        print(f"Sound file not found: {sound_path}")
+        log.warning("Sound file not found: %s", sound_path)
+
+class MaterialRegistry:
+    """Shared materials keyed by their parameters, with reference counts.
+    
+    Objects that look the same use the same material (and so the same
+    compiled shader) instead of a copy each. A material is counted once
+    per user that acquired it and is deleted when the last one releases
+    it. The key is also stored on the material, so materials saved in the
+    .blend file are reused after it is reopened.
+    """
+    
+    KEY_PROPERTY = "material_registry_key"
+    
+    def __init__(self):
+        self.names = {}  # key -> material name
+        self.refs = {}   # material name -> reference count
+        self.scanned = False
+    
+    def invalidate(self):
+        """Forget all materials, e.g. after another file was loaded"""
+        self.names.clear()
+        self.refs.clear()
+        self.scanned = False
+    
+    def _scan(self):
+        """Adopt registry materials that already exist in the file"""
+        for mat in bpy.data.materials:
+            key = mat.get(self.KEY_PROPERTY)
+            if key is not None and key not in self.names:
+                self.names[key] = mat.name
+                self.refs[mat.name] = mat.users - (1 if mat.use_fake_user else 0)
+        self.scanned = True
+    
+    def acquire(self, kind, params, build):
+        """Return the material for (kind, params), calling build() to create it if needed"""
+        if not self.scanned:
+            self._scan()
+        key = f"{kind}:{params!r}"
+        name = self.names.get(key)
+        mat = bpy.data.materials.get(name) if name else None
+        if mat is None:
+            mat = build()
+            mat[self.KEY_PROPERTY] = key
+            self.names[key] = mat.name
+            self.refs[mat.name] = 0
+        self.refs[mat.name] += 1
+        return mat
+    
+    def retain(self, obj):
+        """Count the materials of an object copied from another one (e.g. a duplicate)"""
+        for slot in obj.material_slots:
+            if slot.material and slot.material.name in self.refs:
+                self.refs[slot.material.name] += 1
+    
+    def release(self, mat):
+        """Drop one reference; the material is deleted once nothing uses it"""
+        if mat.name in self.refs:
+            self.refs[mat.name] -= 1
+            if self.refs[mat.name] > 0:
+                return
+            del self.refs[mat.name]
+            self.names.pop(mat.get(self.KEY_PROPERTY), None)
+        if mat.users == 0:
+            bpy.data.materials.remove(mat)
+    
+    def stats(self):
+        """Return the number of registry materials and their total references"""
+        return {"materials": len(self.refs), "references": sum(self.refs.values())}
+
+material_registry = MaterialRegistry()
 
-def create_y2k_material(name="Y2K_Material"):
+def delete_object(obj):
+    """Delete an object along with its mesh and materials if nothing else uses them"""
+    materials = [slot.material for slot in obj.material_slots if slot.material]
+    mesh = obj.data if obj.type == 'MESH' else None
+    sessions.forget_object(obj)
+    pick_index.remove(obj)
+    bpy.data.objects.remove(obj, do_unlink=True)
+    if mesh is not None and mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+    for mat in materials:
+        material_registry.release(mat)
+
+# Scene changes go through bpy.data instead of operators: no undo pushes,
+# context checks or whole-scene selection passes per gesture
+def shared_plane_mesh(size):
+    """Return the plane mesh of a given size shared by all planes of that size"""
+    name = f"Y2K_Plane_{size:g}"
+    mesh = bpy.data.meshes.get(name)
+    if mesh is not None:
+        return mesh
+    
+    half = size / 2
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata([(-half, -half, 0), (half, -half, 0), (-half, half, 0), (half, half, 0)], [], [(0, 1, 3, 2)])
+    uv_layer = mesh.uv_layers.new(name="UVMap")
+    uv_layer.data.foreach_set("uv", (0, 0, 1, 0, 1, 1, 0, 1))
+    # One empty slot; planes put their own material in it (object-linked)
+    mesh.materials.append(None)
+    mesh.update()
+    return mesh
+
+def set_object_material(obj, mat):
+    """Give an object its own material without touching its (possibly shared) mesh"""
+    if not obj.material_slots:
+        obj.data.materials.append(None)
+    slot = obj.material_slots[0]
+    slot.link = 'OBJECT'
+    slot.material = mat
+
+def new_plane_object(name, size, location, mat=None):
+    """Create a plane object on the shared mesh and link it to the scene"""
+    obj = bpy.data.objects.new(name, shared_plane_mesh(size))
+    obj.location = location
+    bpy.context.scene.collection.objects.link(obj)
+    if mat is not None:
+        set_object_material(obj, mat)
+    pick_index.add(obj)
+    return obj
+
+def duplicate_object(obj, name=None):
+    """Copy an object (sharing its mesh) into the same collections"""
+    copy = obj.copy()
+    if name:
+        copy.name = name
+    for collection in obj.users_collection:
+        collection.objects.link(copy)
+    pick_index.add(copy)
+    material_registry.retain(copy)
+    return copy
+
+def select_only(obj, previous=None):
+    """Make obj selected and active, deselecting previous (the tracker's last selection).
+    
+    The active object is deselected too, unless another tracker has it selected.
+    """
+    view_layer = bpy.context.view_layer
+    active = view_layer.objects.active
+    if active is not None and any(active == other for other in sessions.selected_objects()):
+        active = None
+    for previous in (previous, active):
+        if previous is not None and previous != obj:
+            try:
+                previous.select_set(False)
+            except ReferenceError:
+                pass  # Already deleted
+    if obj is not None:
+        obj.select_set(True)
+    view_layer.objects.active = obj
+
+class ImageCatalog:
+    """Index of the image library with a shared, memory-bounded texture cache.
+    
+    The directory is listed once and then only rescanned when its mtime
+    changes (checked at most every rescan_interval seconds); files whose
+    mtime changed are reloaded. Images are loaded on first use, with one
+    bpy.data.images entry per path. When the estimated decoded size of
+    the loaded images exceeds budget_mb, the least recently used ones that
+    no plane shows any more are removed. Images still in use are never
+    evicted, as a plane drawing them would only decode them again, so the
+    scene itself can take more than the budget.
+    
+    With a pyramid builder (see texture_cache.py) every library image is
+    decoded in the background as soon as it is found, and planes get a
+    cached level of about proxy_size pixels instead of the full image. The
+    full-resolution files are swapped in for saving and rendering.
+    """
+    
+    EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+    FULL_RES_PROPERTY = "full_resolution_path"
+    PROXY_PROPERTY = "proxy_path"
+    
+    def __init__(self, directory, budget_mb=1024, rescan_interval=2.0, proxy_size=0, pyramids=None):
+        self.directory = directory
+        self.budget = budget_mb * 1024 * 1024
+        self.rescan_interval = rescan_interval
+        self.proxy_size = proxy_size if pyramids is not None else 0
+        self.pyramids = pyramids
+        self.files = {}  # path -> mtime
+        self.images = OrderedDict()  # path -> (image name, estimated bytes), least recently used first
+        self.resident = 0  # Estimated bytes of the images in self.images
+        self.outdated = set()  # Paths whose proxy waits for the edited file to be decoded
+        self._dir_mtime = None
+        self._last_check = 0.0
+    
+    def invalidate(self):
+        """Forget the loaded images, e.g. after another file was loaded"""
+        self.images.clear()
+        self.outdated.clear()
+        self.resident = 0
+    
+    def refresh(self, force=False):
+        """Rescan the directory if it changed since the last scan"""
+        now = time.time()
+        if not force and now - self._last_check < self.rescan_interval:
+            return
+        self._last_check = now
+        self._update_outdated()
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime
+        except OSError:
+            self.files = {}
+            self._dir_mtime = None
+            return
+        if dir_mtime == self._dir_mtime and not force:
+            return
+        self._dir_mtime = dir_mtime
+        
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(self.EXTENSIONS):
+                    files[entry.path] = entry.stat().st_mtime
+        
+        for path in self.files.keys() - files.keys():
+            self._unload(path)
+        for path, mtime in files.items():
+            if path in self.files and self.files[path] != mtime:
+                self._reload(path)
+        self.files = files
+        
+        # Decode everything ahead of time, already built images are skipped
+        if self.proxy_size:
+            self.pyramids.prefetch(sorted(files))
+    
+    def paths(self):
+        """Image files in the library, sorted by name"""
+        self.refresh()
+        return sorted(self.files)
+    
+    def image(self, path):
+        """Return the shared image for a path, loading it on first use"""
+        self.refresh()
+        cached = self.images.get(path)
+        img = bpy.data.images.get(cached[0]) if cached else None
+        if img is None:
+            if cached:
+                self._forget(path)
+            img = self._load(path)
+            width, height = img.size
+            size = width * height * img.channels * (4 if img.is_float else 1)
+            self.images[path] = (img.name, size)
+            self.resident += size
+        else:
+            self.images.move_to_end(path)
+        self._evict(keep=path)
+        return img
+    
+    def _load(self, path):
+        """Load the proxy level of an image if it is ready, otherwise the file itself"""
+        level_path = self.pyramids.level(path, self.proxy_size) if self.proxy_size else None
+        if level_path is None:
+            return bpy.data.images.load(path, check_existing=True)
+        img = bpy.data.images.load(level_path, check_existing=True)
+        img.name = f"proxy_{os.path.basename(path)}"
+        img[self.FULL_RES_PROPERTY] = path
+        img[self.PROXY_PROPERTY] = level_path
+        return img
+    
+    def _evict(self, keep=None):
+        """Remove least recently used images without users until the cache fits the budget"""
+        for path in list(self.images):
+            if self.resident <= self.budget:
+                break
+            if path == keep:
+                continue
+            img = bpy.data.images.get(self.images[path][0])
+            if img is not None:
+                if img.users > 0:
+                    continue  # Shown by a plane
+                bpy.data.images.remove(img)
+            self._forget(path)
+    
+    def _forget(self, path):
+        _, size = self.images.pop(path)
+        self.resident -= size
+    
+    def _reload(self, path):
+        """The file changed on disk, update its image in place so materials keep it"""
+        cached = self.images.get(path)
+        img = bpy.data.images.get(cached[0]) if cached else None
+        if img is None:
+            return
+        if self.PROXY_PROPERTY in img:
+            # Switched to the new file's level once it is decoded
+            self.pyramids.prefetch([path])
+            self.outdated.add(path)
+        else:
+            img.reload()
+    
+    def _update_outdated(self):
+        """Point proxies of edited files at their new level when it is ready"""
+        for path in list(self.outdated):
+            cached = self.images.get(path)
+            img = bpy.data.images.get(cached[0]) if cached else None
+            level_path = self.pyramids.level(path, self.proxy_size)
+            if img is None:
+                self.outdated.discard(path)
+            elif level_path is not None:
+                img.filepath = level_path
+                img[self.PROXY_PROPERTY] = level_path
+                img.reload()
+                self.outdated.discard(path)
+    
+    def _unload(self, path):
+        """The file is gone, drop its image if nothing uses it"""
+        self.outdated.discard(path)
+        cached = self.images.get(path)
+        if not cached:
+            return
+        img = bpy.data.images.get(cached[0])
+        if img is not None and img.users == 0:
+            bpy.data.images.remove(img)
+        self._forget(path)
+    
+    def use_full_resolution(self, full):
+        """Swap proxies for their original files (for saving and rendering) or back"""
+        for img in bpy.data.images:
+            if self.FULL_RES_PROPERTY not in img:
+                continue
+            filepath = img[self.FULL_RES_PROPERTY] if full else img[self.PROXY_PROPERTY]
+            if img.filepath != filepath and os.path.exists(filepath):
+                img.filepath = filepath
+                img.reload()
+    
+    def stats(self):
+        """Return the number of cached images, their estimated size in MB and pending decodes"""
+        return {"images": len(self.images), "resident_mb": self.resident / (1024 * 1024),
+                "pending": self.pyramids.pending() if self.proxy_size else 0}
+
+# Decode library images in the background when OpenCV or Pillow is available
+pyramid_builder = None
+if has_texture_cache:
+    pyramid_builder = texture_cache.PyramidBuilder(os.path.join(IMAGES_DIR, texture_cache.CACHE_DIR_NAME))
+image_catalog = ImageCatalog(IMAGES_DIR, budget_mb=image_cache_budget_mb, proxy_size=image_proxy_size,
+                             pyramids=pyramid_builder)
+
+def create_y2k_material(name="Y2K_Material", color=(0, 0.8, 1.0, 1.0)):
+    """Get the Y2K-inspired material with neon glow for an emission color"""
+    return material_registry.acquire("y2k", tuple(color), lambda: build_y2k_material(name, color))
+
+def build_y2k_material(name, color):
     """Create a Y2K-inspired material with neon glow"""
-    # Check if material already exists
-    if name in bpy.data.materials:
-        return bpy.data.materials[name]
-        
     # Create new material
     mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
@@ -102,8 +704,8 @@ def create_y2k_material(name="Y2K_Material"):
     glass = nodes.new(type='ShaderNodeBsdfGlass')
     fresnel = nodes.new(type='ShaderNodeFresnel')
     
-    # Set emission color to cyan (Y2K style)
-    emission.inputs[0].default_value = (0, 0.8, 1.0, 1.0)  # Cyan
+    # Set emission color (cyan by default, Y2K style)
+    emission.inputs[0].default_value = color
     emission.inputs[1].default_value = 2.0  # Strength
     
     # Set glass color to slightly blue tint
@@ -118,6 +720,11 @@ def create_y2k_material(name="Y2K_Material"):
     return mat
 
 def create_image_material(image_path, name="Image_Material"):
+    """Get the material showing an image file"""
+    return material_registry.acquire("image", os.path.abspath(image_path),
+                                     lambda: build_image_material(image_path, name))
+
+def build_image_material(image_path, name):
     """Create a material with image texture"""
     # Create new material
     mat = bpy.data.materials.new(name=name)
@@ -139,20 +746,21 @@ def create_image_material(image_path, name="Image_Material"):
     # Load image
     try:
         if os.path.exists(image_path):
-            img = bpy.data.images.load(image_path)
+            img = image_catalog.image(image_path)
             tex_image.image = img
-            print(f"Loaded image: {image_path}")
+            log.debug("Loaded image: %s", image_path)
         else:
-            print(f"Image file not found: {image_path}")
+            log.warning("Image file not found: %s", image_path)
             tex_image.image = None
     except Exception as e:
-        print(f"Failed to load image {image_path}: {e}")
+        log.error("Failed to load image %s: %s", image_path, e)
         # Set a default color
         tex_image.image = None
     
     # Connect nodes
-    links.new(tex_image.outputs[0], principled.inputs[0])  # Base Color
-    links.new(tex_image.outputs[0], emission.inputs[0])    # Emission Color
+    color = add_rgb_split_nodes(nodes, links, tex_image)
+    links.new(color, principled.inputs[0])  # Base Color
+    links.new(color, emission.inputs[0])    # Emission Color
     emission.inputs[1].default_value = 1.0                 # Emission Strength
     
     links.new(principled.outputs[0], mix.inputs[1])
@@ -163,6 +771,55 @@ def create_image_material(image_path, name="Image_Material"):
     
     return mat
 
+def add_rgb_split_nodes(nodes, links, tex_image):
+    """Add the RGB split effect to an image material, return its color output.
+    
+    Each channel is sampled from the image at its own UV offset and scale,
+    multiplied by the object's rgb_split property (read through an Object
+    attribute node). At 0 all three samples match and the image looks
+    unchanged, so the effect costs no extra objects or materials and
+    changing it never recompiles the shader.
+    """
+    coords = nodes.new(type='ShaderNodeTexCoord')
+    spread = nodes.new(type='ShaderNodeAttribute')
+    spread.name = RGB_SPLIT_NODE
+    spread.attribute_type = 'OBJECT'
+    spread.attribute_name = RGB_SPLIT_PROPERTY
+    
+    # UVs relative to the image center, so the scale grows the layer around it
+    centered = nodes.new(type='ShaderNodeVectorMath')
+    centered.operation = 'SUBTRACT'
+    centered.inputs[1].default_value = (0.5, 0.5, 0.0)
+    links.new(coords.outputs['UV'], centered.inputs[0])
+    
+    combine = nodes.new(type='ShaderNodeCombineColor')
+    for channel, ((dx, dy), scale) in enumerate(RGB_SPLIT_CHANNELS):
+        # uv + spread * (offset + centered uv * scale)
+        shift = nodes.new(type='ShaderNodeVectorMath')
+        shift.operation = 'MULTIPLY_ADD'
+        shift.inputs[1].default_value = (scale, scale, 0.0)
+        shift.inputs[2].default_value = (dx, dy, 0.0)
+        links.new(centered.outputs[0], shift.inputs[0])
+        scaled = nodes.new(type='ShaderNodeVectorMath')
+        scaled.operation = 'SCALE'
+        links.new(shift.outputs[0], scaled.inputs[0])
+        links.new(spread.outputs['Fac'], scaled.inputs['Scale'])
+        moved = nodes.new(type='ShaderNodeVectorMath')
+        moved.operation = 'ADD'
+        links.new(coords.outputs['UV'], moved.inputs[0])
+        links.new(scaled.outputs[0], moved.inputs[1])
+        
+        # The original texture node samples red, copies of it the other channels
+        sample = tex_image if channel == 0 else nodes.new(type='ShaderNodeTexImage')
+        sample.image = tex_image.image
+        sample.extension = 'EXTEND'
+        links.new(moved.outputs[0], sample.inputs['Vector'])
+        separate = nodes.new(type='ShaderNodeSeparateColor')
+        links.new(sample.outputs['Color'], separate.inputs[0])
+        links.new(separate.outputs[channel], combine.inputs[channel])
+    
+    return combine.outputs[0]
+
 def setup_scene():
     """Set up the initial 3D scene with a Y2K aesthetic"""
     try:
@@ -188,29 +845,26 @@ def setup_scene():
         # Create initial image planes
         create_image_planes()
         
-        print("Scene setup complete")
+        log.info("Scene setup complete")
     except Exception as e:
-        print(f"Error in setup_scene: {e}")
+        log.error("Error in setup_scene: %s", e)
 
 def create_image_planes():
     """Create planes with image textures for manipulation"""
     try:
         # Check if images directory exists
         if not os.path.exists(IMAGES_DIR):
-            print(f"Warning: Images directory not found at {IMAGES_DIR}")
-            print("Creating default planes without images")
+            log.warning("Images directory not found at %s", IMAGES_DIR)
+            log.warning("Creating default planes without images")
             # Create default planes with Y2K material
             create_default_planes()
             return
 
         # Get list of image files
-        image_files = []
-        for file in os.listdir(IMAGES_DIR):
-            if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
-                image_files.append(os.path.join(IMAGES_DIR, file))
+        image_files = image_catalog.paths()
         
         if not image_files:
-            print(f"No image files found in {IMAGES_DIR}")
+            log.warning("No image files found in %s", IMAGES_DIR)
             # Create default planes instead
             create_default_planes()
             return
@@ -226,98 +880,291 @@ def create_image_planes():
             x = (col - grid_size/2 + 0.5) * spacing
             y = (row - grid_size/2 + 0.5) * spacing
             
-            # Create plane
-            bpy.ops.mesh.primitive_plane_add(size=1.5, location=(x, y, 0))
-            plane = bpy.context.active_object
-            plane.name = f"ImagePlane_{i}"
-            
-            # Create and apply material with image texture
+            # Create plane with material with image texture
             mat = create_image_material(image_path, name=f"Image_Material_{i}")
-            if len(plane.data.materials) == 0:
-                plane.data.materials.append(mat)
-            else:
-                plane.data.materials[0] = mat
+            new_plane_object(f"ImagePlane_{i}", 1.5, (x, y, 0), mat)
             
-            print(f"Created image plane with {os.path.basename(image_path)}")
+            log.debug("Created image plane with %s", os.path.basename(image_path))
     except Exception as e:
-        print(f"Error in create_image_planes: {e}")
+        log.error("Error in create_image_planes: %s", e)
         create_default_planes()
 
-def ray_cast_select(x, y):
+class PickIndex:
+    """Screen-space index of the objects that can be selected by pointing.
+
+    Each interactive object is stored with the camera-view rectangle of its
+    bounding box in a uniform grid, so a pick only looks at the objects
+    under the hand instead of every object in the scene. Entries are
+    updated incrementally: created objects are added, deleted ones removed
+    and moved ones (reported by the depsgraph handler) re-projected lazily
+    on the next pick.
+    
+    Everything has to be re-projected on first use and when the camera
+    changes. That rebuild is spread over timer ticks, step_budget seconds
+    at a time, and picks use Blender's own scene ray cast until it is done.
+    """
+    
+    def __init__(self, grid_size=16, tolerance=0.04, step_budget=0.002):
+        self.grid_size = grid_size
+        self.tolerance = tolerance  # Screen distance still counted as pointing at an object
+        self.step_budget = step_budget
+        self.entries = {}   # pointer -> (object, rect, cells)
+        self.cells = {}     # (column, row) -> set of pointers
+        self.dirty = set()  # Pointers of objects to re-project before the next pick
+        self.pending = {}   # pointer -> object still to project in the current rebuild
+        self.camera_key = None
+    
+    @property
+    def ready(self):
+        """Whether the index covers the scene as seen from the current camera"""
+        return self.camera_key is not None and not self.pending
+    
+    @staticmethod
+    def is_pickable(obj):
+        """Meshes except the floor grid and paint strokes"""
+        return obj.type == 'MESH' and "Grid" not in obj.name and not obj.name.startswith(("PaintPoint_", "PaintStroke_"))
+    
+    def invalidate(self):
+        """Forget everything, the next refresh rebuilds the index"""
+        self.entries.clear()
+        self.cells.clear()
+        self.dirty.clear()
+        self.pending.clear()
+        self.camera_key = None
+    
+    def add(self, obj):
+        """Add a new object (or mark a known one as moved)"""
+        if obj is not None and self.is_pickable(obj):
+            self.dirty.add(obj.as_pointer())
+            self.entries.setdefault(obj.as_pointer(), (obj, None, ()))
+    
+    def moved(self, obj):
+        """Mark an object as moved; unknown pickable objects are added"""
+        pointer = obj.as_pointer()
+        if pointer in self.entries:
+            self.dirty.add(pointer)
+        elif self.camera_key is not None:
+            self.add(obj)
+    
+    def remove(self, obj):
+        """Drop an object, call before it is deleted"""
+        self._remove_pointer(obj.as_pointer())
+    
+    def _remove_pointer(self, pointer):
+        self.dirty.discard(pointer)
+        self.pending.pop(pointer, None)
+        entry = self.entries.pop(pointer, None)
+        if entry:
+            for cell in entry[2]:
+                self.cells[cell].discard(pointer)
+    
+    def _camera_state(self, scene):
+        camera = scene.camera
+        render = scene.render
+        return (camera.as_pointer(), tuple(tuple(row) for row in camera.matrix_world),
+                camera.data.type, camera.data.lens, camera.data.ortho_scale,
+                camera.data.sensor_width, camera.data.sensor_fit, camera.data.shift_x, camera.data.shift_y,
+                render.resolution_x, render.resolution_y, render.pixel_aspect_x, render.pixel_aspect_y)
+    
+    def _project(self, scene, obj, pointer):
+        """Recompute the screen rectangle and grid cells of one object"""
+        self._remove_pointer(pointer)
+        if not self.is_pickable(obj):
+            return
+        
+        matrix = obj.matrix_world
+        corners = [world_to_camera_view(scene, scene.camera, matrix @ Vector(corner)) for corner in obj.bound_box]
+        if all(corner.z <= 0 for corner in corners):
+            # Behind the camera
+            self.entries[pointer] = (obj, None, ())
+            return
+        if any(corner.z <= 0 for corner in corners):
+            # Crosses the camera plane, the projection is unbounded
+            rect = (0.0, 0.0, 1.0, 1.0)
+        else:
+            rect = (min(c.x for c in corners), min(c.y for c in corners),
+                    max(c.x for c in corners), max(c.y for c in corners))
+        
+        cells = tuple(self._cells_in(rect))
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(pointer)
+        self.entries[pointer] = (obj, rect, cells)
+    
+    def _cells_in(self, rect):
+        last = self.grid_size - 1
+        x0 = min(max(int(rect[0] * self.grid_size), 0), last)
+        y0 = min(max(int(rect[1] * self.grid_size), 0), last)
+        x1 = min(max(int(rect[2] * self.grid_size), 0), last)
+        y1 = min(max(int(rect[3] * self.grid_size), 0), last)
+        if rect[2] < 0 or rect[3] < 0 or rect[0] > 1 or rect[1] > 1:
+            return  # Off screen
+        for column in range(x0, x1 + 1):
+            for row in range(y0, y1 + 1):
+                yield (column, row)
+    
+    def refresh(self, scene, budget=None):
+        """Bring the index up to date with the camera and moved objects.
+        
+        A camera change starts a rebuild. With a budget in seconds the
+        rebuild stops when it is used up and goes on with the next call,
+        otherwise it is finished right away. Returns whether the index is
+        ready.
+        """
+        if self.dirty or self.camera_key is None:
+            # matrix_world of new or moved objects is only updated by the depsgraph
+            bpy.context.view_layer.update()
+        camera_key = self._camera_state(scene)
+        if camera_key != self.camera_key:
+            # First use or the camera changed: project every object again
+            self.invalidate()
+            self.camera_key = camera_key
+            self.pending = {obj.as_pointer(): obj for obj in scene.objects if self.is_pickable(obj)}
+        
+        deadline = time.perf_counter() + budget if budget is not None else None
+        while self.pending:
+            pointer, obj = self.pending.popitem()
+            self._project_or_drop(scene, obj, pointer)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        
+        for pointer in list(self.dirty):
+            self._project_or_drop(scene, self.entries.get(pointer, (None,))[0], pointer)
+        self.dirty.clear()
+        return not self.pending
+    
+    def _project_or_drop(self, scene, obj, pointer):
+        try:
+            self._project(scene, obj, pointer)
+        except (ReferenceError, AttributeError):
+            # Deleted without going through remove()
+            self._remove_pointer(pointer)
+    
+    def step(self, scene):
+        """Go on with a rebuild for one timer tick (main thread)"""
+        if not self.ready and scene.camera is not None:
+            self.refresh(scene, self.step_budget)
+    
+    def camera_ray(self, scene, screen_x, screen_y):
+        """World-space origin and direction of the camera ray through a camera-view point"""
+        camera = scene.camera
+        frame = camera.data.view_frame(scene=scene)  # Top right, bottom right, bottom left, top left
+        local = frame[2] + (frame[1] - frame[2]) * screen_x + (frame[3] - frame[2]) * screen_y
+        matrix = camera.matrix_world
+        if camera.data.type == 'ORTHO':
+            return matrix @ Vector((local.x, local.y, 0.0)), matrix.to_3x3() @ Vector((0.0, 0.0, -1.0))
+        origin = matrix.translation.copy()
+        return origin, (matrix @ local) - origin
+    
+    def pick(self, scene, screen_x, screen_y):
+        """Return the object under a camera-view point (0-1, origin bottom left), or None.
+        
+        Candidates from the grid are tested with an exact ray cast and the
+        nearest hit wins. Without a hit, the object whose rectangle is
+        closest within the tolerance is picked, since pointing is not
+        pixel precise. While the index is being rebuilt (by the timer, see
+        step()) the scene is ray cast instead, without the tolerance.
+        """
+        if not self.refresh(scene, budget=0.0):
+            return self.scene_pick(scene, screen_x, screen_y)
+        
+        # Cells around the point, wide enough for the tolerance
+        candidates = set()
+        for column, row in self._cells_in((screen_x - self.tolerance, screen_y - self.tolerance,
+                                           screen_x + self.tolerance, screen_y + self.tolerance)):
+            candidates.update(self.cells.get((column, row), ()))
+        if not candidates:
+            return None
+        
+        origin, direction = self.camera_ray(scene, screen_x, screen_y)
+        best_hit, best_distance = None, float('inf')
+        nearest, nearest_gap = None, float('inf')
+        for pointer in candidates:
+            obj, rect, _ = self.entries[pointer]
+            try:
+                if not obj.visible_get():
+                    continue
+                gap = math.hypot(max(rect[0] - screen_x, 0.0, screen_x - rect[2]),
+                                 max(rect[1] - screen_y, 0.0, screen_y - rect[3]))
+                if gap > self.tolerance:
+                    continue
+                if gap < nearest_gap:
+                    nearest, nearest_gap = obj, gap
+                if gap > 0:
+                    continue
+                
+                # Exact test in object space
+                inverse = obj.matrix_world.inverted()
+                hit, location, _, _ = obj.ray_cast(inverse @ origin, inverse.to_3x3() @ direction)
+                if hit:
+                    distance = ((obj.matrix_world @ location) - origin).length
+                    if distance < best_distance:
+                        best_hit, best_distance = obj, distance
+            except ReferenceError:
+                self.dirty.add(pointer)  # Removed on the next refresh
+        return best_hit or nearest
+    
+    def scene_pick(self, scene, screen_x, screen_y):
+        """Return the nearest pickable object the camera ray through a point hits, or None"""
+        origin, direction = self.camera_ray(scene, screen_x, screen_y)
+        direction = direction.normalized()
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        # Look through whatever cannot be picked (the grid, paint strokes)
+        for _ in range(8):
+            hit, location, _, _, obj, _ = scene.ray_cast(depsgraph, origin, direction)
+            if not hit:
+                return None
+            obj = obj.original
+            if self.is_pickable(obj):
+                return obj
+            origin = location + direction * 1e-4
+        return None
+
+pick_index = PickIndex()
+
+def report(session, text):
+    """Show an action in the overlay, with the tracker's name when several share the scene"""
+    global last_action_info
+    if session is None:
+        last_action_info = text
+        return
+    last_action_info = f"{session.name}: {text}" if len(sessions.sessions) > 1 else text
+    session.action_info = text
+
+def ray_cast_select(session, x, y):
     """Ray cast from camera through screen coordinates to select an object"""
-    global selected_object, last_action_info
     
     try:
         scene = bpy.context.scene
-        view_layer = bpy.context.view_layer
-        
-        # Convert normalized coordinates to view space (-1 to 1)
-        view_x = (x - 0.5) * 2
-        view_y = (0.5 - y) * 2  # Flip Y coordinate
         
         # Get active camera
         if scene.camera is None:
-            print("No active camera in scene")
+            log.warning("No active camera in scene")
             return None
         
-        # Simple approach: select object closest to center of view
-        min_distance = float('inf')
-        closest_obj = None
-        camera = scene.camera
-        
-        # Check all objects
-        for obj in scene.objects:
-            # Skip non-mesh objects and grid
-            if obj.type != 'MESH' or "Grid" in obj.name:
-                continue
-                
-            # Get object coordinates in world space
-            obj_loc = obj.matrix_world.translation
-            
-            # Project to camera view
-            cam_direction = (obj_loc - camera.matrix_world.translation).normalized()
-            
-            # Simple distance metric
-            distance = (obj_loc - camera.matrix_world.translation).length
-            
-            # Weight by how centered the object is (simplified approximation)
-            obj_view_x = cam_direction.x
-            obj_view_y = cam_direction.z  # Assuming Z-up
-            
-            # Calculate how well this matches the requested position
-            position_match = ((obj_view_x - view_x)**2 + (obj_view_y - view_y)**2) * 2
-            
-            # Overall score (lower is better)
-            score = distance + position_match
-            
-            if score < min_distance:
-                min_distance = score
-                closest_obj = obj
+        # Hand coordinates have their origin top left, camera view bottom left
+        closest_obj = pick_index.pick(scene, x, 1.0 - y)
         
         if closest_obj:
-            # Deselect all
-            bpy.ops.object.select_all(action='DESELECT')
-            # Select closest object
-            closest_obj.select_set(True)
-            bpy.context.view_layer.objects.active = closest_obj
-            selected_object = closest_obj
-            last_action_info = f"Selected: {closest_obj.name}"
-            print(f"Selected: {closest_obj.name}")
+            # Select closest object, deselecting only what was selected before
+            select_only(closest_obj, session.selected_object)
+            session.selected_object = closest_obj
+            report(session, f"Selected: {closest_obj.name}")
+            log.debug("Selected: %s", closest_obj.name)
             play_sound("select")
             return closest_obj
         else:
-            last_action_info = "No object selected"
-            selected_object = None
+            report(session, "No object selected")
+            session.selected_object = None
             return None
     except Exception as e:
-        print(f"Error in ray_cast_select: {e}")
+        log.error("Error in ray_cast_select: %s", e)
         return None
 
-def move_selected_object(x, y, prev_x=None, prev_y=None):
+def move_selected_object(session, x, y, prev_x=None, prev_y=None):
     """Move the selected object based on hand movement with improved smoothing"""
-    global last_position, selected_object, last_action_info, position_history
-    
     try:
+        selected_object = session.selected_object
+        position_history = session.position_history
         if not selected_object:
             return
         
@@ -347,22 +1194,21 @@ def move_selected_object(x, y, prev_x=None, prev_y=None):
             selected_object.location.x += avg_dx * delta_smoothing
             selected_object.location.y += avg_dy * delta_smoothing
             
-            last_action_info = f"Moving {selected_object.name}: X:{avg_dx:.2f} Y:{avg_dy:.2f}"
+            report(session, f"Moving {selected_object.name}: X:{avg_dx:.2f} Y:{avg_dy:.2f}")
             
             # Play sound if movement is significant
             if abs(avg_dx) > 0.01 or abs(avg_dy) > 0.01:
                 play_sound("move")
             
         # Update last position
-        last_position = (x, y)
+        session.last_position = (x, y)
     except Exception as e:
-        print(f"Error in move_selected_object: {e}")
+        log.error("Error in move_selected_object: %s", e)
 
-def rotate_and_scale_object(x1, y1, x2, y2, prev_x1=None, prev_y1=None, prev_x2=None, prev_y2=None):
+def rotate_and_scale_object(session, x1, y1, x2, y2, prev_x1=None, prev_y1=None, prev_x2=None, prev_y2=None):
     """Rotate and scale selected object using two-hand gestures"""
-    global selected_object, last_action_info
-    
     try:
+        selected_object = session.selected_object
         if not selected_object or prev_x1 is None or prev_y1 is None or prev_x2 is None or prev_y2 is None:
             return
         
@@ -404,29 +1250,26 @@ def rotate_and_scale_object(x1, y1, x2, y2, prev_x1=None, prev_y1=None, prev_x2=
         
         # Update action info
         if rotation_applied and scaling_applied:
-            last_action_info = f"Rotating and scaling {selected_object.name}"
+            report(session, f"Rotating and scaling {selected_object.name}")
         elif rotation_applied:
-            last_action_info = f"Rotating {selected_object.name}"
+            report(session, f"Rotating {selected_object.name}")
         elif scaling_applied:
-            last_action_info = f"Scaling {selected_object.name}"
+            report(session, f"Scaling {selected_object.name}")
     except Exception as e:
-        print(f"Error in rotate_and_scale_object: {e}")
+        log.error("Error in rotate_and_scale_object: %s", e)
 
 # Add this function to create a material for paint strokes
-def create_paint_material(color=None):
-    """Create a glowing material for paint strokes"""
-    if color is None:
-        # Generate a random Y2K-style color if none provided
-        color = (
-            random.uniform(0.0, 1.0),
-            random.uniform(0.0, 1.0),
-            1.0,  # Keep blue high for Y2K look
-            1.0
-        )
+def create_paint_material():
+    """Get the glowing material shared by all paint strokes.
     
-    # Create new material
-    mat_name = f"Paint_Material_{len(bpy.data.materials)}"
-    mat = bpy.data.materials.new(name=mat_name)
+    The color comes from each point's paint_color attribute, read through
+    the instancer since the points are drawn as instances.
+    """
+    return material_registry.acquire("paint", PAINT_COLOR_ATTRIBUTE, build_paint_material)
+
+def build_paint_material():
+    """Create the shared paint stroke material"""
+    mat = bpy.data.materials.new(name=PAINT_MATERIAL_NAME)
     mat.use_nodes = True
     nodes = mat.node_tree.nodes
     links = mat.node_tree.links
@@ -438,20 +1281,151 @@ def create_paint_material(color=None):
     # Create emission shader for the glow effect
     output = nodes.new(type='ShaderNodeOutputMaterial')
     emission = nodes.new(type='ShaderNodeEmission')
+    attribute = nodes.new(type='ShaderNodeAttribute')
+    attribute.attribute_type = 'INSTANCER'
+    attribute.attribute_name = PAINT_COLOR_ATTRIBUTE
     
     # Set color and strength
-    emission.inputs[0].default_value = color
     emission.inputs[1].default_value = 2.0  # Strength
     
     # Connect nodes
+    links.new(attribute.outputs['Color'], emission.inputs[0])
     links.new(emission.outputs[0], output.inputs[0])
     
     return mat
 
-# Add this function to create a sphere at a given point
-def create_paint_point(x, y):
-    """Create a small sphere to represent a paint point at fixed depth"""
-    global paint_plane_distance
+def add_group_socket(group, name, in_out, socket_type):
+    """Add an input or output socket to a node group (Blender 3.x and 4.x APIs)"""
+    if hasattr(group, "interface"):
+        return group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = group.inputs if in_out == 'INPUT' else group.outputs
+    return sockets.new(socket_type, name)
+
+def create_paint_node_group():
+    """Create (once) the geometry nodes group that draws a stroke's points.
+    
+    The stroke mesh only has vertices; one shared UV sphere is instanced on
+    the first Count of them. The mesh grows in chunks, so the vertices past
+    Count are spare capacity and are deleted here.
+    """
+    group = bpy.data.node_groups.get(PAINT_NODE_GROUP_NAME)
+    if group is not None:
+        return group
+    
+    group = bpy.data.node_groups.new(PAINT_NODE_GROUP_NAME, 'GeometryNodeTree')
+    add_group_socket(group, "Geometry", 'INPUT', 'NodeSocketGeometry')
+    add_group_socket(group, "Count", 'INPUT', 'NodeSocketInt')
+    add_group_socket(group, "Radius", 'INPUT', 'NodeSocketFloat')
+    add_group_socket(group, "Geometry", 'OUTPUT', 'NodeSocketGeometry')
+    
+    nodes = group.nodes
+    links = group.links
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    
+    # Delete the points whose index is >= Count
+    index = nodes.new('GeometryNodeInputIndex')
+    half = nodes.new('ShaderNodeMath')
+    half.operation = 'ADD'
+    half.inputs[1].default_value = 0.5
+    unused = nodes.new('ShaderNodeMath')
+    unused.operation = 'GREATER_THAN'
+    delete = nodes.new('GeometryNodeDeleteGeometry')
+    delete.domain = 'POINT'
+    links.new(index.outputs[0], half.inputs[0])
+    links.new(half.outputs[0], unused.inputs[0])
+    links.new(group_input.outputs["Count"], unused.inputs[1])
+    links.new(group_input.outputs["Geometry"], delete.inputs["Geometry"])
+    links.new(unused.outputs[0], delete.inputs["Selection"])
+    
+    # One low-poly sphere with the paint material, instanced on every point
+    sphere = nodes.new('GeometryNodeMeshUVSphere')
+    sphere.inputs["Segments"].default_value = 8
+    sphere.inputs["Rings"].default_value = 8
+    links.new(group_input.outputs["Radius"], sphere.inputs["Radius"])
+    set_material = nodes.new('GeometryNodeSetMaterial')
+    set_material.inputs["Material"].default_value = create_paint_material()
+    links.new(sphere.outputs["Mesh"], set_material.inputs["Geometry"])
+    
+    instance = nodes.new('GeometryNodeInstanceOnPoints')
+    links.new(delete.outputs["Geometry"], instance.inputs["Points"])
+    links.new(set_material.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(instance.outputs["Instances"], group_output.inputs["Geometry"])
+    return group
+
+def group_input_identifier(group, name):
+    """Identifier of a node group input, used as the modifier property key"""
+    if hasattr(group, "interface"):
+        for item in group.interface.items_tree:
+            if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == name:
+                return item.identifier
+        raise KeyError(name)
+    return group.inputs[name].identifier
+
+class PaintStroke:
+    """One continuous paint stroke: a single mesh of points drawn as instances.
+    
+    Adding a point writes only that vertex and its color, so its cost does
+    not depend on the length of the stroke. The mesh grows by doubling, so
+    adding a point does not rebuild the mesh and the number of objects,
+    meshes and materials stays constant however long the stroke is.
+    """
+    
+    def __init__(self, name, radius):
+        self.count = 0
+        self.capacity = 64
+        
+        self.mesh = bpy.data.meshes.new(name)
+        self.mesh.vertices.add(self.capacity)
+        self.mesh.attributes.new(PAINT_COLOR_ATTRIBUTE, 'FLOAT_COLOR', 'POINT')
+        self.obj = bpy.data.objects.new(name, self.mesh)
+        bpy.context.scene.collection.objects.link(self.obj)
+        
+        group = create_paint_node_group()
+        self.modifier = self.obj.modifiers.new("PaintStroke", 'NODES')
+        self.modifier.node_group = group
+        self.count_key = group_input_identifier(group, "Count")
+        self.modifier[self.count_key] = 0
+        self.modifier[group_input_identifier(group, "Radius")] = radius
+    
+    def add_point(self, position, color):
+        """Append one point and update the mesh"""
+        if self.count == self.capacity:
+            self._grow()
+        i = self.count
+        self.mesh.vertices[i].co = position
+        self.mesh.attributes[PAINT_COLOR_ATTRIBUTE].data[i].color = color
+        self.count += 1
+        
+        self.modifier[self.count_key] = self.count
+        self.mesh.update()
+    
+    def _grow(self):
+        """Double the capacity of the mesh, keeping the points already drawn"""
+        extra = self.capacity
+        self.mesh.vertices.add(extra)
+        self.capacity += extra
+    
+    def remove(self):
+        """Delete the stroke's object and mesh"""
+        mesh = self.mesh
+        if self.obj.name in bpy.data.objects:
+            bpy.data.objects.remove(self.obj, do_unlink=True)
+        if mesh.name in bpy.data.meshes:
+            bpy.data.meshes.remove(mesh)
+
+def paint_point_count():
+    """Total number of points in all strokes"""
+    return sum(stroke.count for stroke in paint_trail)
+
+def end_paint_stroke(session=None):
+    """Finish a tracker's current stroke (every tracker's without session)"""
+    for ended in (session,) if session is not None else sessions.sessions.values():
+        ended.current_stroke = None
+
+# Add this function to add a paint point at a given screen position
+def create_paint_point(session, x, y):
+    """Add a paint point at fixed depth to the tracker's current stroke"""
     
     try:
         # Convert screen coordinates to 3D world position
@@ -459,11 +1433,10 @@ def create_paint_point(x, y):
         camera = scene.camera
         
         if not camera:
-            print("No active camera for painting")
+            log.warning("No active camera for painting")
             return None
         
         # Get camera direction and vectors
-        from mathutils import Vector
         cam_loc = camera.matrix_world.translation
         cam_dir = camera.matrix_world.to_quaternion() @ Vector((0, 0, -1))
         cam_right = camera.matrix_world.to_quaternion() @ Vector((1, 0, 0))
@@ -477,99 +1450,83 @@ def create_paint_point(x, y):
         z_depth = paint_plane_distance
         position = cam_loc + cam_dir * z_depth + cam_right * view_x * z_depth * 0.5 + cam_up * view_y * z_depth * 0.5
         
-        # Create the paint point sphere
-        bpy.ops.mesh.primitive_uv_sphere_add(
-            radius=paint_thickness,
-            location=position,
-            segments=8,
-            ring_count=8
-        )
-        
-        # Get the created sphere
-        paint_point = bpy.context.active_object
-        paint_point.name = f"PaintPoint_{len(paint_trail)}"
-        
-        # Apply material
-        mat = create_paint_material(current_paint_color)
-        if len(paint_point.data.materials) == 0:
-            paint_point.data.materials.append(mat)
-        else:
-            paint_point.data.materials[0] = mat
-        
-        # Add to paint trail
-        paint_trail.append(paint_point)
-        
-        # Make sure we're not selecting this as an interactive object
-        paint_point.select_set(False)
+        # Start a new stroke if needed
+        if session.current_stroke is None:
+            session.current_stroke = PaintStroke(f"PaintStroke_{len(paint_trail)}", paint_thickness)
+            paint_trail.append(session.current_stroke)
         
-        return paint_point
+        session.current_stroke.add_point(position, session.current_paint_color)
+        return position
     except Exception as e:
-        print(f"Error creating paint point: {e}")
+        log.error("Error creating paint point: %s", e)
         return None
 
 # Add this function to handle painting
-def handle_painting(gesture, x, y):
+def handle_painting(session, gesture, x, y):
     """Handle painting based on hand position (X,Y only)"""
-    global last_paint_time, current_paint_color
-    
     try:
         # Only paint with the "point" gesture (index finger extended)
         if gesture != "point":
+            end_paint_stroke(session)
             return False
         
         current_time = time.time()
         
         # Control point density with cooldown
-        if current_time - last_paint_time < paint_cooldown:
+        if current_time - session.last_paint_time < paint_cooldown:
             return False
         
-        # Create paint point
-        paint_point = create_paint_point(x, y)
+        # Add a point to the current stroke
+        paint_point = create_paint_point(session, x, y)
         
         # Update last paint time
-        last_paint_time = current_time
+        session.last_paint_time = current_time
         
-        return True if paint_point else False
+        return paint_point is not None
     except Exception as e:
-        print(f"Error in handle_painting: {e}")
+        log.error("Error in handle_painting: %s", e)
         return False
 
 # Add a function to toggle painting mode
-def toggle_painting_mode():
-    """Toggle the painting mode on/off"""
-    global painting_mode, last_action_info, current_paint_color
-    
-    painting_mode = not painting_mode
+def toggle_painting_mode(session):
+    """Toggle the tracker's painting mode on/off"""
+    session.painting_mode = not session.painting_mode
+    end_paint_stroke(session)
     
-    if painting_mode:
+    if session.painting_mode:
         # Generate a new random color when entering paint mode
-        current_paint_color = (
+        session.current_paint_color = (
             random.uniform(0.0, 1.0),
             random.uniform(0.0, 1.0),
             1.0,  # Keep blue high for Y2K look
             1.0
         )
-        last_action_info = "Painting Mode: ON"
+        report(session, "Painting Mode: ON")
     else:
-        last_action_info = "Painting Mode: OFF"
+        report(session, "Painting Mode: OFF")
     
-    return painting_mode
+    return session.painting_mode
 
 # Add a function to clear all paint
-def clear_paint_trail():
-    """Remove all paint points"""
+def clear_paint_trail(session=None):
+    """Remove the paint strokes of all trackers"""
     global paint_trail, last_action_info
     
-    for point in paint_trail:
-        if point in bpy.data.objects:
-            bpy.data.objects.remove(point, do_unlink=True)
+    for stroke in paint_trail:
+        try:
+            stroke.remove()
+        except ReferenceError:
+            pass  # Deleted by hand in Blender
     
     paint_trail = []
-    last_action_info = "Paint cleared"
+    end_paint_stroke()
+    if session is not None:
+        report(session, "Paint cleared")
+    else:
+        last_action_info = "Paint cleared"
 
-def create_new_plane(x, y):
-    """Create a new plane at the specified position"""
-    global selected_object, last_action_info
+def create_new_plane(session, x, y):
+    """Create a new plane at the specified position and select it for the tracker"""
     
     try:
         # Convert screen coordinates to 3D world position
@@ -578,7 +1535,7 @@ def create_new_plane(x, y):
         camera = scene.camera
         
         if not camera:
-            print("No active camera")
+            log.warning("No active camera")
             return None
         
         # Get camera direction and right vector
@@ -599,17 +1556,12 @@ def create_new_plane(x, y):
         position = cam_loc + cam_dir * distance + cam_right * view_x * distance * 0.5 + cam_up * view_y * distance * 0.5
         
         # Create a new plane
-        bpy.ops.mesh.primitive_plane_add(size=1.5, location=position)
-        new_plane = bpy.context.active_object
-        new_plane.name = f"ImagePlane_New_{len(bpy.data.objects)}"
+        new_plane = new_plane_object(f"ImagePlane_New_{len(bpy.data.objects)}", 1.5, position)
         
         # Try to load a random image if available
         try:
             if os.path.exists(IMAGES_DIR):
-                image_files = []
-                for file in os.listdir(IMAGES_DIR):
-                    if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
-                        image_files.append(os.path.join(IMAGES_DIR, file))
+                image_files = image_catalog.paths()
                 
                 if image_files:
                     # Pick a random image
@@ -617,360 +1569,351 @@ def create_new_plane(x, y):
                     random_image = random.choice(image_files)
                     
                     # Create and apply material with image texture
-                    mat = create_image_material(random_image, name=f"Image_Material_New_{len(bpy.data.materials)}")
-                    if len(new_plane.data.materials) == 0:
-                        new_plane.data.materials.append(mat)
-                    else:
-                        new_plane.data.materials[0] = mat
-                    print(f"Applied image: {random_image}")
+                    mat = create_image_material(random_image, name="Image_Material_New")
+                    set_object_material(new_plane, mat)
+                    log.debug("Applied image: %s", random_image)
                 else:
                     # No images found, use default material
-                    mat = create_y2k_material(name=f"Y2K_Material_New_{len(bpy.data.materials)}")
-                    new_plane.data.materials.append(mat)
+                    mat = create_y2k_material(name="Y2K_Material_New")
+                    set_object_material(new_plane, mat)
             else:
                 # Images directory not found, use default material
-                mat = create_y2k_material(name=f"Y2K_Material_New_{len(bpy.data.materials)}")
-                new_plane.data.materials.append(mat)
+                mat = create_y2k_material(name="Y2K_Material_New")
+                set_object_material(new_plane, mat)
         except Exception as e:
-            print(f"Error creating material: {e}")
+            log.error("Error creating material: %s", e)
             # Fallback to default material
-            mat = create_y2k_material(name=f"Y2K_Material_New_{len(bpy.data.materials)}")
-            new_plane.data.materials.append(mat)
+            mat = create_y2k_material(name="Y2K_Material_New")
+            set_object_material(new_plane, mat)
         
         # Select the new plane
-        bpy.ops.object.select_all(action='DESELECT')
-        new_plane.select_set(True)
-        bpy.context.view_layer.objects.active = new_plane
-        selected_object = new_plane
-        last_action_info = f"Created new plane: {new_plane.name}"
+        select_only(new_plane, session.selected_object)
+        session.selected_object = new_plane
+        report(session, f"Created new plane: {new_plane.name}")
         
         return new_plane
     except Exception as e:
-        print(f"Error in create_new_plane: {e}")
+        log.error("Error in create_new_plane: %s", e)
         return None
 
 def create_default_planes():
     """Create default planes with Y2K materials when images aren't available"""
-    base_mat = create_y2k_material(name="Default_Material")
-    
     for x in range(-2, 3, 2):
         for y in range(-2, 3, 2):
-            bpy.ops.mesh.primitive_plane_add(size=1, location=(x, y, 0))
-            plane = bpy.context.active_object
-            plane.name = f"DefaultPlane_{x}_{y}"
-            
-            # Apply material
-            if len(plane.data.materials) == 0:
-                plane.data.materials.append(base_mat.copy())
-            else:
-                plane.data.materials[0] = base_mat.copy()
-            
-            # Add a random color variation to each plane
+            # Add a color variation to each plane
             r = 0.5 + 0.5 * (x + 2) / 4  # Varies from 0.5 to 1.0
             g = 0.5 + 0.5 * (y + 2) / 4  # Varies from 0.5 to 1.0
             b = 1.0
-            plane.data.materials[0].node_tree.nodes["Emission"].inputs[0].default_value = (r, g, b, 1.0)
+            mat = create_y2k_material(name="Default_Material", color=(r, g, b, 1.0))
+            new_plane_object(f"DefaultPlane_{x}_{y}", 1, (x, y, 0), mat)
 
-def handle_data(data):
-    """Process data received from hand tracking script"""
-    global last_position, last_position_hand2, last_gesture, last_gesture_hand2
+def parse_packet(data):
+    """Decode a packet into a list of (gesture, x, y, phase) tuples, one per hand"""
+    return parse_traced_packet(data)[0]
+
+def parse_traced_packet(data):
+    """Decode a packet into its hands, the tracker's latency stamps and its client ID.
     
+    The stamps are {"capture": t, "inference": t, "send": t} for packets
+    sent with --trace, empty otherwise. The client ID is 0 unless the
+    tracker was started with --client-id. The phase of a hand is "start"
+    in the packet where its gesture begins, "hold" or "end" after that, and
+    "frame" for packets without phases (text, or a tracker without
+    debouncing).
+    """
+    if has_gesture_protocol:
+        packet = gesture_protocol.decode_packet(data)
+        # A gesture that just ended is treated like no gesture
+        hands = [("none" if hand.phase == "end" else hand.gesture, hand.x, hand.y, hand.phase)
+                 for hand in packet.hands]
+        stamps = {}
+        if packet.trace is not None:
+            stamps = dict(zip(("capture", "inference", "send"), packet.trace))
+        return hands, stamps, packet.source
+
+    # Text format only: "gesture,x,y[,gesture,x,y]"
+    parts = data.decode('utf-8').split(',')
+    return [(parts[i], float(parts[i + 1]), float(parts[i + 2]), "frame")
+            for i in range(0, len(parts) - 2, 3)], {}, 0
+
+def handle_data(data, key=LOCAL_CLIENT):
+    """Process data received from hand tracking script"""
     try:
-        # Decode and parse the data
-        data_str = data.decode('utf-8')
-        parts = data_str.split(',')
-        
-        # Process based on number of parts received
-        if len(parts) >= 3:  # At least one hand with x,y
+        session = sessions.get(key)
+        if session is not None:
+            handle_hands(session, parse_packet(data))
+    except Exception as e:
+        log.error("Error processing data: %s", e)
+
+def gesture_started(phase, gesture, last_gesture):
+    """Whether a hand's gesture begins with this packet, from its phase or else from the previous packet"""
+    if phase == "frame":
+        return gesture != last_gesture
+    return phase == "start"
+
+def handle_hands(session, hands):
+    """Apply one packet's worth of decoded (gesture, x, y, phase) hands from a tracker"""
+    try:
+        # Process based on number of hands received
+        if len(hands) >= 1:  # At least one hand with x,y
             # First hand data
-            gesture1 = parts[0]
-            x1 = float(parts[1])
-            y1 = float(parts[2])
+            gesture1, x1, y1 = hands[0][:3]
+            phase1 = hands[0][3] if len(hands[0]) > 3 else "frame"
             
             # Process first hand gesture
-            handle_hand_gesture(gesture1, x1, y1, last_position, last_gesture)
+            handle_hand_gesture(session, gesture1, x1, y1, session.last_position, session.last_gesture,
+                                started=gesture_started(phase1, gesture1, session.last_gesture))
             
             # Update last position and gesture for first hand
-            last_position = (x1, y1)
-            last_gesture = gesture1
+            session.last_position = (x1, y1)
+            session.last_gesture = gesture1
             
             # Check if we have data for second hand
-            if len(parts) >= 6:  # Two hands with x,y each
-                gesture2 = parts[3]
-                x2 = float(parts[4])
-                y2 = float(parts[5])
+            if len(hands) >= 2:  # Two hands with x,y each
+                gesture2, x2, y2 = hands[1][:3]
+                phase2 = hands[1][3] if len(hands[1]) > 3 else "frame"
+                
+                # Toggles and other one-shot actions only fire when the gesture pair changes,
+                # or when one of its gestures starts again (a hand left and came back)
+                combo = tuple(sorted((gesture1, gesture2)))
+                combo_started = combo != session.last_two_hand_combo or "start" in (phase1, phase2)
+                session.last_two_hand_combo = combo
                 
                 # Handle two-handed gestures
-                handle_two_hand_gestures(gesture1, x1, y1, gesture2, x2, y2)
+                handle_two_hand_gestures(session, gesture1, x1, y1, gesture2, x2, y2, combo_started)
                 
                 # Update last position and gesture for second hand
-                last_position_hand2 = (x2, y2)
-                last_gesture_hand2 = gesture2
+                session.last_position_hand2 = (x2, y2)
+                session.last_gesture_hand2 = gesture2
+            # A packet with one hand keeps the pair: the other hand may only be missing for a frame
         else:
-            print(f"Received incomplete data: {data_str}")
+            log.debug("Received packet without hands")
+    except Exception as e:
+        log.error("Error processing data: %s", e)
+
+def open_shm_rings():
+    """Create the shared-memory rings trackers on this machine write to"""
+    close_shm_rings()
+    if not has_shm_transport or not has_gesture_protocol:
+        return
+    for name in shm_rings:
+        try:
+            shm_readers.append(shm_transport.ShmRingReader(name))
+            log.info("Polling shared-memory ring %s", name)
+        except Exception as e:
+            log.error("Failed to create shared-memory ring %s: %s", name, e)
+
+def close_shm_rings():
+    while shm_readers:
+        try:
+            shm_readers.pop().close()
+        except Exception as e:
+            log.error("Error closing shared-memory ring: %s", e)
+
+def poll_shm_rings():
+    """Move the packets written to the rings since the last tick to shm_mailbox (main thread)"""
+    for reader in shm_readers:
+        for data in reader.poll():
+            try:
+                hands, stamps, client_id = parse_traced_packet(data)
+                stamps["network"] = time.time()
+                shm_mailbox.post(SessionTable.key_for(client_id, ("shm", reader.name)), hands, stamps)
+            except Exception as e:
+                shm_mailbox.malformed += 1
+                log.warning("Error decoding packet from ring %s: %s", reader.name, e)
+
+def packet_stats():
+    """Packet counters of both transports"""
+    stats = mailbox.stats()
+    for name, value in shm_mailbox.stats().items():
+        stats[name] += value
+    # Packets a tracker wrote over before they were polled
+    stats["dropped"] += sum(reader.dropped for reader in shm_readers)
+    return stats
+
+def drain_mailbox():
+    """Persistent timer: apply everything received since the last tick, over UDP or shared memory"""
+    now = time.time()
+    # Reading a ring is a few memory loads, no system call
+    poll_shm_rings()
+    for key, hands, stamps in mailbox.drain() + shm_mailbox.drain():
+        stamps["queue"] = time.time()
+        session = sessions.get(key, now)
+        if session is None:
+            continue
+        handle_hands(session, hands)
+        if applied_gestures is not None:
+            applied_gestures.add("+".join(hand[0] for hand in hands) or "none")
+        if latency_tracer is not None:
+            stamps["apply"] = time.time()
+            latency_tracer.record_stamps(stamps)
+    sessions.maybe_expire(now)
+    # Builds the pick index a slice per tick after startup or a camera change
+    pick_index.step(bpy.context.scene)
+    if latency_tracer is not None and time.time() - last_latency_dump >= latency_dump_interval:
+        dump_latency_trace()
+    # Cheap unless the image library changed, starts decoding new images early
+    image_catalog.refresh()
+    return mailbox_interval
+
+def dump_latency_trace():
+    """Write the latency histograms next to the blend file"""
+    global last_latency_dump
+    last_latency_dump = time.time()
+    if latency_tracer is None or not latency_tracer.summary():
+        return
+    try:
+        latency_tracer.dump(LATENCY_TRACE_FILE)
     except Exception as e:
-        print(f"Error processing data: {e}")
+        log.error("Error writing latency trace: %s", e)
 
-def separate_image_colors(obj):
-    """"Separate the image into color planes (R, G, B) 
-    Alert : Experimental, may not work as expected i suggest you to comment this function to avoid errors"""
-    global color_planes, selected_object, last_action_info
+def separate_image_colors(obj, session=None):
+    """Split the image of an object into offset R, G and B layers.
     
+    The effect is part of the image material (see add_rgb_split_nodes), so
+    this only sets the object's rgb_split property; animating the property
+    animates the spread.
+    """
     try:
         # Check if the object is valid and has a material
-        if not obj or not obj.data.materials or len(obj.data.materials) == 0:
-            last_action_info = "Don't select a valid object"
-            return
-        
-        material = obj.data.materials[0]
-        if not material.use_nodes:
-            last_action_info = "Material does not use nodes"
-            return
-        
-        # Find the image texture node in the material
-        texture_node = None
-        for node in material.node_tree.nodes:
-            if node.type == 'TEX_IMAGE' and node.image:
-                texture_node = node
-                break
-        
-        if not texture_node:
-            last_action_info = "No image texture found in material"
-            return
+        material = obj.active_material if obj else None
+        if not material:
+            report(session, "Don't select a valid object")
+            return False
         
-        # Get the original location, scale, and rotation of the object
-        original_location = obj.location.copy()
-        original_scale = obj.scale.copy()
-        original_rotation = obj.rotation_euler.copy()
-        
-        # Define colors for separation
-        colors = [
-            ("R", (1.0, 0.0, 0.0, 1.0)),  # Red
-            ("G", (0.0, 1.0, 0.0, 1.0)),  # Green
-            ("B", (0.0, 0.0, 1.0, 1.0))   # Blue
-        ]
-        
-        # Remove existing color planes if any
-        for old_plane in color_planes:
-            if old_plane in bpy.data.objects:
-                bpy.data.objects.remove(old_plane, do_unlink=True)
-        
-        color_planes = []
-        
-        # Create new planes for each color
-        for idx, (color_name, color_value) in enumerate(colors):
-            # Duplicate the original object
-            bpy.ops.object.select_all(action='DESELECT')
-            obj.select_set(True)
-            bpy.context.view_layer.objects.active = obj
-            bpy.ops.object.duplicate()
-            
-            # Get the duplicated object
-            color_plane = bpy.context.active_object
-            color_plane.name = f"{obj.name}_{color_name}"
-            
-            # Create a new material for the color plane
-            new_mat = material.copy()
-            new_mat.name = f"{material.name}_{color_name}"
-            
-            # Set the new material to use nodes
-            try:
-                nodes = new_mat.node_tree.nodes
-                links = new_mat.node_tree.links
-                
-                # Clear existing nodes
-                mix_node = nodes.new(type='ShaderNodeMixRGB')
-                mix_node.blend_type = 'MULTIPLY'
-                mix_node.inputs[0].default_value = 1.0  # Factor
-                mix_node.inputs[2].default_value = color_value  # Color
-                
-                # Find the image texture node and connect it to the mix node
-                for node in nodes:
-                    if node.type == 'TEX_IMAGE':
-                        # Disconnect the image texture from the output
-                        output_links = []
-                        for link in links:
-                            if link.from_node == node and link.from_socket == node.outputs[0]:
-                                output_links.append((link.to_node, link.to_socket))
-                                links.remove(link)
-                        
-                        # Connect the image texture to the mix node
-                        links.new(node.outputs[0], mix_node.inputs[1])
-                        
-                        # Connect the mix node to the output
-                        for to_node, to_socket in output_links:
-                            links.new(mix_node.outputs[0], to_socket)
-                        
-                        break
-                
-                # Set the mix node to output the color
-                for node in nodes:
-                    if node.type == 'PRINCIPLED_BSDF':
-                        node.inputs['Emission'].default_value = color_value
-                        node.inputs['Emission Strength'].default_value = 0.5
-            
-            except Exception as e:
-                print(f"Erreur lors de la modification des nœuds: {e}")
-            
-            # Assign the new material to the duplicated object
-            color_plane.data.materials[0] = new_mat
-            
-            # Set the color plane location slightly offset from the original
-            offset = 0.1 * (idx + 1)
-            color_plane.location = (
-                original_location.x + random.uniform(-offset, offset),
-                original_location.y + random.uniform(-offset, offset),
-                original_location.z + offset
-            )
-            
-            # Scale the color plane slightly larger than the original
-            scale_factor = 1.0 + (0.05 * idx)
-            color_plane.scale = (
-                original_scale.x * scale_factor,
-                original_scale.y * scale_factor,
-                original_scale.z * scale_factor
-            )
-            
-            # Rotate the color plane slightly
-            color_plane.rotation_euler.z = original_rotation.z + (0.05 * idx)
-            
-            # Add the color plane to the list
-            color_planes.append(color_plane)
+        if not material.use_nodes or RGB_SPLIT_NODE not in material.node_tree.nodes:
+            report(session, "No image texture found in material")
+            return False
         
-        # Hide the original object
-        obj.hide_set(True)
+        obj[RGB_SPLIT_PROPERTY] = rgb_split_spread
+        obj.update_tag()
         
-        last_action_info = f"Image separated in {len(colors)} color layers"
+        report(session, "Image separated in 3 color layers")
         play_sound("select")  # Utiliser un son pour indiquer l'effet
         
         return True
     except Exception as e:
-        print(f"Error in separate_image_colors: {e}")
-        last_action_info = f"Error of split: {e}"
+        log.error("Error in separate_image_colors: %s", e)
+        report(session, f"Error of split: {e}")
         return False
 
-def restore_original_image():
+def restore_original_image(obj, session=None):
     """"Restore the original image after color separation"""
-    global color_planes, selected_object, last_action_info
-    
     try:
-        # Remove color planes
-        for plane in color_planes:
-            if plane in bpy.data.objects:
-                bpy.data.objects.remove(plane, do_unlink=True)
-        
-        color_planes = []
-        
-        # Unhide the original object
-        if selected_object:
-            selected_object.hide_set(False)
-            last_action_info = "Image originale restaurée"
-        
+        obj[RGB_SPLIT_PROPERTY] = 0.0
+        obj.update_tag()
+        report(session, "Image originale restaurée")
         return True
     except Exception as e:
-        print(f"Erreur dans restore_original_image: {e}")
-        last_action_info = f"Erreur de restauration: {e}"
+        log.error("Erreur dans restore_original_image: %s", e)
+        report(session, f"Erreur de restauration: {e}")
         return False
 
-def handle_hand_gesture(gesture, x, y, last_pos=None, last_gest=None):
-    """Process individual hand gesture"""
-    global selected_object, last_action_info, painting_mode
+def handle_hand_gesture(session, gesture, x, y, last_pos=None, last_gest=None, started=None):
+    """Process individual hand gesture.
     
+    started tells whether the gesture begins with this packet; by default
+    it is guessed from last_gest.
+    """
     try:
         # Check if we're in painting mode
-        if painting_mode:
-            if handle_painting(gesture, x, y):
+        if session.painting_mode:
+            if handle_painting(session, gesture, x, y):
                 # If painting was handled, return early
                 return
         
         # Original gesture handling code
         if gesture == "point":
-            # Only select object if not in painting mode
-            if not painting_mode and last_gest != "point":
-                ray_cast_select(x, y)
+            # Only select object if not in painting mode, once per point gesture
+            if started is None:
+                started = last_gest != "point"
+            if not session.painting_mode and started:
+                ray_cast_select(session, x, y)
         elif gesture == "pinch":
             # Move object
-            if selected_object and last_pos:
+            if session.selected_object and last_pos:
                 prev_x, prev_y = last_pos
-                move_selected_object(x, y, prev_x, prev_y)
+                move_selected_object(session, x, y, prev_x, prev_y)
     except Exception as e:
-        print(f"Error handling gesture: {e}")
+        log.error("Error handling gesture: %s", e)
 
-def handle_two_hand_gestures(gesture1, x1, y1, gesture2, x2, y2):
-    """Handle gestures that require two hands"""
-    global selected_object, last_position, last_position_hand2, last_action_info
-    global last_creation_time, color_separation_mode, color_planes, painting_mode
+def handle_two_hand_gestures(session, gesture1, x1, y1, gesture2, x2, y2, combo_started=True):
+    """Handle gestures that require two hands.
     
+    Toggles, deletion and duplication only run when combo_started is True,
+    i.e. once when the gesture pair appears rather than on every packet
+    while it is held.
+    """
     try:
+        selected_object = session.selected_object
+        
         # Handle rotation and scaling (two pinches)
-        if gesture1 == "pinch" and gesture2 == "pinch" and last_position and last_position_hand2:
-            prev_x1, prev_y1 = last_position
-            prev_x2, prev_y2 = last_position_hand2
-            rotate_and_scale_object(x1, y1, x2, y2, prev_x1, prev_y1, prev_x2, prev_y2)
+        if gesture1 == "pinch" and gesture2 == "pinch" and session.last_position and session.last_position_hand2:
+            prev_x1, prev_y1 = session.last_position
+            prev_x2, prev_y2 = session.last_position_hand2
+            rotate_and_scale_object(session, x1, y1, x2, y2, prev_x1, prev_y1, prev_x2, prev_y2)
         
         # Handle color separation effect (pinch + palm)
         elif (gesture1 == "pinch" and gesture2 == "palm") or (gesture1 == "palm" and gesture2 == "pinch"):
-            if selected_object:
-                if not color_separation_mode:
-                    separate_image_colors(selected_object)
-                    color_separation_mode = True
+            if selected_object and combo_started:
+                if not selected_object.get(RGB_SPLIT_PROPERTY):
+                    separate_image_colors(selected_object, session)
                 else:
-                    restore_original_image()
-                    color_separation_mode = False
+                    restore_original_image(selected_object, session)
         
         # Handle creation (two palms) with cooldown
         elif gesture1 == "palm" and gesture2 == "palm":
             current_time = time.time()
-            if current_time - last_creation_time >= creation_cooldown:
+            if current_time - session.last_creation_time >= creation_cooldown:
                 # Use the center point between the two hands for creation
                 center_x = (x1 + x2) / 2
                 center_y = (y1 + y2) / 2
-                create_new_plane(center_x, center_y)
-                last_creation_time = current_time
+                create_new_plane(session, center_x, center_y)
+                session.last_creation_time = current_time
             else:
                 # Optionally, update the action info to inform about cooldown
-                remaining = creation_cooldown - (current_time - last_creation_time)
-                last_action_info = f"Creation cooldown: {remaining:.1f}s remaining"
+                remaining = creation_cooldown - (current_time - session.last_creation_time)
+                report(session, f"Creation cooldown: {remaining:.1f}s remaining")
         
         # Handle painting toggle (fist + point)
         elif (gesture1 == "fist" and gesture2 == "point") or (gesture1 == "point" and gesture2 == "fist"):
-            toggle_painting_mode()
+            if combo_started:
+                toggle_painting_mode(session)
         
         # Handle paint clear (fist + palm)
         elif (gesture1 == "fist" and gesture2 == "palm") or (gesture1 == "palm" and gesture2 == "fist"):
-            clear_paint_trail()
+            if combo_started:
+                clear_paint_trail(session)
         
         # Handle deletion (two fists)
-        elif gesture1 == "fist" and gesture2 == "fist" and selected_object:
+        elif gesture1 == "fist" and gesture2 == "fist" and selected_object and combo_started:
             # Delete selected object
             obj_name = selected_object.name
-            bpy.data.objects.remove(selected_object, do_unlink=True)
-            last_action_info = f"Deleted: {obj_name}"
-            selected_object = None
+            # Clears the selection of every tracker holding it
+            delete_object(selected_object)
+            report(session, f"Deleted: {obj_name}")
         
         # Handle duplication (two v_signs)
-        elif gesture1 == "v_sign" and gesture2 == "v_sign" and selected_object:
+        elif gesture1 == "v_sign" and gesture2 == "v_sign" and selected_object and combo_started:
             # Duplicate selected object
             orig_name = selected_object.name
             
             # Duplicate the object
-            bpy.ops.object.duplicate_move()
-            
-            # Get the duplicated object (it becomes the active object)
-            duplicated_obj = bpy.context.active_object
+            duplicated_obj = duplicate_object(selected_object)
             
             # Move it slightly to differentiate
             duplicated_obj.location.x += 0.5
             duplicated_obj.location.y += 0.5
             
             # Update selection
-            selected_object = duplicated_obj
-            last_action_info = f"Duplicated: {orig_name}"
+            select_only(duplicated_obj, selected_object)
+            session.selected_object = duplicated_obj
+            report(session, f"Duplicated: {orig_name}")
             
             # Play sound effect if available
             play_sound("select")
     except Exception as e:
-        print(f"Error handling two-hand gesture: {e}")
+        log.error("Error handling two-hand gesture: %s", e)
 
 def start_listener():
     """Start UDP listener in a separate thread"""
@@ -982,27 +1925,41 @@ def start_listener():
         try:
             sock.bind((HOST, PORT))
             sock.settimeout(1.0)  # Add timeout to allow thread to check running flag
-            print(f"Successfully listening on {HOST}:{PORT}")
-            print("Waiting for data from hand tracking script...")
+            log.info("Successfully listening on %s:%s", HOST, PORT)
+            log.info("Waiting for data from hand tracking script...")
             
             while running:
                 try:
                     data, addr = sock.recvfrom(1024)
-                    # Schedule handling in the main thread
-                    bpy.app.timers.register(lambda d=data: handle_data(d))
+                    received_at = time.time()
+                    # Decode here and leave it for the main thread timer
+                    try:
+                        hands, stamps, client_id = parse_traced_packet(data)
+                        stamps["network"] = received_at
+                        mailbox.post(SessionTable.key_for(client_id, addr), hands, stamps)
+                    except Exception as e:
+                        mailbox.malformed += 1
+                        log.warning("Error decoding packet from %s: %s", addr, e)
                 except socket.timeout:
                     # Timeout is expected, just continue and check running flag
                     continue
                 except Exception as e:
                     if running:  # Only print error if we're still supposed to be running
-                        print(f"Socket error while receiving: {e}")
+                        log.error("Socket error while receiving: %s", e)
         except Exception as e:
-            print(f"Failed to bind socket to {HOST}:{PORT}. Error: {e}")
-            print("Another application might be using this port or Blender might not have permission.")
+            log.error("Failed to bind socket to %s:%s. Error: %s", HOST, PORT, e)
+            log.error("Another application might be using this port or Blender might not have permission.")
         finally:
             if sock:
                 sock.close()
-                print("Socket closed")
+                log.info("Socket closed")
+    
+    # Trackers on this machine can skip the socket, the timer polls their rings
+    open_shm_rings()
+    
+    # One persistent timer drains the mailbox, instead of one timer per packet
+    if not bpy.app.timers.is_registered(drain_mailbox):
+        bpy.app.timers.register(drain_mailbox, persistent=True)
     
     # Start thread
     thread = threading.Thread(target=listener_thread)
@@ -1018,19 +1975,52 @@ def stop_listener():
         sock.close()
     if listener_thread:
         listener_thread.join(2.0)  # Wait for thread to finish, but not forever
-    print("Listener stopped")
+    if bpy.app.timers.is_registered(drain_mailbox):
+        bpy.app.timers.unregister(drain_mailbox)
+    close_shm_rings()
+    dump_latency_trace()
+    log.info("Listener stopped")
 
 @persistent
 def load_handler(dummy):
     """Handler to start listener when Blender file is loaded"""
-    print("Starting UDP listener...")
+    log.info("Starting UDP listener...")
+    # Objects of the previous file are gone
+    pick_index.invalidate()
+    material_registry.invalidate()
+    image_catalog.invalidate()
+    image_catalog.use_full_resolution(False)
+    paint_trail.clear()
+    sessions.clear()
     bpy.app.timers.register(lambda: start_listener())
 
 @persistent
 def save_handler(dummy):
     """Handler to ensure clean state when saving"""
-    # Nothing special needed here, but could be used for cleanup
-    pass
+    # Save the original image files, not the proxies
+    image_catalog.use_full_resolution(True)
+
+@persistent
+def save_post_handler(dummy):
+    """Handler to go back to the proxies after saving"""
+    image_catalog.use_full_resolution(False)
+
+@persistent
+def render_pre_handler(dummy):
+    """Handler to render with the full-resolution images"""
+    image_catalog.use_full_resolution(True)
+
+@persistent
+def render_post_handler(dummy):
+    """Handler to go back to the proxies after rendering"""
+    image_catalog.use_full_resolution(False)
+
+@persistent
+def depsgraph_handler(scene, depsgraph):
+    """Keep the pick index up to date with objects moved by gestures or by hand"""
+    for update in depsgraph.updates:
+        if update.is_updated_transform and isinstance(update.id, bpy.types.Object):
+            pick_index.moved(update.id.original)
 
 # Register handlers
 def register_handlers():
@@ -1040,6 +2030,14 @@ def register_handlers():
         bpy.app.handlers.load_post.append(load_handler)
     if save_handler not in bpy.app.handlers.save_pre:
         bpy.app.handlers.save_pre.append(save_handler)
+    if depsgraph_handler not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(depsgraph_handler)
+    for handlers, handler in ((bpy.app.handlers.save_post, save_post_handler),
+                              (bpy.app.handlers.render_pre, render_pre_handler),
+                              (bpy.app.handlers.render_post, render_post_handler),
+                              (bpy.app.handlers.render_cancel, render_post_handler)):
+        if handler not in handlers:
+            handlers.append(handler)
     
     # Register draw callback for UI overlay
     try:
@@ -1047,8 +2045,6 @@ def register_handlers():
         
         def draw_callback_px(self, context):
             """Draw callback for displaying gesture info in viewport"""
-            global painting_mode, paint_trail
-            
             if not show_gestures_overlay:
                 return
                 
@@ -1069,17 +2065,38 @@ def register_handlers():
             blf.position(font_id, 20, height - 60, 0)
             blf.draw(font_id, f"Action: {last_action_info}")
             
-            # Draw current selection info
-            blf.position(font_id, 20, height - 90, 0)
-            if selected_object:
-                blf.draw(font_id, f"Selected: {selected_object.name}")
-            else:
+            # Draw the selection and painting mode of each tracker
+            if not sessions.sessions:
+                blf.position(font_id, 20, height - 90, 0)
                 blf.draw(font_id, "Nothing selected")
+            for i, session in enumerate(sessions.sessions.values()):
+                selected = session.selected_object
+                text = f"Selected: {selected.name}" if selected else "Nothing selected"
+                if session.painting_mode:
+                    text += f" | Painting Mode: ACTIVE - {paint_point_count()} points"
+                if len(sessions.sessions) > 1:
+                    text = f"{session.name}: {text}"
+                blf.position(font_id, 20, height - 90 - 30 * i, 0)
+                blf.draw(font_id, text)
             
-            # Draw painting mode info
-            if painting_mode:
-                blf.position(font_id, 20, height - 120, 0)
-                blf.draw(font_id, f"Painting Mode: ACTIVE - {len(paint_trail)} points")
+            # Draw packet counters
+            stats = packet_stats()
+            blf.position(font_id, 20, 30, 0)
+            blf.draw(font_id, f"Packets: {stats['received']} received | {stats['coalesced']} coalesced | "
+                              f"{stats['dropped']} dropped | {stats['rate_limited']} rate limited | "
+                              f"{stats['malformed']} malformed | {len(sessions.sessions)} trackers")
+            
+            # Draw shared material counters
+            materials = material_registry.stats()
+            blf.position(font_id, 20, 55, 0)
+            blf.draw(font_id, f"Materials: {materials['materials']} shared by {materials['references']} users | "
+                              f"{len(bpy.data.materials)} total")
+            
+            # Draw per-stage latency percentiles, total on top
+            if latency_tracer is not None:
+                for i, line in enumerate(latency_tracer.format_lines()):
+                    blf.position(font_id, 20, 80 + 25 * i, 0)
+                    blf.draw(font_id, f"Latency {line}")
             
             # Draw gesture guide
             blf.position(font_id, width - 250, height - 135, 0)
@@ -1102,11 +2119,11 @@ def register_handlers():
                         handlers = getattr(space, "draw_handler_add", None)
                         if handlers:
                             space.draw_handler_add(draw_callback_px, (None, bpy.context), 'WINDOW', 'POST_PIXEL')
-                            print("Added gesture overlay to 3D viewport")
+                            log.info("Added gesture overlay to 3D viewport")
     except ImportError:
-        print("Could not import blf module. Gesture overlay disabled.")
+        log.warning("Could not import blf module. Gesture overlay disabled.")
     except Exception as e:
-        print(f"Could not register gesture overlay: {e}")
+        log.error("Could not register gesture overlay: %s", e)
 
 # Clean up function for when the script is unloaded
 def unregister_handlers():
@@ -1116,15 +2133,30 @@ def unregister_handlers():
         bpy.app.handlers.load_post.remove(load_handler)
     if save_handler in bpy.app.handlers.save_pre:
         bpy.app.handlers.save_pre.remove(save_handler)
+    if depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_handler)
+    for handlers, handler in ((bpy.app.handlers.save_post, save_post_handler),
+                              (bpy.app.handlers.render_pre, render_pre_handler),
+                              (bpy.app.handlers.render_post, render_post_handler),
+                              (bpy.app.handlers.render_cancel, render_post_handler)):
+        if handler in handlers:
+            handlers.remove(handler)
     
     # Stop the listener thread
     stop_listener()
+    
+    # Stop decoding images
+    if pyramid_builder is not None:
+        pyramid_builder.close()
 
 if __name__ == "__main__":
     try:
         # Register handlers
         register_handlers()
         
+        # Start decoding the image library in the background
+        image_catalog.refresh(force=True)
+        
         # Set up initial scene if file is new/empty
         if not bpy.data.objects:
             setup_scene()
@@ -1132,6 +2164,6 @@ if __name__ == "__main__":
         # Start listener thread
         listener_thread = start_listener()
         
-        print("Y2K Art Project initialized!")
+        log.info("Y2K Art Project initialized!")
     except Exception as e:
-        print(f"Error initializing Y2K Art Project: {e}")
\ No newline at end of file
+        log.error("Error initializing Y2K Art Project: %s", e)
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""Compare the vectorized gesture classifier with the original detect_gestures.
+
+Prints the time per frame for 1, 2 and 8 hands, passed as MediaPipe
+landmark lists like the tracker gets them, and how much of the vectorized
+time is classification once the landmarks are in an array (the rest is
+reading all 63 coordinates per hand out of MediaPipe's protobuf messages,
+which the tracker also needs for filtering and sending landmarks).
+
+Accuracy is measured on hands recorded with hand_tracking.py --record:
+how often both classifiers agree on the hands as recorded, and how often
+each keeps its label when a hand is rotated in the image plane about its
+wrist. A rotated hand makes the same gesture, so a label change is an
+error whatever the true gesture was. Without --log the synthetic hands
+posed below are used instead, which only checks the classifiers against
+the poses they were written for.
+
+    python benchmarks/bench_classifier.py --log recording/landmarks.jsonl
+"""
+import argparse
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gesture_classifier  # noqa: E402
+from hand_tracking import detect_gestures  # noqa: E402
+from landmark_log import read_landmark_log  # noqa: E402
+
+ASPECT = 640 / 480
+ROTATIONS = (0, 30, 60, 90, 135, 180)
+
+# Finger bases relative to the wrist, y pointing down the image (hand upright)
+FINGER_BASES = [(-0.03, -0.09), (-0.01, -0.095), (0.01, -0.09), (0.03, -0.08)]
+SEGMENTS = (0.04, 0.025, 0.02)
+STRAIGHT = [(0.0, -1.0, 0.0)] * 3
+CURLED = [(0.0, -0.6, -0.8), (0.0, 0.7, -0.7), (0.0, 0.9, 0.4)]
+
+POSES = {
+    "point": (True, False, False, False),
+    "v_sign": (True, True, False, False),
+    "palm": (True, True, True, True),
+    "fist": (False, False, False, False),
+    "pinch": (False, True, True, True),
+}
+
+
+def make_hand(gesture, angle=0.0, scale=1.0, center=(0.5, 0.6), rng=None):
+    """Build (21, 3) landmarks for a posed hand in normalized image coordinates"""
+    pts = np.zeros((21, 3))
+    for finger, (extended, (bx, by)) in enumerate(zip(POSES[gesture], FINGER_BASES)):
+        joint = np.array([bx, by, 0.0])
+        base = 5 + finger * 4
+        pts[base] = joint
+        for step, (length, direction) in enumerate(zip(SEGMENTS, STRAIGHT if extended else CURLED)):
+            joint = joint + length * np.array(direction)
+            pts[base + step + 1] = joint
+
+    # Thumb: spread out, or touching the index tip when pinching
+    thumb_tip = pts[8] + (0.005, 0.005, 0.0) if gesture == "pinch" else np.array([-0.08, -0.05, 0.0])
+    pts[1:5] = np.linspace((-0.03, -0.02, 0.0), thumb_tip, 4)
+
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+    rotation = np.array([[cos_a, -sin_a, 0.0], [sin_a, cos_a, 0.0], [0.0, 0.0, 1.0]])
+    pts = pts @ rotation.T * scale
+    if rng is not None:
+        pts += rng.normal(0.0, 0.002, pts.shape)
+    pts[:, 0] = pts[:, 0] / ASPECT + center[0]
+    pts[:, 1] += center[1]
+    pts[:, 2] /= ASPECT
+    return pts
+
+
+def as_mediapipe(points):
+    """Wrap an array in the NormalizedLandmarkList MediaPipe returns"""
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in np.asarray(points, dtype=float).tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z)
+    return landmark_list
+
+
+def rotate(points, angle, aspect=ASPECT):
+    """Rotate (21, 3) landmarks in the image plane about the wrist"""
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+    # Rotate in pixel proportions, x is relative to the image width
+    x = (points[:, 0] - points[0, 0]) * aspect
+    y = points[:, 1] - points[0, 1]
+    rotated = np.array(points, dtype=float)
+    rotated[:, 0] = (x * cos_a - y * sin_a) / aspect + points[0, 0]
+    rotated[:, 1] = x * sin_a + y * cos_a + points[0, 1]
+    return rotated
+
+
+def labels(hands, aspect):
+    """(legacy, vectorized) gesture per hand for a list of (21, 3) arrays"""
+    landmark_lists = [as_mediapipe(points) for points in hands]
+    legacy = [detect_gestures(hand)[0] for hand in landmark_lists]
+    vectorized = [gesture for gesture, _, _ in gesture_classifier.detect_gestures_batch(landmark_lists, aspect)]
+    return legacy, vectorized
+
+
+def report_timing(rng):
+    print(f"{'hands':>8}{'legacy us':>12}{'vectorized us':>15}{'classify us':>13}   (time per frame)")
+    for count in (1, 2, 8):
+        frame = [as_mediapipe(make_hand(gesture, rng=rng)) for gesture in ("pinch", "palm") * 4][:count]
+        number = 5000
+        legacy = min(timeit.repeat(lambda: [detect_gestures(hand) for hand in frame],
+                                   number=number, repeat=5)) / number
+        batch = min(timeit.repeat(lambda: gesture_classifier.detect_gestures_batch(frame, ASPECT),
+                                  number=number, repeat=5)) / number
+        points = gesture_classifier.landmarks_to_array(frame)
+        classify = min(timeit.repeat(lambda: gesture_classifier.classify(points, ASPECT),
+                                     number=number, repeat=5)) / number
+        print(f"{count:>8}{legacy * 1e6:>12.1f}{batch * 1e6:>15.1f}{classify * 1e6:>13.1f}")
+
+
+def report_recorded(path, aspect):
+    hands = [points for _, _, frame_points, _ in read_landmark_log(path) for points in frame_points]
+    if not hands:
+        sys.exit(f"No hands in {path}")
+    legacy, vectorized = labels(hands, aspect)
+    agree = np.mean([a == b for a, b in zip(legacy, vectorized)])
+    print(f"{len(hands)} recorded hands, classifiers agree on {agree:.0%}")
+    for name, counts in (("legacy", legacy), ("vectorized", vectorized)):
+        print(f"{name:>12}: " + ", ".join(f"{gesture} {counts.count(gesture)}" for gesture in sorted(set(counts))))
+
+    print(f"\n{'rotation':>8}{'legacy':>10}{'vectorized':>12}   (share of hands keeping their label)")
+    for degrees in ROTATIONS[1:]:
+        old, new = labels([rotate(points, math.radians(degrees), aspect) for points in hands], aspect)
+        old_ok = np.mean([a == b for a, b in zip(old, legacy)])
+        new_ok = np.mean([a == b for a, b in zip(new, vectorized)])
+        print(f"{degrees:>7}°{old_ok:>10.0%}{new_ok:>12.0%}")
+
+
+def report_synthetic(rng):
+    print(f"\n{'rotation':>8}{'legacy':>10}{'vectorized':>12}   (share of correct labels, synthetic hands)")
+    expected = [gesture for gesture in POSES for _ in range(20)]
+    for degrees in ROTATIONS:
+        hands = [make_hand(gesture, math.radians(degrees), rng.uniform(0.7, 1.5), rng=rng) for gesture in expected]
+        old, new = labels(hands, ASPECT)
+        old_ok = np.mean([a == b for a, b in zip(old, expected)])
+        new_ok = np.mean([a == b for a, b in zip(new, expected)])
+        print(f"{degrees:>7}°{old_ok:>10.0%}{new_ok:>12.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", help="landmark log recorded with hand_tracking.py --record")
+    parser.add_argument("--aspect", type=float, default=ASPECT, help="width / height of the recorded images")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    report_timing(rng)
+    if args.log:
+        print()
+        report_recorded(args.log, args.aspect)
+    else:
+        report_synthetic(rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Per-frame pixel work before and after the reused-buffer frame path.
+
+    python benchmarks/bench_frame_path.py
+
+The old path flipped the camera frame, converted it to RGB for MediaPipe
+and converted it back to BGR to draw the preview, each into a new array.
+The new path converts the unflipped frame into a reused RGB buffer
+(landmarks are mirrored instead) and flips into a reused preview only when
+there is a window. Prints the time and the peak memory allocated per frame,
+MediaPipe itself excluded.
+
+Before measuring, replays a small recording whose landmarks skip frames
+(as when live inference dropped some) and fails if the replay stalls, so
+skipped frames cannot hold on to the source's reused frame buffers.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from capture_sources import Recorder, open_source  # noqa: E402
+from inference_roi import OutputBuffers, prepare_input  # noqa: E402
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+
+def old_path(frame, state):
+    image = cv2.flip(frame, 1)
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+
+
+def new_path(frame, state):
+    prepare_input(frame, buffers=state["buffers"])
+    state["preview"] = cv2.flip(frame, 1, dst=state.get("preview"))
+    return state["preview"]
+
+
+def new_path_headless(frame, state):
+    return prepare_input(frame, buffers=state["buffers"])
+
+
+def measure(path, frame, repeat):
+    """(ms per frame, peak bytes allocated during a frame) after a warm-up call"""
+    state = {"buffers": OutputBuffers()}
+    path(frame, state)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        path(frame, state)
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+
+    # numpy reports its array allocations to tracemalloc
+    tracemalloc.start()
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        path(frame, state)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def check_replay_gaps(frames=30, every=3, timeout=10.0):
+    """Replay a recording with landmarks on every few frames; fail if it stalls or loses frames"""
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = Recorder(directory)
+        image = np.zeros((48, 64, 3), dtype=np.uint8)
+        for seq in range(frames):
+            recorder.write_frame(seq, seq / 30.0, image)
+            if seq % every == 0:
+                recorder.write_landmarks(seq, seq / 30.0, np.zeros((1, 21, 3)), ["Right"])
+        recorder.close()
+
+        source, recorded_hands = open_source(directory, "max", replay_landmarks=True)
+        replayed = []
+
+        def replay():
+            while source.is_open():
+                frame, timestamp = source.read()
+                if frame is not None:
+                    replayed.append(timestamp)
+                    source.buffers.release(frame)
+
+        thread = threading.Thread(target=replay, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        source.release()
+        expected = len(recorded_hands.recorded_seqs())
+        if thread.is_alive() or len(replayed) != expected:
+            raise SystemExit(f"Replay with landmark gaps stalled after {len(replayed)} of {expected} frames")
+        print(f"replay with landmark gaps: {len(replayed)} of {expected} frames")
+
+
+def main():
+    check_replay_gaps()
+    repeat = 100
+    print(f"{'resolution':>12}{'old ms':>9}{'new ms':>9}{'headless':>10}"
+          f"{'old KB':>10}{'new KB':>9}{'headless':>10}   (per frame, KB allocated at peak)")
+    for width, height in RESOLUTIONS:
+        frame = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+        (old_ms, old_bytes), (new_ms, new_bytes), (headless_ms, headless_bytes) = (
+            measure(path, frame, repeat) for path in (old_path, new_path, new_path_headless))
+        print(f"{f'{width}x{height}':>12}{old_ms:>9.2f}{new_ms:>9.2f}{headless_ms:>10.2f}"
+              f"{old_bytes / 1024:>10.0f}{new_bytes / 1024:>9.0f}{headless_bytes / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""Per-packet cost of the Blender listener's gesture handlers as the scene grows, without Blender.
+
+    python benchmarks/bench_listener.py
+    python benchmarks/bench_listener.py --sizes 10 100 1000 --output after.json --compare before.json
+    python benchmarks/bench_listener.py --recording recordings/session1
+
+Imports Blender/blender_listener.py on top of fake_bpy.py, a plain Python
+stand-in for bpy and mathutils, so the hot paths can be timed anywhere
+Python runs (--bpy real uses the real bpy instead: Blender's own Python or
+the bpy module from PyPI, to check the fake scales the same way).
+
+For every scene size, the scene is rebuilt with that many planes on a
+square grid, all in view of a camera looking down, and every stream is
+replayed through handle_data(), where the UDP and shared-memory paths
+end. Each packet is timed together with the view_layer.update() after it,
+which stands in for the depsgraph evaluation Blender runs after every
+timer tick and reports moved objects to the pick index. Cooldowns are off,
+so every packet does its work, and each stream fails the run if the
+listener did not do the work listed below (picks, moves, paint points,
+planes created, copied and deleted), so a listener change cannot quietly
+turn a stream into a no-op.
+
+Streams:
+
+    idle       one hand, no gesture: decoding and dispatch only
+    select     point at a new spot every other packet, one pick each
+    drag       pinch drag of a selected plane
+    rotate     two-hand pinch rotation and scaling of a selected plane
+    paint      pointing while painting, one stroke point per packet
+    create     two palms then two fists: a plane created and deleted
+    duplicate  point, two v-signs, two fists: a copy made and deleted
+    recording  packets the tracker sends for --recording (a directory
+               recorded with hand_tracking.py --record), needs MediaPipe
+
+"index" is the one-time projection of the whole scene into the pick index.
+Prints mean milliseconds per packet for each stream and size and how much
+slower the largest scene is than the smallest. --output writes all
+percentiles as JSON; --compare prints the change of the medians (steadier
+than the means) against such a file and exits with 1 when a stream got
+slower by more than --tolerance.
+
+The fake only costs the listener's own Python. With the real bpy,
+view_layer.update() and creating objects also grow with the scene, so
+compare fake runs with fake runs and real runs with real runs.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, "Blender"))
+from gesture_protocol import Hand, encode_binary  # noqa: E402
+
+SPACING = 2.0  # Distance between plane centers
+STREAMS = ("idle", "select", "drag", "rotate", "paint", "create", "duplicate")
+# Listener calls a synthetic stream of n packets has to make
+STREAM_WORK = {
+    "select": lambda n: {"ray_cast_select": (n + 1) // 2},
+    "drag": lambda n: {"move_selected_object": n - 1},
+    "rotate": lambda n: {"rotate_and_scale_object": n - 1},
+    "paint": lambda n: {"create_paint_point": n - n // 100},
+    "create": lambda n: {"create_new_plane": (n + 1) // 2, "delete_object": n // 2},
+    "duplicate": lambda n: {"duplicate_object": (n + 1) // 3, "delete_object": n // 3},
+}
+
+bpy = None
+listener = None
+
+
+def load_listener(kind, blend_dir, cooldowns=False):
+    """Import the listener on the fake or the real bpy; without cooldowns unless asked"""
+    global bpy, listener
+    if kind == "fake":
+        sys.path.insert(0, BENCH_DIR)
+        import fake_bpy
+        # The listener keeps its images and sounds next to the blend file
+        bpy = fake_bpy.install(os.path.join(blend_dir, "bench.blend"))
+    else:
+        import bpy
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+    import blender_listener as listener
+    # One "New tracker" line per stream and size is noise here
+    listener.log.setLevel(logging.WARNING)
+    if not cooldowns:
+        # Every packet does its work: no creation or paint cooldown
+        listener.creation_cooldown = 0
+        listener.paint_cooldown = 0
+    bpy.app.handlers.depsgraph_update_post.append(listener.depsgraph_handler)
+
+
+def build_scene(count):
+    """Empty the file and add count planes on a square grid, seen whole by the camera"""
+    listener.paint_trail.clear()
+    listener.sessions.clear()
+    listener.pick_index.invalidate()
+    listener.material_registry.invalidate()
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for blocks in (bpy.data.meshes, bpy.data.materials, bpy.data.cameras, bpy.data.node_groups):
+        for block in list(blocks):
+            blocks.remove(block)
+
+    scene = bpy.context.scene
+    scene.render.resolution_x, scene.render.resolution_y = 1920, 1080
+    camera = bpy.data.objects.new("BenchCamera", bpy.data.cameras.new("BenchCamera"))
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    side = math.ceil(math.sqrt(count))
+    half = side * SPACING / 2
+    # Fit the grid's height in the vertical field of view, with a margin
+    half_fov = camera.data.sensor_width / 2 / camera.data.lens * 1080 / 1920
+    camera.location = (0.0, 0.0, half / half_fov * 1.1)
+    camera.rotation_euler = (0.0, 0.0, 0.0)
+
+    mat = listener.create_y2k_material(name="Bench_Material")
+    for i in range(count):
+        x = (i % side - (side - 1) / 2) * SPACING
+        y = (i // side - (side - 1) / 2) * SPACING
+        listener.new_plane_object(f"BenchPlane_{i}", SPACING * 0.75, (x, y, 0.0), mat)
+    bpy.context.view_layer.update()
+
+
+def packet(*hands):
+    return list(hands)
+
+
+def with_phases(frames):
+    """Encode (gesture, x, y) hands per packet with the tracker's phases: "start" where a hand's gesture
+    changes, "hold" while it lasts"""
+    packets = []
+    previous = []
+    for hands in frames:
+        packets.append(encode_binary([
+            Hand(gesture, x, y, None, None, "hold" if i < len(previous) and previous[i] == gesture else "start")
+            for i, (gesture, x, y) in enumerate(hands)]))
+        previous = [gesture for gesture, _, _ in hands]
+    return packets
+
+
+def synthetic_packets(stream, count, rng):
+    """count packets of one of the synthetic streams"""
+    packets = []
+    for i in range(count):
+        angle = i * 0.05
+        if stream == "idle":
+            packets.append(packet(("none", 0.5 + 0.2 * math.cos(angle), 0.5 + 0.2 * math.sin(angle))))
+        elif stream == "select":
+            spot = (rng.uniform(0.1, 0.9), rng.uniform(0.1, 0.9))
+            packets.append(packet(("point", *spot) if i % 2 == 0 else ("none", *spot)))
+        elif stream == "drag":
+            packets.append(packet(("pinch", 0.5 + 0.1 * math.cos(angle), 0.5 + 0.1 * math.sin(angle))))
+        elif stream == "rotate":
+            spread = 0.15 + 0.05 * math.sin(angle / 3)
+            packets.append(packet(("pinch", 0.5 - spread * math.cos(angle), 0.5 - spread * math.sin(angle)),
+                                  ("pinch", 0.5 + spread * math.cos(angle), 0.5 + spread * math.sin(angle))))
+        elif stream == "paint":
+            # A stroke of 100 points, then the hand lowers for a packet
+            gesture = "none" if i % 100 == 99 else "point"
+            packets.append(packet((gesture, 0.5 + 0.3 * math.sin(angle), 0.5 + 0.3 * math.sin(2 * angle))))
+        elif stream == "create":
+            gesture = "palm" if i % 2 == 0 else "fist"
+            packets.append(packet((gesture, 0.45, 0.5), (gesture, 0.55, 0.5)))
+        elif stream == "duplicate":
+            step = i % 3
+            if step == 0:
+                packets.append(packet(("point", 0.5, 0.5)))
+            else:
+                gesture = "v_sign" if step == 1 else "fist"
+                packets.append(packet((gesture, 0.45, 0.5), (gesture, 0.55, 0.5)))
+    return with_phases(packets)
+
+
+class PacketCollector:
+    """Stands in for GestureSender and keeps the packets instead of sending them"""
+
+    send_landmarks = False
+
+    def __init__(self):
+        self.packets = []
+
+    def send(self, hands, frame, inferred_at=None):
+        self.packets.append(encode_binary(hands, seq=frame.seq, timestamp=frame.timestamp))
+
+
+def recorded_packets(directory):
+    """Packets hand_tracking.py sends when replaying a recording's landmarks"""
+    import hand_tracking as tracker  # MediaPipe and OpenCV, only needed here
+    from capture_sources import open_source
+
+    collector = PacketCollector()
+    source, recorded_hands = open_source(directory, "max", replay_landmarks=True)
+    if recorded_hands is None:
+        raise SystemExit(f"{directory} is not a recording directory")
+    stage = tracker.create_inference_stage(tracker.parse_args([]), recorded_hands, collector, recorded=True)
+    seq = 0
+    try:
+        while source.is_open():
+            image, timestamp = source.read()
+            if image is None:
+                continue
+            stage.process(tracker.CapturedFrame(seq, timestamp, image))
+            source.buffers.release(image)
+            seq += 1
+    finally:
+        source.release()
+    return collector.packets
+
+
+def prepare(stream, session):
+    """Put the session in the state the stream starts from"""
+    if stream in ("drag", "rotate", "duplicate"):
+        listener.ray_cast_select(session, 0.5, 0.5)
+    session.painting_mode = stream == "paint"
+
+
+def count_calls(names, calls):
+    """Make the listener count its calls of the named functions in calls; returns a function undoing it"""
+    originals = {name: getattr(listener, name) for name in names}
+
+    def counted(name, function):
+        def wrapper(*args, **kwargs):
+            calls[name] = calls.get(name, 0) + 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    for name, function in originals.items():
+        setattr(listener, name, counted(name, function))
+    return lambda: [setattr(listener, name, function) for name, function in originals.items()]
+
+
+def check_work(stream, packets, calls, objects_before):
+    """Exit if the stream did less than its share of work or left other objects than it created behind"""
+    expected = STREAM_WORK[stream](len(packets))
+    missing = {name: f"{calls.get(name, 0)} of {count}" for name, count in expected.items()
+               if calls.get(name, 0) < count}
+    if missing:
+        raise SystemExit(f"The {stream} stream did not do its work: {missing}")
+    left = (expected.get("create_new_plane", 0) + expected.get("duplicate_object", 0)
+            - expected.get("delete_object", 0))
+    if len(bpy.data.objects) - objects_before != left:
+        raise SystemExit(f"The {stream} stream left {len(bpy.data.objects) - objects_before:+d} objects, "
+                         f"expected {left:+d}")
+
+
+def run_stream(stream, packets):
+    """Replay packets through handle_data; returns per-packet milliseconds"""
+    session = listener.sessions.get(listener.LOCAL_CLIENT)
+    prepare(stream, session)
+    view_layer = bpy.context.view_layer
+    view_layer.update()
+    objects_before = len(bpy.data.objects)
+    calls = {}
+    restore = count_calls(STREAM_WORK[stream](0), calls) if stream in STREAM_WORK else None
+    timings = []
+    try:
+        for data in packets:
+            started = time.perf_counter()
+            listener.handle_data(data)
+            view_layer.update()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        if restore:
+            restore()
+    # Leave the scene as it was for the next stream
+    listener.clear_paint_trail(session)
+    session.painting_mode = False
+    listener.sessions.clear()
+    if stream in STREAM_WORK:
+        check_work(stream, packets, calls, objects_before)
+    return timings
+
+
+def summarize(stream, objects, timings):
+    ordered = sorted(timings)
+
+    def percentile(p):
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    return {"stream": stream, "objects": objects, "packets": len(timings),
+            "mean_ms": sum(timings) / len(timings), "p50_ms": percentile(50), "p95_ms": percentile(95),
+            "p99_ms": percentile(99), "max_ms": ordered[-1]}
+
+
+def print_table(results, sizes):
+    print(f"{'stream':>10}" + "".join(f"{size:>10}" for size in sizes) + "    growth   (mean ms per packet)")
+    for stream in dict.fromkeys(result["stream"] for result in results):
+        means = {result["objects"]: result["mean_ms"] for result in results if result["stream"] == stream}
+        growth = means[sizes[-1]] / means[sizes[0]] if means[sizes[0]] else float("nan")
+        print(f"{stream:>10}" + "".join(f"{means[size]:>10.3f}" for size in sizes) + f"{growth:>9.1f}x")
+
+
+def compare(results, baseline_path, tolerance):
+    """Print the change of every median against a previous run; returns the number of regressions"""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("bpy") != results["bpy"]:
+        print(f"Note: the baseline ran on the {baseline.get('bpy')} bpy, this run on the {results['bpy']} one")
+    previous = {(row["stream"], row["objects"]): row["p50_ms"] for row in baseline["results"]}
+    regressions = 0
+    print(f"\n{'stream':>10}{'objects':>9}{'before':>10}{'after':>10}{'change':>9}")
+    for row in results["results"]:
+        before = previous.get((row["stream"], row["objects"]))
+        if not before:
+            continue
+        change = row["p50_ms"] / before - 1
+        slower = change > tolerance
+        regressions += slower
+        print(f"{row['stream']:>10}{row['objects']:>9}{before:>10.3f}{row['p50_ms']:>10.3f}{change:>+9.0%}"
+              + ("  slower" if slower else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="planes in the scene")
+    parser.add_argument("--packets", type=int, default=300, help="packets per synthetic stream and size")
+    parser.add_argument("--streams", nargs="+", choices=STREAMS, default=list(STREAMS))
+    parser.add_argument("--recording", metavar="DIR", help="also replay the packets of this recording")
+    parser.add_argument("--bpy", choices=["fake", "real"], default="fake",
+                        help="run on fake_bpy.py or on the real bpy module")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="JSON of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="slowdown of a median counted as a regression by --compare")
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    args = parser.parse_args(argv)
+    sizes = sorted(args.sizes)
+
+    streams = {stream: synthetic_packets(stream, args.packets, random.Random(args.seed)) for stream in args.streams}
+    if args.recording:
+        streams["recording"] = recorded_packets(args.recording)
+        print(f"{len(streams['recording'])} packets from {args.recording}")
+
+    with tempfile.TemporaryDirectory() as blend_dir:
+        load_listener(args.bpy, blend_dir)
+        rows = []
+        try:
+            for size in sizes:
+                build_scene(size)
+                started = time.perf_counter()
+                listener.pick_index.refresh(bpy.context.scene)
+                rows.append(summarize("index", size, [(time.perf_counter() - started) * 1000]))
+                for stream, packets in streams.items():
+                    rows.append(summarize(stream, size, run_stream(stream, packets)))
+        finally:
+            if listener.pyramid_builder is not None:
+                listener.pyramid_builder.close()
+
+    results = {"bpy": args.bpy, "python": platform.python_version(), "machine": platform.machine(),
+               "date": datetime.now().isoformat(timespec="seconds"), "packets": args.packets,
+               "seed": args.seed, "results": rows}
+    print_table(rows, sizes)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Time the help overlay against the original full-frame copy + addWeighted.
+
+    python benchmarks/bench_overlay.py
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from overlay import HELP_LINES, HELP_PANEL_HEIGHT, HelpOverlay  # noqa: E402
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (3840, 2160)]
+
+
+def full_frame_overlay(image):
+    """The per-frame overlay as it used to be drawn in hand_tracking.py"""
+    width = image.shape[1]
+    help_overlay = image.copy()
+    cv2.rectangle(help_overlay, (0, 0), (width, HELP_PANEL_HEIGHT), (0, 0, 0), -1)
+    image = cv2.addWeighted(help_overlay, 0.7, image, 0.3, 0)
+    for text, (x, y), scale, thickness in HELP_LINES:
+        origin = (width + x if x < 0 else x, y)
+        cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 255, 255), thickness)
+    return image
+
+
+def time_per_call(func, image, repeat):
+    func(image)  # warm up, builds the sprite for the cached version
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(image)
+    return (time.perf_counter() - started) / repeat * 1000.0
+
+
+def main():
+    overlay = HelpOverlay()
+    print(f"{'resolution':>12}{'full frame ms':>16}{'cached ms':>12}")
+    for width, height in RESOLUTIONS:
+        image = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+        repeat = 200 if width < 1920 else 50
+        before = time_per_call(full_frame_overlay, image, repeat)
+        after = time_per_call(overlay.draw, image, repeat)
+        print(f"{f'{width}x{height}':>12}{before:>16.2f}{after:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
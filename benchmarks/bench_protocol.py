@@ -0,0 +1,40 @@
+"""Encode/decode cost and packet size of the text and binary wire formats.
+
+    python benchmarks/bench_protocol.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gesture_protocol  # noqa: E402
+from gesture_protocol import Hand  # noqa: E402
+
+
+def sample_hands(with_landmarks):
+    hands = []
+    for gesture, handedness in (("pinch", "Right"), ("palm", "Left")):
+        landmarks = [random.random() for _ in range(63)] if with_landmarks else None
+        hands.append(Hand(gesture, random.random(), random.random(), handedness, landmarks))
+    return hands
+
+
+def bench(label, encode, hands, number=20000):
+    packet = encode(hands)
+    encode_us = timeit.timeit(lambda: encode(hands), number=number) / number * 1e6
+    decode_us = timeit.timeit(lambda: gesture_protocol.decode_packet(packet), number=number) / number * 1e6
+    print(f"{label:<28}{len(packet):>8}{encode_us:>12.2f}{decode_us:>12.2f}")
+
+
+def main():
+    random.seed(0)
+    print(f"{'format (2 hands)':<28}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    bench("text", gesture_protocol.encode_text, sample_hands(False))
+    bench("binary", lambda h: gesture_protocol.encode_binary(h, seq=1, timestamp=1.0), sample_hands(False))
+    bench("binary + 21 landmarks", lambda h: gesture_protocol.encode_binary(h, seq=1, timestamp=1.0),
+          sample_hands(True))
+
+
+if __name__ == "__main__":
+    main()
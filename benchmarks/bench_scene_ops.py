@@ -0,0 +1,119 @@
+"""Per-gesture cost of scene changes through bpy.ops against bpy.data, as the scene grows.
+
+Runs inside Blender, in the background:
+
+    blender --background --factory-startup --python benchmarks/bench_scene_ops.py -- --sizes 0 250 1000 2000
+
+For each scene size, creates, duplicates and deletes planes the way the
+gesture handlers did before (operators) and the way they do now (direct
+bpy.data calls from blender_listener.py), and prints the mean time per
+gesture in milliseconds.
+"""
+import argparse
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Blender"))
+import blender_listener as listener  # noqa: E402
+
+
+def timed(action, repeat):
+    """Mean milliseconds of action(i) over repeat calls; returns (ms, results)"""
+    results = []
+    started = time.perf_counter()
+    for i in range(repeat):
+        results.append(action(i))
+    return (time.perf_counter() - started) / repeat * 1000, results
+
+
+def select_with_operator(obj):
+    bpy.ops.object.select_all(action='DESELECT')
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+
+
+def create_with_operator(i, mat):
+    bpy.ops.mesh.primitive_plane_add(size=1.5, location=(i * 0.01, 0, 1))
+    plane = bpy.context.active_object
+    plane.name = f"Bench_Op_{i}"
+    plane.data.materials.append(mat)
+    select_with_operator(plane)
+    return plane
+
+
+def create_direct(i, mat):
+    session = listener.sessions.get(listener.LOCAL_CLIENT)
+    plane = listener.new_plane_object(f"Bench_Direct_{i}", 1.5, (i * 0.01, 0, 1), mat)
+    listener.select_only(plane, session.selected_object)
+    session.selected_object = plane
+    return plane
+
+
+def duplicate_with_operator(source):
+    select_with_operator(source)
+    bpy.ops.object.duplicate()
+    copy = bpy.context.active_object
+    copy.location.x += 0.5
+    return copy
+
+
+def duplicate_direct(source):
+    session = listener.sessions.get(listener.LOCAL_CLIENT)
+    copy = listener.duplicate_object(source)
+    copy.location.x += 0.5
+    listener.select_only(copy, session.selected_object)
+    session.selected_object = copy
+    return copy
+
+
+def delete_with_operator(obj):
+    select_with_operator(obj)
+    bpy.ops.object.delete()
+
+
+def populate(count, mat):
+    """Grow the scene to count background planes"""
+    existing = sum(obj.name.startswith("Bench_Fill_") for obj in bpy.data.objects)
+    for i in range(existing, count):
+        listener.new_plane_object(f"Bench_Fill_{i}", 1.0, ((i % 50) * 1.2, (i // 50) * 1.2, 0), mat)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 250, 1000, 2000],
+                        help="number of objects already in the scene")
+    parser.add_argument("--repeat", type=int, default=50, help="gestures timed per size and operation")
+    args = parser.parse_args(argv)
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    mat = listener.create_y2k_material(name="Bench_Material")
+
+    print(f"{'objects':>8}{'op create':>12}{'create':>10}{'op dup':>10}{'dup':>10}{'op delete':>12}{'delete':>10}"
+          "   (ms per gesture)")
+    for size in sorted(args.sizes):
+        populate(size, mat)
+
+        op_create, op_planes = timed(lambda i: create_with_operator(i, mat), args.repeat)
+        create, planes = timed(lambda i: create_direct(i, mat), args.repeat)
+        op_dup, op_copies = timed(lambda i: duplicate_with_operator(op_planes[i]), args.repeat)
+        dup, copies = timed(lambda i: duplicate_direct(planes[i]), args.repeat)
+        op_delete, _ = timed(lambda i: delete_with_operator(op_copies[i]), args.repeat)
+        delete, _ = timed(lambda i: listener.delete_object(copies[i]), args.repeat)
+
+        # Back to size objects for the next round
+        for obj in list(bpy.data.objects):
+            if obj.name.startswith(("Bench_Op_", "Bench_Direct_")):
+                listener.delete_object(obj)
+
+        print(f"{size:>8}{op_create:>12.2f}{create:>10.2f}{op_dup:>10.2f}{dup:>10.2f}"
+              f"{op_delete:>12.2f}{delete:>10.2f}")
+
+    if listener.pyramid_builder is not None:
+        listener.pyramid_builder.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
@@ -0,0 +1,152 @@
+"""Latency of the UDP and shared-memory transports between two processes on one machine.
+
+    python benchmarks/bench_transport.py --packets 2000 --rate 200
+
+A separate process (standing in for a tracker) sends binary gesture
+packets with two hands and their landmarks at --rate per second, stamped
+with the wall-clock send time. This process receives them the way Blender
+does: UDP through a socket thread and a queue, shared memory by polling
+the ring, both checked by one loop that stands in for Blender's timer and
+sleeps --poll-interval between polls (which lets the socket thread have
+the GIL). 0 shows the transports alone, 0.01 is Blender's timer interval.
+
+Prints send-to-apply latency percentiles in milliseconds, the cost of a
+poll that finds nothing, and the wake-ups of the receiving side.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gesture_protocol import Hand, decode_packet, encode_binary  # noqa: E402
+from latency_trace import LatencyHistogram  # noqa: E402
+from shm_transport import ShmRingLink, ShmRingReader  # noqa: E402
+
+RING_NAME = "rtht_bench_transport"
+HANDS = [Hand("pinch", 0.5, 0.5, "Left", [0.5] * 63, "hold"),
+         Hand("point", 0.3, 0.6, "Right", [0.3] * 63, "start")]
+
+
+def producer(transport, port, packets, rate):
+    """Sending process: send packets at a steady rate once the receiver writes a line to stdin"""
+    address = ("127.0.0.1", port)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    ring = ShmRingLink(RING_NAME) if transport == "shm" else None
+    sys.stdin.readline()
+    interval = 1.0 / rate
+    next_send = time.perf_counter()
+    for seq in range(packets):
+        message = encode_binary(HANDS, seq=seq, timestamp=time.time())
+        if ring is None or not ring.write(message):
+            sock.sendto(message, address)
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    if ring is not None:
+        ring.close()
+    sock.close()
+
+
+def receive(transport, packets, rate, poll_interval):
+    """Run one producer and collect its packets; returns (histogram, lost, wake-ups)"""
+    histogram = LatencyHistogram()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.2)
+    reader = ShmRingReader(RING_NAME) if transport == "shm" else None
+    pending = deque()
+    wakeups = [0]
+    running = [True]
+
+    def socket_thread():
+        while running[0]:
+            try:
+                data, _ = sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            wakeups[0] += 1
+            pending.append(data)
+
+    thread = threading.Thread(target=socket_thread, daemon=True)
+    thread.start()
+
+    child = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--produce", transport,
+                              str(sock.getsockname()[1]), "--packets", str(packets), "--rate", str(rate)],
+                             stdin=subprocess.PIPE, text=True)
+    time.sleep(0.5)  # Let the child import and attach
+    child.stdin.write("go\n")
+    child.stdin.close()
+
+    received = 0
+    deadline = time.perf_counter() + packets / rate + 3.0
+    while received < packets and time.perf_counter() < deadline:
+        if transport == "shm":
+            wakeups[0] += 1
+            batch = reader.poll()
+        else:
+            batch = []
+            while pending:
+                batch.append(pending.popleft())
+        now = time.time()
+        for data in batch:
+            histogram.record((now - decode_packet(data).timestamp) * 1000)
+        received += len(batch)
+        time.sleep(poll_interval)
+    child.wait()
+    running[0] = False
+    thread.join()
+    sock.close()
+    if reader is not None:
+        reader.close()
+    return histogram, packets - received, wakeups[0]
+
+
+def empty_poll_us(repeat=200000):
+    """Microseconds per poll when nothing arrived: deque check against ring header read"""
+    reader = ShmRingReader(RING_NAME)
+    pending = deque()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        while pending:
+            pending.popleft()
+    deque_us = (time.perf_counter() - started) / repeat * 1e6
+    started = time.perf_counter()
+    for _ in range(repeat):
+        reader.poll()
+    ring_us = (time.perf_counter() - started) / repeat * 1e6
+    reader.close()
+    return deque_us, ring_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packets", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200.0, help="packets per second")
+    parser.add_argument("--poll-interval", type=float, nargs="+", default=[0.0, 0.01],
+                        help="seconds between polls of the receiving loop")
+    parser.add_argument("--produce", nargs=2, metavar=("TRANSPORT", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.produce:
+        producer(args.produce[0], int(args.produce[1]), args.packets, args.rate)
+        return
+
+    print(f"{'transport':>10}{'poll ms':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'lost':>6}  wake-ups")
+    for poll_interval in args.poll_interval:
+        for transport in ("udp", "shm"):
+            histogram, lost, wakeups = receive(transport, args.packets, args.rate, poll_interval)
+            print(f"{transport:>10}{poll_interval * 1000:>9.1f}{histogram.percentile(50):>8.3f}"
+                  f"{histogram.percentile(95):>8.3f}{histogram.percentile(99):>8.3f}"
+                  f"{histogram.max:>8.3f}{lost:>6}  {wakeups} "
+                  f"({'socket thread' if transport == 'udp' else 'polls'})")
+    deque_us, ring_us = empty_poll_us()
+    print(f"empty poll: queue {deque_us:.3f} us, ring {ring_us:.3f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare frame rate and CPU usage of the windowed and headless tracker.
+
+Runs hand_tracking.py once in each mode for a fixed duration and prints
+the per-stage fps and CPU usage reported by the tracker itself, plus the
+CPU time the child process consumed as seen by the OS (Unix only, shown
+as "-" elsewhere).
+
+    python benchmarks/compare_modes.py --duration 30
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+try:
+    import resource  # Unix only
+    has_resource = True
+except ImportError:
+    has_resource = False
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACKER = os.path.join(REPO_DIR, "hand_tracking.py")
+
+
+def run_mode(headless, duration, extra_args):
+    """Run the tracker once and return its parsed summary line"""
+    cmd = [sys.executable, TRACKER, "--duration", str(duration)] + extra_args
+    if headless:
+        cmd.append("--headless")
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN) if has_resource else None
+    proc = subprocess.run(cmd, cwd=REPO_DIR, capture_output=True, text=True)
+    after = resource.getrusage(resource.RUSAGE_CHILDREN) if has_resource else None
+
+    summary = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith("[summary]"):
+            summary = dict(re.findall(r"(\w+)=([\w.]+)", line))
+    if not summary:
+        print(proc.stdout[-2000:])
+        print(proc.stderr[-2000:])
+        raise RuntimeError(f"tracker did not print a summary (exit code {proc.returncode})")
+
+    if has_resource:
+        cpu_seconds = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+        summary["os_cpu_percent"] = f"{cpu_seconds / float(summary['seconds']) * 100.0:.0f}"
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per mode")
+    args, extra_args = parser.parse_known_args()
+
+    results = {}
+    for mode, headless in (("windowed", False), ("headless", True)):
+        print(f"Running {mode} mode for {args.duration:.0f}s...")
+        results[mode] = run_mode(headless, args.duration, extra_args)
+
+    keys = ["capture_fps", "inference_fps", "render_fps", "cpu_percent", "os_cpu_percent"]
+    print(f"{'':16}{'windowed':>12}{'headless':>12}")
+    for key in keys:
+        row = [results[mode].get(key, "-") for mode in ("windowed", "headless")]
+        print(f"{key:16}{row[0]:>12}{row[1]:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1145 @@
+"""Lightweight stand-in for bpy, mathutils and bpy_extras, to time Blender/blender_listener.py without Blender.
+
+    import fake_bpy
+    fake_bpy.install("/tmp/bench/bench.blend")
+    import blender_listener
+
+install() puts modules named bpy, bpy.app, bpy.app.handlers, bpy.types,
+bpy_extras, bpy_extras.object_utils and mathutils in sys.modules. They
+implement the part of the API the listener uses, in plain Python:
+
+* data collections with Blender's unique names (".001") and user counts
+* objects with location/rotation/scale, matrix_world, bound_box,
+  ray_cast against their mesh, material slots, selection and copy(),
+  and a scene ray_cast that tests every visible mesh
+* meshes, materials and node trees, node groups, modifiers, images
+* a perspective or orthographic camera with view_frame(), and
+  world_to_camera_view()
+* app handlers and timers; view_layer.update() calls the
+  depsgraph_update_post handlers with the objects moved since the
+  previous update, like Blender's depsgraph does
+
+Nothing is drawn or evaluated: shaders, geometry nodes, undo and the
+depsgraph's own cost are not modeled, so timings are those of the
+listener's Python code plus a rough equivalent of the bpy calls it makes.
+Use the numbers to compare versions of the listener against each other,
+not against Blender.
+"""
+import math
+import os
+import sys
+import types
+from array import array
+
+
+# mathutils
+
+class Vector:
+    """2D to 4D vector; changes to x/y/z of an object's transform tag the object as moved"""
+
+    __slots__ = ("_v", "_owner")
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._v = [float(value) for value in values]
+        self._owner = None
+
+    def _set(self, index, value):
+        self._v[index] = float(value)
+        if self._owner is not None:
+            self._owner._tag_transform()
+
+    x = property(lambda self: self._v[0], lambda self, value: self._set(0, value))
+    y = property(lambda self: self._v[1], lambda self, value: self._set(1, value))
+    z = property(lambda self: self._v[2], lambda self, value: self._set(2, value))
+    w = property(lambda self: self._v[3], lambda self, value: self._set(3, value))
+
+    def __len__(self):
+        return len(self._v)
+
+    def __iter__(self):
+        return iter(self._v)
+
+    def __getitem__(self, index):
+        return self._v[index]
+
+    def __setitem__(self, index, value):
+        self._set(index, value)
+
+    def __add__(self, other):
+        return Vector([a + b for a, b in zip(self._v, other)])
+
+    def __sub__(self, other):
+        return Vector([a - b for a, b in zip(self._v, other)])
+
+    def __mul__(self, scalar):
+        return Vector([a * scalar for a in self._v])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return Vector([a / scalar for a in self._v])
+
+    def __neg__(self):
+        return Vector([-a for a in self._v])
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and self._v == other._v
+
+    def __repr__(self):
+        return f"Vector({tuple(self._v)})"
+
+    @property
+    def length(self):
+        return math.sqrt(sum(a * a for a in self._v))
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self._v, other))
+
+    def cross(self, other):
+        ax, ay, az = self._v[:3]
+        bx, by, bz = other[0], other[1], other[2]
+        return Vector((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx))
+
+    def normalized(self):
+        return self / (self.length or 1.0)
+
+    def copy(self):
+        return Vector(self._v)
+
+
+class Euler(Vector):
+    """XYZ rotation in radians"""
+
+    __slots__ = ()
+
+    def to_matrix(self):
+        rx, ry, rz = self._v[:3]
+        cx, sx = math.cos(rx), math.sin(rx)
+        cy, sy = math.cos(ry), math.sin(ry)
+        cz, sz = math.cos(rz), math.sin(rz)
+        return Matrix([[cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz],
+                       [cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz],
+                       [-sy, sx * cy, cx * cy]])
+
+
+class Matrix:
+    """Square matrix stored as rows"""
+
+    __slots__ = ("rows",)
+
+    def __init__(self, rows):
+        self.rows = [[float(value) for value in row] for row in rows]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __matmul__(self, other):
+        size = len(self.rows)
+        if isinstance(other, Matrix):
+            columns = list(zip(*other.rows))
+            return Matrix([[sum(a * b for a, b in zip(row, column)) for column in columns] for row in self.rows])
+        values = list(other)
+        if size == 4 and len(values) == 3:
+            # A 3D point: w = 1
+            values.append(1.0)
+            return Vector([sum(a * b for a, b in zip(row, values)) for row in self.rows[:3]])
+        return Vector([sum(a * b for a, b in zip(row, values)) for row in self.rows])
+
+    @property
+    def translation(self):
+        return Vector([row[3] for row in self.rows[:3]])
+
+    def to_3x3(self):
+        return Matrix([row[:3] for row in self.rows[:3]])
+
+    def to_quaternion(self):
+        """The rotation part; stands in for a Quaternion since it is only used to rotate vectors"""
+        rotation = self.to_3x3()
+        for j in range(3):
+            norm = math.sqrt(sum(rotation.rows[i][j] ** 2 for i in range(3))) or 1.0
+            for i in range(3):
+                rotation.rows[i][j] /= norm
+        return rotation
+
+    def normalized(self):
+        return self
+
+    def inverted(self):
+        """Gauss-Jordan inverse"""
+        size = len(self.rows)
+        work = [row[:] + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(self.rows)]
+        for column in range(size):
+            pivot = max(range(column, size), key=lambda r: abs(work[r][column]))
+            if abs(work[pivot][column]) < 1e-12:
+                raise ValueError("Matrix is not invertible")
+            work[column], work[pivot] = work[pivot], work[column]
+            scale = work[column][column]
+            work[column] = [value / scale for value in work[column]]
+            for r in range(size):
+                if r != column and work[r][column]:
+                    factor = work[r][column]
+                    work[r] = [a - factor * b for a, b in zip(work[r], work[column])]
+        return Matrix([row[size:] for row in work])
+
+
+def world_to_camera_view(scene, obj, coord):
+    """Camera-view coordinates of a world point: x, y in 0-1 (origin bottom left), z the depth"""
+    co_local = obj.matrix_world.inverted() @ coord
+    z = -co_local.z
+    frame = obj.data.view_frame(scene=scene)[:3]
+    if obj.data.type != 'ORTHO':
+        if z == 0.0:
+            return Vector((0.5, 0.5, 0.0))
+        frame = [-(v / (v.z / z)) for v in frame]
+    min_x, max_x = frame[2].x, frame[1].x
+    min_y, max_y = frame[1].y, frame[0].y
+    return Vector(((co_local.x - min_x) / (max_x - min_x), (co_local.y - min_y) / (max_y - min_y), z))
+
+
+# Data-blocks
+
+class ID:
+    """Base of data-blocks: a name unique in its collection, users and custom properties"""
+
+    def __init__(self, name):
+        self._name = name
+        self._collection = None
+        self._props = {}
+        self.users = 0
+        self.use_fake_user = False
+        self.removed = False
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self._collection is not None:
+            self._collection._rename(self, value)
+        else:
+            self._name = value
+
+    def __getitem__(self, key):
+        return self._props[key]
+
+    def __setitem__(self, key, value):
+        self._props[key] = value
+
+    def __contains__(self, key):
+        return key in self._props
+
+    def get(self, key, default=None):
+        return self._props.get(key, default)
+
+    def as_pointer(self):
+        return id(self)
+
+    def _check(self):
+        if self.removed:
+            raise ReferenceError(f"{type(self).__name__} has been removed")
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._name!r}>"
+
+
+class IDCollection:
+    """bpy.data.objects and friends"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._items = {}
+
+    def _unique(self, name):
+        if name not in self._items:
+            return name
+        base = name
+        number = 1
+        while f"{base}.{number:03d}" in self._items:
+            number += 1
+        return f"{base}.{number:03d}"
+
+    def _add(self, item):
+        item._name = self._unique(item._name)
+        item._collection = self
+        self._items[item._name] = item
+        return item
+
+    def _rename(self, item, name):
+        del self._items[item._name]
+        item._name = self._unique(name)
+        self._items[item._name] = item
+
+    def new(self, name, *args, **kwargs):
+        return self._add(self._factory(name, *args, **kwargs))
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def remove(self, item, do_unlink=True):
+        item._check()
+        item._on_remove()
+        del self._items[item._name]
+        item._collection = None
+        item.removed = True
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self._items.values())[key]
+        return self._items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self._items
+        return self._items.get(getattr(key, "name", None)) is key
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ImageCollection(IDCollection):
+    def load(self, filepath, check_existing=False):
+        name = os.path.basename(filepath)
+        if check_existing:
+            for image in self._items.values():
+                if image.filepath == filepath:
+                    return image
+        return self._add(Image(name, filepath))
+
+
+class Socket:
+    def __init__(self, name, identifier=None):
+        self.name = name
+        self.identifier = identifier or name
+        self.default_value = None
+
+
+class Sockets:
+    """Node inputs/outputs, created on first access by index or name"""
+
+    def __init__(self):
+        self._sockets = []
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            while len(self._sockets) <= key:
+                self._sockets.append(Socket(str(len(self._sockets))))
+            return self._sockets[key]
+        for socket in self._sockets:
+            if socket.name == key:
+                return socket
+        self._sockets.append(Socket(key))
+        return self._sockets[-1]
+
+    def new(self, socket_type, name):
+        socket = Socket(name, identifier=f"Input_{len(self._sockets)}")
+        self._sockets.append(socket)
+        return socket
+
+    def __iter__(self):
+        return iter(self._sockets)
+
+
+class Node:
+    def __init__(self, node_type, name):
+        self.type = node_type
+        self.name = name
+        self.inputs = Sockets()
+        self.outputs = Sockets()
+        self.image = None
+
+
+class Nodes:
+    def __init__(self):
+        self._nodes = {}
+
+    def new(self, type):
+        name = type
+        number = 1
+        while name in self._nodes:
+            name = f"{type}.{number:03d}"
+            number += 1
+        node = self._nodes[name] = Node(type, name)
+        return node
+
+    def remove(self, node):
+        for name, existing in list(self._nodes.items()):
+            if existing is node:
+                del self._nodes[name]
+
+    def __contains__(self, name):
+        return any(node.name == name for node in self._nodes.values())
+
+    def __getitem__(self, name):
+        for node in self._nodes.values():
+            if node.name == name:
+                return node
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(list(self._nodes.values()))
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+class Links:
+    def __init__(self):
+        self._links = []
+
+    def new(self, output, input):
+        self._links.append((output, input))
+        return self._links[-1]
+
+
+class NodeTree:
+    def __init__(self):
+        self.nodes = Nodes()
+        self.links = Links()
+
+
+class Material(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.node_tree = None
+        self._use_nodes = False
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        self._use_nodes = value
+        if value and self.node_tree is None:
+            self.node_tree = NodeTree()
+            self.node_tree.nodes.new("ShaderNodeBsdfPrincipled").name = "Principled BSDF"
+            self.node_tree.nodes.new("ShaderNodeOutputMaterial").name = "Material Output"
+
+    def _on_remove(self):
+        pass
+
+
+class NodeGroup(ID):
+    def __init__(self, name, type):
+        super().__init__(name)
+        self.type = type
+        self.nodes = Nodes()
+        self.links = Links()
+        self.inputs = Sockets()
+        self.outputs = Sockets()
+
+    def _on_remove(self):
+        pass
+
+
+class Image(ID):
+    def __init__(self, name, filepath="", size=(0, 0)):
+        super().__init__(name)
+        self.filepath = filepath
+        self.size = list(size)
+
+    def reload(self):
+        pass
+
+    def scale(self, width, height):
+        self.size = [width, height]
+
+    def _on_remove(self):
+        pass
+
+
+class ForeachData:
+    """Attribute data written with foreach_set"""
+
+    def __init__(self):
+        self.values = array('f')
+
+    def foreach_set(self, attribute, values):
+        self.values = array('f', values)
+
+    def __getitem__(self, index):
+        return ColorItem(self, index)
+
+
+class ColorItem:
+    """One element of a color attribute"""
+
+    def __init__(self, data, index):
+        self._data = data
+        self._index = index
+
+    @property
+    def color(self):
+        return tuple(self._data.values[4 * self._index:4 * self._index + 4])
+
+    @color.setter
+    def color(self, value):
+        values = self._data.values
+        if len(values) < 4 * self._index + 4:
+            values.extend(array('f', bytes(4 * (4 * self._index + 4 - len(values)))))
+        values[4 * self._index:4 * self._index + 4] = array('f', value)
+
+
+class Attribute:
+    def __init__(self, name, type, domain):
+        self.name = name
+        self.data_type = type
+        self.domain = domain
+        self.data = ForeachData()
+
+
+class Attributes:
+    def __init__(self):
+        self._attributes = {}
+
+    def new(self, name, type, domain):
+        attribute = self._attributes[name] = Attribute(name, type, domain)
+        return attribute
+
+    def __getitem__(self, name):
+        return self._attributes[name]
+
+    def get(self, name, default=None):
+        return self._attributes.get(name, default)
+
+
+class UVLayers:
+    def __init__(self):
+        self._layers = []
+
+    def new(self, name="UVMap"):
+        layer = types.SimpleNamespace(name=name, data=ForeachData())
+        self._layers.append(layer)
+        return layer
+
+
+class MeshVertices:
+    def __init__(self, mesh):
+        self._mesh = mesh
+        self.co = array('f')
+
+    def add(self, count):
+        self.co.extend(array('f', bytes(4 * 3 * count)))
+        self._mesh._bounds = None
+
+    def foreach_set(self, attribute, values):
+        self.co = array('f', values)
+        self._mesh._bounds = None
+
+    def __len__(self):
+        return len(self.co) // 3
+
+    def __getitem__(self, index):
+        return MeshVertex(self, index)
+
+
+class MeshVertex:
+    def __init__(self, vertices, index):
+        self._vertices = vertices
+        self._index = index
+
+    @property
+    def co(self):
+        return Vector(self._vertices.co[3 * self._index:3 * self._index + 3])
+
+    @co.setter
+    def co(self, value):
+        self._vertices.co[3 * self._index:3 * self._index + 3] = array('f', value)
+        self._vertices._mesh._bounds = None
+
+
+class MeshMaterials:
+    def __init__(self):
+        self._materials = []
+
+    def append(self, material):
+        if material is not None:
+            material.users += 1
+        self._materials.append(material)
+
+    def __getitem__(self, index):
+        return self._materials[index]
+
+    def __setitem__(self, index, material):
+        if self._materials[index] is not None:
+            self._materials[index].users -= 1
+        if material is not None:
+            material.users += 1
+        self._materials[index] = material
+
+    def __len__(self):
+        return len(self._materials)
+
+    def __iter__(self):
+        return iter(self._materials)
+
+
+class Mesh(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.vertices = MeshVertices(self)
+        self.polygons = []
+        self.uv_layers = UVLayers()
+        self.attributes = Attributes()
+        self.materials = MeshMaterials()
+        self._bounds = None
+
+    def from_pydata(self, vertices, edges, faces):
+        self.vertices.co = array('f', [value for vertex in vertices for value in vertex])
+        self.polygons = [tuple(face) for face in faces]
+        self._bounds = None
+
+    def update(self):
+        pass
+
+    def vertex(self, index):
+        co = self.vertices.co
+        return Vector(co[3 * index:3 * index + 3])
+
+    def bounds(self):
+        """Min and max corner of the vertices"""
+        if self._bounds is None:
+            co = self.vertices.co
+            if not co:
+                self._bounds = ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+            else:
+                self._bounds = (tuple(min(co[axis::3]) for axis in range(3)),
+                                tuple(max(co[axis::3]) for axis in range(3)))
+        return self._bounds
+
+    def _on_remove(self):
+        for material in self.materials:
+            if material is not None:
+                material.users -= 1
+
+
+class CameraData(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.type = 'PERSP'
+        self.lens = 50.0
+        self.ortho_scale = 6.0
+        self.sensor_width = 36.0
+        self.sensor_fit = 'AUTO'
+        self.shift_x = 0.0
+        self.shift_y = 0.0
+
+    def view_frame(self, scene=None):
+        """Corners of the camera frame in camera space: top right, bottom right, bottom left, top left"""
+        render = scene.render if scene is not None else Render()
+        aspect = (render.resolution_x * render.pixel_aspect_x) / (render.resolution_y * render.pixel_aspect_y)
+        if self.type == 'ORTHO':
+            half_x, depth = self.ortho_scale / 2, -1.0
+        else:
+            half_x, depth = 0.5, -self.lens / self.sensor_width
+        half_y = half_x / aspect if aspect >= 1.0 else half_x
+        if aspect < 1.0:
+            half_x *= aspect
+        return [Vector((half_x, half_y, depth)), Vector((half_x, -half_y, depth)),
+                Vector((-half_x, -half_y, depth)), Vector((-half_x, half_y, depth))]
+
+    def _on_remove(self):
+        pass
+
+
+class LightData(ID):
+    def __init__(self, name, type='POINT'):
+        super().__init__(name)
+        self.type = type
+        self.energy = 10.0
+        self.color = (1.0, 1.0, 1.0)
+
+    def _on_remove(self):
+        pass
+
+
+class MaterialSlot:
+    def __init__(self, obj, index):
+        self._obj = obj
+        self._index = index
+        self.link = 'DATA'
+
+    @property
+    def material(self):
+        if self.link == 'OBJECT':
+            return self._obj._materials.get(self._index)
+        return self._obj.data.materials[self._index]
+
+    @material.setter
+    def material(self, material):
+        if self.link == 'OBJECT':
+            previous = self._obj._materials.get(self._index)
+            if previous is not None:
+                previous.users -= 1
+            if material is not None:
+                material.users += 1
+            self._obj._materials[self._index] = material
+        else:
+            self._obj.data.materials[self._index] = material
+
+
+class Modifier:
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self.node_group = None
+        self._props = {}
+
+    def __getitem__(self, key):
+        return self._props[key]
+
+    def __setitem__(self, key, value):
+        self._props[key] = value
+
+
+class Modifiers:
+    def __init__(self):
+        self._modifiers = []
+
+    def new(self, name, type):
+        modifier = Modifier(name, type)
+        self._modifiers.append(modifier)
+        return modifier
+
+    def __iter__(self):
+        return iter(self._modifiers)
+
+
+class Object(ID):
+    def __init__(self, name, data=None):
+        super().__init__(name)
+        self.data = data
+        if data is not None:
+            data.users += 1
+        if isinstance(data, Mesh):
+            self.type = 'MESH'
+        elif isinstance(data, CameraData):
+            self.type = 'CAMERA'
+        elif isinstance(data, LightData):
+            self.type = 'LIGHT'
+        else:
+            self.type = 'EMPTY'
+        self._location = self._owned(Vector())
+        self._rotation = self._owned(Euler())
+        self._scale = self._owned(Vector((1.0, 1.0, 1.0)))
+        self._materials = {}  # Object-linked materials by slot
+        self._slots = []
+        self._collections = []
+        self._selected = False
+        self._world_box = None  # World-space bounds for the scene ray cast, until the object moves
+        self.hide_viewport = False
+        self.modifiers = Modifiers()
+
+    def _owned(self, vector):
+        vector._owner = self
+        return vector
+
+    def _tag_transform(self):
+        _state.moved[id(self)] = self
+        self._world_box = None
+
+    @property
+    def original(self):
+        return self
+
+    location = property(lambda self: self._location,
+                        lambda self, value: self._assign(self._location, value))
+    rotation_euler = property(lambda self: self._rotation,
+                              lambda self, value: self._assign(self._rotation, value))
+    scale = property(lambda self: self._scale,
+                     lambda self, value: self._assign(self._scale, value))
+
+    def _assign(self, vector, values):
+        vector._v = [float(value) for value in values]
+        self._tag_transform()
+
+    @property
+    def matrix_world(self):
+        rotation = self._rotation.to_matrix().rows
+        scale = self._scale._v
+        location = self._location._v
+        return Matrix([[rotation[i][0] * scale[0], rotation[i][1] * scale[1], rotation[i][2] * scale[2],
+                        location[i]] for i in range(3)] + [[0.0, 0.0, 0.0, 1.0]])
+
+    @property
+    def bound_box(self):
+        if not isinstance(self.data, Mesh):
+            return [(0.0, 0.0, 0.0)] * 8
+        (x0, y0, z0), (x1, y1, z1) = self.data.bounds()
+        return [(x, y, z) for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)]
+
+    @property
+    def material_slots(self):
+        count = len(self.data.materials) if isinstance(self.data, Mesh) else 0
+        while len(self._slots) < count:
+            self._slots.append(MaterialSlot(self, len(self._slots)))
+        return self._slots[:count]
+
+    @property
+    def active_material(self):
+        slots = self.material_slots
+        return slots[0].material if slots else None
+
+    @property
+    def users_collection(self):
+        return list(self._collections)
+
+    def select_set(self, state):
+        self._check()
+        self._selected = bool(state)
+
+    def select_get(self):
+        return self._selected
+
+    def visible_get(self):
+        return not self.hide_viewport
+
+    def update_tag(self):
+        pass
+
+    def ray_cast(self, origin, direction):
+        """Nearest hit of a ray with the mesh faces, in object space: (hit, location, normal, face index)"""
+        miss = (False, Vector((0.0, 0.0, 0.0)), Vector((0.0, 0.0, 0.0)), -1)
+        if not isinstance(self.data, Mesh):
+            return miss
+        best = None
+        for index, face in enumerate(self.data.polygons):
+            first = self.data.vertex(face[0])
+            for i in range(1, len(face) - 1):
+                hit = _ray_triangle(origin, direction, first, self.data.vertex(face[i]),
+                                    self.data.vertex(face[i + 1]))
+                if hit is not None and (best is None or hit[0] < best[0]):
+                    best = (hit[0], hit[1], index)
+        if best is None:
+            return miss
+        distance, normal, index = best
+        return True, Vector(origin) + Vector(direction) * distance, normal, index
+
+    def world_box(self):
+        """(min corner, max corner) of the bounding box in world space"""
+        if self._world_box is None:
+            # Center and half extents of the local box, transformed without going through the corners
+            box = self.bound_box
+            low, high = box[0], box[7]
+            center = [(a + b) / 2 for a, b in zip(low, high)]
+            half = [(b - a) / 2 for a, b in zip(low, high)]
+            rows = self.matrix_world.rows
+            world_center = [sum(row[j] * center[j] for j in range(3)) + row[3] for row in rows[:3]]
+            world_half = [sum(abs(row[j]) * half[j] for j in range(3)) for row in rows[:3]]
+            self._world_box = ([c - h for c, h in zip(world_center, world_half)],
+                               [c + h for c, h in zip(world_center, world_half)])
+        return self._world_box
+
+    def copy(self):
+        copy = Object(self._name, self.data)
+        copy._location._v = list(self._location._v)
+        copy._rotation._v = list(self._rotation._v)
+        copy._scale._v = list(self._scale._v)
+        copy._props = dict(self._props)
+        for index, slot in enumerate(self.material_slots):
+            copy_slot = copy.material_slots[index]
+            copy_slot.link = slot.link
+            if slot.link == 'OBJECT':
+                copy_slot.material = slot.material
+        return _state.data.objects._add(copy)
+
+    def _on_remove(self):
+        for collection in list(self._collections):
+            collection.objects.unlink(self)
+        if self.data is not None:
+            self.data.users -= 1
+        for material in self._materials.values():
+            if material is not None:
+                material.users -= 1
+        view_layer = _state.context.view_layer
+        if view_layer.objects.active is self:
+            view_layer.objects.active = None
+        _state.moved.pop(id(self), None)
+
+
+def _ray_hits_box(origin, direction, low, high):
+    """Slab test of a ray against an axis-aligned box"""
+    near, far = 0.0, float("inf")
+    for o, d, lo, hi in zip(origin, direction, low, high):
+        if abs(d) < 1e-12:
+            if o < lo or o > hi:
+                return False
+            continue
+        t0, t1 = (lo - o) / d, (hi - o) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        near, far = max(near, t0), min(far, t1)
+        if near > far:
+            return False
+    return True
+
+
+def _ray_triangle(origin, direction, a, b, c):
+    """Möller-Trumbore: (distance along direction, normal) or None"""
+    edge1, edge2 = b - a, c - a
+    p = Vector(direction).cross(edge2)
+    determinant = edge1.dot(p)
+    if abs(determinant) < 1e-12:
+        return None
+    inverse = 1.0 / determinant
+    t_vector = Vector(origin) - a
+    u = t_vector.dot(p) * inverse
+    if u < 0.0 or u > 1.0:
+        return None
+    q = t_vector.cross(edge1)
+    v = Vector(direction).dot(q) * inverse
+    if v < 0.0 or u + v > 1.0:
+        return None
+    distance = edge2.dot(q) * inverse
+    if distance < 0.0:
+        return None
+    normal = edge1.cross(edge2)
+    return distance, normal / (normal.length or 1.0)
+
+
+# Scene and context
+
+class CollectionObjects:
+    def __init__(self, collection):
+        self._collection = collection
+        self._objects = {}
+
+    def link(self, obj):
+        if id(obj) in self._objects:
+            raise RuntimeError(f"Object {obj.name!r} already in collection")
+        self._objects[id(obj)] = obj
+        obj._collections.append(self._collection)
+
+    def unlink(self, obj):
+        del self._objects[id(obj)]
+        obj._collections.remove(self._collection)
+
+    def __iter__(self):
+        return iter(list(self._objects.values()))
+
+    def __len__(self):
+        return len(self._objects)
+
+
+class Collection:
+    def __init__(self, name):
+        self.name = name
+        self.objects = CollectionObjects(self)
+
+
+class Render:
+    def __init__(self):
+        self.resolution_x = 1920
+        self.resolution_y = 1080
+        self.pixel_aspect_x = 1.0
+        self.pixel_aspect_y = 1.0
+
+
+class Scene:
+    def __init__(self):
+        self.name = "Scene"
+        self.collection = Collection("Scene Collection")
+        self.camera = None
+        self.render = Render()
+
+    @property
+    def objects(self):
+        return iter(self.collection.objects)
+
+    def ray_cast(self, depsgraph, origin, direction):
+        """Nearest hit of a world-space ray with the visible meshes.
+
+        Objects whose world bounding box the ray misses are skipped, which
+        stands in for Blender's BVH.
+        """
+        best = (False, Vector((0.0, 0.0, 0.0)), Vector((0.0, 0.0, 0.0)), -1, None, None)
+        best_distance = float("inf")
+        for obj in self.objects:
+            if obj.type != 'MESH' or not obj.visible_get() or not _ray_hits_box(origin, direction, *obj.world_box()):
+                continue
+            matrix = obj.matrix_world
+            inverse = matrix.inverted()
+            hit, location, normal, index = obj.ray_cast(inverse @ origin, inverse.to_3x3() @ direction)
+            if hit:
+                location = matrix @ location
+                distance = (location - origin).length
+                if distance < best_distance:
+                    best, best_distance = (True, location, normal, index, obj, matrix), distance
+        return best
+
+
+class DepsgraphUpdate:
+    def __init__(self, id):
+        self.id = id
+        self.is_updated_transform = True
+        self.is_updated_geometry = False
+
+
+class ViewLayerObjects:
+    def __init__(self):
+        self.active = None
+
+
+class ViewLayer:
+    def __init__(self):
+        self.objects = ViewLayerObjects()
+
+    def update(self):
+        """Report the objects moved since the last update to the depsgraph handlers"""
+        if not _state.moved:
+            return
+        updates = [DepsgraphUpdate(obj) for obj in _state.moved.values()]
+        _state.moved.clear()
+        depsgraph = types.SimpleNamespace(updates=updates)
+        for handler in list(_state.handlers.depsgraph_update_post):
+            handler(_state.context.scene, depsgraph)
+
+
+class Context:
+    def __init__(self):
+        self.scene = Scene()
+        self.view_layer = ViewLayer()
+        self.screen = types.SimpleNamespace(areas=[])
+        self.preferences = types.SimpleNamespace(view=types.SimpleNamespace(ui_scale=1.0))
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    def evaluated_depsgraph_get(self):
+        return types.SimpleNamespace(updates=[])
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.objects if obj._selected]
+
+
+class Data:
+    def __init__(self, filepath=""):
+        self.filepath = filepath
+        self.objects = IDCollection(Object)
+        self.meshes = IDCollection(Mesh)
+        self.materials = IDCollection(Material)
+        self.images = ImageCollection(Image)
+        self.node_groups = IDCollection(NodeGroup)
+        self.cameras = IDCollection(CameraData)
+        self.lights = IDCollection(LightData)
+        self.worlds = IDCollection(ID)
+
+
+class Timers:
+    """bpy.app.timers; nothing runs them, call the functions yourself"""
+
+    def __init__(self):
+        self.registered = {}
+
+    def register(self, function, first_interval=0.0, persistent=False):
+        self.registered[function] = first_interval
+
+    def unregister(self, function):
+        del self.registered[function]
+
+    def is_registered(self, function):
+        return function in self.registered
+
+
+class _State:
+    """Everything install() and reset() replace"""
+
+    def __init__(self):
+        self.data = Data()
+        self.context = Context()
+        self.handlers = None
+        self.moved = {}  # id -> object moved since the last view_layer.update()
+
+
+_state = _State()
+
+
+def _primitive_grid_add(size=2.0, x_subdivisions=10, y_subdivisions=10, location=(0.0, 0.0, 0.0), **kwargs):
+    half = size / 2
+    mesh = _state.data.meshes.new("Grid")
+    mesh.from_pydata([(-half, -half, 0), (half, -half, 0), (-half, half, 0), (half, half, 0)], [], [(0, 1, 3, 2)])
+    return _add_object("Grid", mesh, location)
+
+
+def _light_add(type='POINT', location=(0.0, 0.0, 0.0), **kwargs):
+    return _add_object(type.title(), _state.data.lights.new(type.title(), type), location)
+
+
+def _add_object(name, data, location):
+    obj = _state.data.objects.new(name, data)
+    obj.location = location
+    _state.context.scene.collection.objects.link(obj)
+    _state.context.view_layer.objects.active = obj
+    return {'FINISHED'}
+
+
+def reset(filepath=None):
+    """Start again from an empty file with an empty scene"""
+    _state.data = Data(filepath if filepath is not None else _state.data.filepath)
+    _state.context = Context()
+    _state.moved.clear()
+    bpy = sys.modules.get("bpy")
+    if bpy is not None:
+        bpy.data = _state.data
+        bpy.context = _state.context
+
+
+def install(filepath=""):
+    """Register the fake modules; filepath is the pretend .blend file (the listener uses its folder)"""
+    reset(filepath)
+    handlers = types.ModuleType("bpy.app.handlers")
+    for name in ("load_post", "save_pre", "save_post", "render_pre", "render_post", "render_cancel",
+                 "depsgraph_update_post"):
+        setattr(handlers, name, [])
+    handlers.persistent = lambda function: function
+    _state.handlers = handlers
+
+    app = types.ModuleType("bpy.app")
+    app.handlers = handlers
+    app.timers = Timers()
+    app.version = (0, 0, 0)
+
+    bpy_types = types.ModuleType("bpy.types")
+    bpy_types.Object = Object
+
+    bpy = types.ModuleType("bpy")
+    bpy.__doc__ = "Fake bpy from benchmarks/fake_bpy.py"
+    bpy.fake = True
+    bpy.app = app
+    bpy.types = bpy_types
+    bpy.data = _state.data
+    bpy.context = _state.context
+    bpy.ops = types.SimpleNamespace(
+        mesh=types.SimpleNamespace(primitive_grid_add=_primitive_grid_add),
+        object=types.SimpleNamespace(light_add=_light_add))
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Matrix = Matrix
+    mathutils.Euler = Euler
+
+    object_utils = types.ModuleType("bpy_extras.object_utils")
+    object_utils.world_to_camera_view = world_to_camera_view
+    bpy_extras = types.ModuleType("bpy_extras")
+    bpy_extras.object_utils = object_utils
+
+    sys.modules.update({"bpy": bpy, "bpy.app": app, "bpy.app.handlers": handlers, "bpy.types": bpy_types,
+                        "mathutils": mathutils, "bpy_extras": bpy_extras,
+                        "bpy_extras.object_utils": object_utils})
+    return bpy
@@ -0,0 +1,281 @@
+"""Frame sources for hand_tracking.py: live camera, video file, recording and replay.
+
+A recording is a directory with:
+
+* video.avi       every captured frame
+* frames.jsonl    {"seq": n, "t": capture time} per frame, in video order
+* landmarks.jsonl MediaPipe results for every frame that went through
+                  inference (see landmark_log.py)
+
+Replaying a recording stands in for the camera, either paced like the
+original capture or as fast as the pipeline can go. At maximum speed no
+frame is dropped, so the whole pipeline (and the packets sent to Blender)
+produce the same results on every run, without a camera.
+"""
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import cv2
+from mediapipe.framework.formats import landmark_pb2
+
+from landmark_log import LandmarkLogWriter, read_landmark_log
+
+VIDEO_FILE = "video.avi"
+FRAMES_FILE = "frames.jsonl"
+LANDMARKS_FILE = "landmarks.jsonl"
+# Frames that can be queued or in use downstream at once: the frame queue,
+# inference, the result queue, rendering and the frame being read
+FRAME_BUFFERS = 8
+
+
+class FrameBuffers:
+    """Pool of arrays that VideoCapture.read() decodes into, instead of a new array per frame.
+
+    A buffer belongs to its frame from read() until release() is called with
+    the frame's image, when no stage uses it anymore. A frame is never decoded
+    into a buffer still in use: without a free one read() waits up to `wait`
+    seconds (None for as long as it takes), then skips the frame.
+    """
+
+    def __init__(self, count=FRAME_BUFFERS, wait=None):
+        self._free = [None] * count  # None until the first frame is decoded into it
+        self._in_use = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.wait = wait
+        self.skipped = 0
+
+    def read(self, capture):
+        """Return (success, image); image is None if the frame was skipped for lack of a free buffer"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._free or self._closed, self.wait)
+            if self._closed:
+                return False, None
+            if not self._free:
+                self.skipped += 1
+                return capture.grab(), None
+            buffer = self._free.pop()
+        success, image = capture.read(buffer)
+        with self._cond:
+            if success:
+                self._in_use[id(image)] = image
+            else:
+                self._free.append(buffer)
+        return success, image
+
+    def release(self, image):
+        """Hand the buffer of a frame back once the last stage is done with it"""
+        with self._cond:
+            buffer = self._in_use.pop(id(image), None)
+            if buffer is not None:
+                self._free.append(buffer)
+                self._cond.notify()
+
+    def close(self):
+        """Wake a read() waiting for a buffer, as the source is being released"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class CameraSource:
+    """Live webcam"""
+
+    lossless = False
+
+    def __init__(self, index=0):
+        self.cap = cv2.VideoCapture(index)
+        # A live camera skips frames rather than wait for the pipeline
+        self.buffers = FrameBuffers(wait=0)
+
+    def is_open(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        """Return (image, capture timestamp); image is None if the read failed"""
+        success, image = self.buffers.read(self.cap)
+        while success and image is None:
+            success, image = self.buffers.read(self.cap)
+        return (image if success else None), time.time()
+
+    def release(self):
+        self.buffers.close()
+        self.cap.release()
+
+
+class ReplaySource:
+    """Plays back the frames of a recording directory in place of the camera"""
+
+    def __init__(self, directory, realtime=True, only_seqs=None):
+        self.video = cv2.VideoCapture(os.path.join(directory, VIDEO_FILE))
+        with open(os.path.join(directory, FRAMES_FILE)) as frames_file:
+            self.frames = [json.loads(line) for line in frames_file if line.strip()]
+        self.realtime = realtime
+        # At maximum speed the pipeline must not drop frames to be repeatable
+        self.lossless = not realtime
+        self.only_seqs = only_seqs
+        self.buffers = FrameBuffers()
+        self._index = 0
+        self._clock_offset = None
+
+    def is_open(self):
+        return self._index < len(self.frames) and self.video.isOpened()
+
+    def read(self):
+        """Return (image, recorded capture timestamp) of the next frame"""
+        while self._index < len(self.frames):
+            record = self.frames[self._index]
+            self._index += 1
+            if self.only_seqs is not None and record["seq"] not in self.only_seqs:
+                # Step over the frame without leasing a buffer that nobody would release
+                if not self.video.grab():
+                    self._index = len(self.frames)
+                    break
+                continue
+            success, image = self.buffers.read(self.video)
+            if not success:
+                self._index = len(self.frames)
+                break
+
+            if self.realtime:
+                # Wait until the frame is due relative to the first one
+                if self._clock_offset is None:
+                    self._clock_offset = time.perf_counter() - record["t"]
+                delay = record["t"] + self._clock_offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            return image, record["t"]
+        return None, None
+
+    def release(self):
+        self.buffers.close()
+        self.video.release()
+
+
+class VideoFileSource:
+    """Plays a video file in place of the camera, paced by its frame rate or as fast as possible"""
+
+    def __init__(self, path, realtime=True):
+        self.video = cv2.VideoCapture(path)
+        fps = self.video.get(cv2.CAP_PROP_FPS)
+        self.frame_interval = 1.0 / fps if fps > 0 else 1.0 / 30.0
+        self.realtime = realtime
+        self.lossless = not realtime
+        self.buffers = FrameBuffers()
+        self._index = 0
+        self._ended = False
+        self._clock_offset = None
+
+    def is_open(self):
+        return not self._ended and self.video.isOpened()
+
+    def read(self):
+        """Return (image, position in the video in seconds) of the next frame"""
+        success, image = self.buffers.read(self.video)
+        if not success:
+            self._ended = True
+            return None, None
+        timestamp = self._index * self.frame_interval
+        self._index += 1
+        if self.realtime:
+            if self._clock_offset is None:
+                self._clock_offset = time.perf_counter() - timestamp
+            delay = timestamp + self._clock_offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return image, timestamp
+
+    def release(self):
+        self.buffers.close()
+        self.video.release()
+
+
+class RecordedHands:
+    """Stands in for mp_hands.Hands and returns recorded results in order.
+
+    Use with a lossless ReplaySource limited to the recorded frames, so
+    every processed frame matches the next recorded result.
+    """
+
+    def __init__(self, directory):
+        self.frames = list(read_landmark_log(os.path.join(directory, LANDMARKS_FILE)))
+        self._index = 0
+
+    def recorded_seqs(self):
+        return {seq for seq, _, _, _ in self.frames}
+
+    def process(self, image):
+        """Return the next recorded result shaped like MediaPipe's output"""
+        _, _, points, handedness = self.frames[self._index]
+        self._index += 1
+        if len(points) == 0:
+            return SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+
+        multi_hand_landmarks = []
+        for hand in points:
+            landmark_list = landmark_pb2.NormalizedLandmarkList()
+            for x, y, z in hand.tolist():
+                landmark_list.landmark.add(x=x, y=y, z=z)
+            multi_hand_landmarks.append(landmark_list)
+        multi_handedness = [SimpleNamespace(classification=[SimpleNamespace(label=label)])
+                            for label in handedness]
+        return SimpleNamespace(multi_hand_landmarks=multi_hand_landmarks, multi_handedness=multi_handedness)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Recorder:
+    """Writes captured frames and inference results to a recording directory"""
+
+    def __init__(self, directory, fps=30.0, codec="MJPG"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fps = fps
+        self.codec = codec
+        self.video = None
+        self._frames_file = open(os.path.join(directory, FRAMES_FILE), "w")
+        self.landmarks = LandmarkLogWriter(os.path.join(directory, LANDMARKS_FILE))
+
+    def write_frame(self, seq, timestamp, image):
+        """Record a captured frame (called from the capture stage)"""
+        if self.video is None:
+            height, width = image.shape[:2]
+            self.video = cv2.VideoWriter(os.path.join(self.directory, VIDEO_FILE),
+                                         cv2.VideoWriter_fourcc(*self.codec), self.fps, (width, height))
+        self.video.write(image)
+        self._frames_file.write(json.dumps({"seq": seq, "t": timestamp}) + "\n")
+
+    def write_landmarks(self, seq, timestamp, points, handedness):
+        """Record the inference result of a frame (called from the inference stage)"""
+        self.landmarks.write(seq, timestamp, points, handedness)
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+        self._frames_file.close()
+        self.landmarks.close()
+
+
+def open_source(source, replay_speed="realtime", replay_landmarks=False):
+    """Open a camera index, a recording directory or a video file.
+
+    Returns (frame source, recorded hands or None).
+    """
+    if os.path.isdir(source):
+        recorded_hands = RecordedHands(source) if replay_landmarks else None
+        only_seqs = recorded_hands.recorded_seqs() if recorded_hands else None
+        frames = ReplaySource(source, realtime=replay_speed == "realtime", only_seqs=only_seqs)
+        if recorded_hands:
+            # Every frame has to reach inference to line up with its result
+            frames.lossless = True
+        return frames, recorded_hands
+    if os.path.isfile(source):
+        return VideoFileSource(source, realtime=replay_speed == "realtime"), None
+    return CameraSource(int(source)), None
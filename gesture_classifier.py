@@ -0,0 +1,161 @@
+"""Rotation-invariant gesture classifier working on all hands at once.
+
+All MediaPipe hands of a frame are packed into one (hands x 21 x 3) array.
+With more than SCALAR_HANDS hands every feature is computed with array
+operations over all hands and fingers together; up to that many, the fixed
+cost of the NumPy calls outweighs the work, so the same features are
+computed in plain Python per hand. Fingers are judged by joint angles and
+by distances normalized by palm size rather than by comparing image y
+coordinates, so the result does not change when the hand is rotated,
+mirrored or moved closer to the camera. The gesture vocabulary and priority order are the
+same as detect_gestures() in hand_tracking.py.
+"""
+import math
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# MediaPipe hand landmark indices
+WRIST = 0
+THUMB_TIP = 4
+INDEX_TIP = 8
+MIDDLE_MCP = 9
+# Index, middle, ring and pinky fingers
+FINGER_MCP = [5, 9, 13, 17]
+FINGER_PIP = [6, 10, 14, 18]
+FINGER_TIP = [8, 12, 16, 20]
+
+# Every vector the features need, gathered with a single indexing operation:
+# proximal bones, distal segments, wrist->tip, wrist->PIP, palm, thumb->index
+VECTOR_HEADS = np.array(FINGER_PIP + FINGER_TIP + FINGER_TIP + FINGER_PIP + [MIDDLE_MCP, INDEX_TIP])
+VECTOR_TAILS = np.array(FINGER_MCP + FINGER_PIP + [WRIST] * 8 + [WRIST, THUMB_TIP])
+
+# A finger is extended when its score is positive. The score mixes how
+# straight the finger is at the PIP joint with how much further the tip is
+# from the wrist than the PIP joint.
+REACH_SCALE = 0.25
+# Thumb-index distance, relative to palm size, below which it is a pinch
+PINCH_RATIO = 0.45
+
+# Bit mask of extended fingers (index=1, middle=2, ring=4, pinky=8) per gesture
+FINGER_GESTURES = {
+    0b0001: "point",
+    0b0011: "v_sign",
+    0b1111: "palm",
+    0b0000: "fist",
+}
+FINGER_BITS = np.array([1, 2, 4, 8])
+FINGER_JOINTS = list(zip(FINGER_BITS.tolist(), FINGER_MCP, FINGER_PIP, FINGER_TIP))
+POINT_MASK = 0b0001
+# Gesture code per hand: its finger mask, or PINCH_CODE. Names and whether
+# the code is a known gesture (an unknown one has no confidence), by code
+PINCH_CODE = 16
+GESTURE_NAMES = [FINGER_GESTURES.get(code, "none") for code in range(16)] + ["pinch"]
+KNOWN_CODES = np.array([code in FINGER_GESTURES for code in range(16)] + [True])
+
+# Up to this many hands are classified in plain Python instead of NumPy
+SCALAR_HANDS = 4
+
+
+def landmarks_to_array(multi_hand_landmarks):
+    """Convert MediaPipe multi_hand_landmarks into a (hands, 21, 3) float32 array"""
+    return np.array(
+        [value for hand in multi_hand_landmarks for lm in hand.landmark for value in (lm.x, lm.y, lm.z)],
+        dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+
+
+def finger_scores(points, aspect=1.0):
+    """Return (finger extension scores (hands, 4), pinch ratio (hands,)).
+
+    points are normalized MediaPipe coordinates; aspect is the image
+    width / height so x, y and z can be brought to the same scale.
+    """
+    vectors = points.take(VECTOR_HEADS, axis=1) - points.take(VECTOR_TAILS, axis=1)
+    # x and z are relative to the image width, y to its height
+    vectors *= np.array([aspect, 1.0, aspect], dtype=np.float32)
+    lengths = np.sqrt(np.einsum("hvk,hvk->hv", vectors, vectors)) + 1e-6
+
+    proximal, distal = vectors[:, 0:4], vectors[:, 4:8]
+
+    # Straightness: cosine of the bend angle at the PIP joint
+    straightness = np.einsum("hfk,hfk->hf", proximal, distal) / (lengths[:, 0:4] * lengths[:, 4:8])
+
+    # Reach: tip further from the wrist than the PIP joint means extended
+    reach = lengths[:, 8:12] / lengths[:, 12:16]
+    reach_score = np.minimum(np.maximum((reach - 1.0) / REACH_SCALE, -1.0), 1.0)
+
+    scores = 0.5 * (straightness + reach_score)
+    pinch_ratio = lengths[:, 17] / lengths[:, 16]
+    return scores, pinch_ratio
+
+
+def classify_hand(hand, aspect=1.0):
+    """Plain Python classify() of one hand given as 21 [x, y, z] lists; returns (gesture code, confidence)"""
+    hypot = math.hypot
+    wx, wy, wz = hand[WRIST]
+    code = 0
+    margin = 1.0
+    for bit, mcp, pip, tip in FINGER_JOINTS:
+        (mx, my, mz), (px, py, pz), (tx, ty, tz) = hand[mcp], hand[pip], hand[tip]
+        # Same vectors as finger_scores: proximal bone, distal segment, wrist->tip, wrist->PIP
+        ax, ay, az = (px - mx) * aspect, py - my, (pz - mz) * aspect
+        bx, by, bz = (tx - px) * aspect, ty - py, (tz - pz) * aspect
+        straightness = (ax * bx + ay * by + az * bz) / ((hypot(ax, ay, az) + 1e-6) * (hypot(bx, by, bz) + 1e-6))
+        reach = ((hypot((tx - wx) * aspect, ty - wy, (tz - wz) * aspect) + 1e-6)
+                 / (hypot((px - wx) * aspect, py - wy, (pz - wz) * aspect) + 1e-6))
+        score = 0.5 * (straightness + min(max((reach - 1.0) / REACH_SCALE, -1.0), 1.0))
+        if score > 0:
+            code |= bit
+        margin = min(margin, abs(score))
+
+    (mx, my, mz), (ix, iy, iz), (tx, ty, tz) = hand[MIDDLE_MCP], hand[INDEX_TIP], hand[THUMB_TIP]
+    pinch_ratio = ((hypot((ix - tx) * aspect, iy - ty, (iz - tz) * aspect) + 1e-6)
+                   / (hypot((mx - wx) * aspect, my - wy, (mz - wz) * aspect) + 1e-6))
+    if pinch_ratio < PINCH_RATIO and code != POINT_MASK:
+        return PINCH_CODE, 1.0 - pinch_ratio / PINCH_RATIO
+    if code not in FINGER_GESTURES:
+        return code, 0.0
+    return code, margin
+
+
+def classify(points, aspect=1.0):
+    """Classify every hand in a (hands, 21, 3) array.
+
+    Returns a list of (gesture, x, y) tuples, where x, y is the index finger
+    tip, and a list with a confidence in [0, 1] for each gesture.
+    """
+    if len(points) == 0:
+        return [], []
+    if len(points) <= SCALAR_HANDS:
+        hands = []
+        confidences = []
+        for hand in points.tolist():
+            code, confidence = classify_hand(hand, aspect)
+            hands.append((GESTURE_NAMES[code], hand[INDEX_TIP][0], hand[INDEX_TIP][1]))
+            confidences.append(confidence)
+        return hands, confidences
+
+    scores, pinch_ratio = finger_scores(points, aspect)
+    codes = (scores > 0).dot(FINGER_BITS)
+    margins = np.abs(scores).min(axis=1)
+    # Same priority as the original classifier: point, pinch, v_sign, palm, fist
+    pinch = (pinch_ratio < PINCH_RATIO) & (codes != POINT_MASK)
+    codes[pinch] = PINCH_CODE
+    margins[pinch] = 1.0 - pinch_ratio[pinch] / PINCH_RATIO
+    margins *= KNOWN_CODES[codes]
+    np.maximum(margins, 0.0, out=margins)
+
+    tips = points[:, INDEX_TIP, :2].tolist()
+    hands = [(GESTURE_NAMES[code], x, y) for code, (x, y) in zip(codes.tolist(), tips)]
+    return hands, margins.tolist()
+
+
+def detect_gestures_batch(multi_hand_landmarks, aspect=1.0):
+    """Classify all MediaPipe hands of a frame, returning (gesture, x, y) per hand"""
+    return classify(landmarks_to_array(multi_hand_landmarks), aspect)[0]
+
+
+def detect_gestures(hand_landmarks, aspect=1.0):
+    """Drop-in replacement for hand_tracking.detect_gestures for a single hand"""
+    return detect_gestures_batch([hand_landmarks], aspect)[0]
@@ -0,0 +1,167 @@
+"""Wire format for gesture packets sent from hand_tracking.py to Blender.
+
+Two formats are understood:
+
+* text (legacy): ``gesture,x,y[,gesture,x,y]`` encoded as UTF-8
+* binary: a fixed-layout little-endian packet
+
+Binary layout (version 1)::
+
+    header   20 bytes  magic "RH", version u8, flags u8, source u16,
+                       hand count u8, reserved u8, sequence u32,
+                       capture timestamp f64 (seconds, time.time())
+    trace    24 bytes  only if FLAG_TRACE: capture, inference done and send
+                       times f64 (time.time()), see latency_trace.py
+    per hand 12 bytes  gesture code u8, hand flags u8, phase u8,
+                       reserved u8, x f32, y f32 (normalized image coordinates)
+             +252 bytes 21 x (x, y, z) f32 landmarks if HAND_HAS_LANDMARKS
+
+This module only depends on the standard library so Blender can import it.
+"""
+import struct
+from collections import namedtuple
+
+MAGIC = b"RH"
+VERSION = 1
+
+# Gesture vocabulary, the index is the code used on the wire
+GESTURES = ("none", "point", "pinch", "v_sign", "palm", "fist")
+GESTURE_CODES = {name: code for code, name in enumerate(GESTURES)}
+
+# Gesture lifecycle, "frame" means an undebounced per-frame classification
+PHASES = ("frame", "start", "hold", "end")
+PHASE_CODES = {name: code for code, name in enumerate(PHASES)}
+
+# Packet flags
+FLAG_TRACE = 0x01
+
+# Per-hand flags
+HAND_HAS_LANDMARKS = 0x01
+HAND_LEFT = 0x02
+HAND_RIGHT = 0x04
+
+NUM_LANDMARKS = 21
+
+HEADER = struct.Struct("<2sBBHBxId")
+TRACE = struct.Struct("<ddd")
+HAND = struct.Struct("<BBBxff")
+LANDMARKS = struct.Struct(f"<{NUM_LANDMARKS * 3}f")
+
+Hand = namedtuple("Hand", ["gesture", "x", "y", "handedness", "landmarks", "phase"],
+                  defaults=(None, None, "frame"))
+Hand.__doc__ = """One tracked hand.
+
+handedness is "Left", "Right" or None, landmarks is None or a flat
+sequence of 63 floats (x, y, z for each of the 21 MediaPipe landmarks),
+phase is one of PHASES.
+"""
+
+Packet = namedtuple("Packet", ["hands", "seq", "timestamp", "source", "binary", "trace"],
+                    defaults=(None,))
+Packet.__doc__ = """A decoded packet; seq and timestamp are None for text packets.
+
+trace is None or a (captured, inferred, sent) tuple of time.time() stamps.
+"""
+
+
+def encode_text(hands):
+    """Encode hands in the legacy ``gesture,x,y[,gesture,x,y]`` format.
+
+    The text format has no phase, so a hand whose gesture just ended is
+    sent as "none".
+    """
+    return ",".join(
+        f"{'none' if len(hand) > 5 and hand[5] == 'end' else hand[0]},{hand[1]},{hand[2]}"
+        for hand in hands).encode()
+
+
+def encode_binary(hands, seq=0, timestamp=0.0, source=0, trace=None):
+    """Encode hands (Hand tuples or (gesture, x, y) tuples) as a binary packet.
+
+    trace is an optional (captured, inferred, sent) tuple of time.time() stamps.
+    """
+    flags = FLAG_TRACE if trace is not None else 0
+    parts = [HEADER.pack(MAGIC, VERSION, flags, source, len(hands), seq & 0xFFFFFFFF, timestamp)]
+    if trace is not None:
+        parts.append(TRACE.pack(*trace))
+    for hand in hands:
+        hand = Hand(*hand)
+        flags = 0
+        if hand.handedness == "Left":
+            flags |= HAND_LEFT
+        elif hand.handedness == "Right":
+            flags |= HAND_RIGHT
+
+        landmarks = None
+        if hand.landmarks is not None:
+            flags |= HAND_HAS_LANDMARKS
+            if hasattr(hand.landmarks, "astype"):
+                # NumPy array, any shape with 63 elements
+                landmarks = hand.landmarks.astype("<f4").tobytes()
+            else:
+                landmarks = LANDMARKS.pack(*hand.landmarks)
+
+        parts.append(HAND.pack(GESTURE_CODES[hand.gesture], flags, PHASE_CODES[hand.phase], hand.x, hand.y))
+        if landmarks is not None:
+            if len(landmarks) != LANDMARKS.size:
+                raise ValueError(f"Expected {NUM_LANDMARKS * 3} landmark values")
+            parts.append(landmarks)
+    return b"".join(parts)
+
+
+def decode_text(data):
+    """Decode a legacy text packet"""
+    parts = data.decode("utf-8").split(",")
+    if len(parts) < 3:
+        raise ValueError(f"Incomplete packet: {data!r}")
+
+    hands = []
+    for i in range(0, len(parts) - 2, 3):
+        hands.append(Hand(parts[i], float(parts[i + 1]), float(parts[i + 2])))
+    return Packet(hands, None, None, 0, False)
+
+
+def decode_binary(data):
+    """Decode a binary packet"""
+    if len(data) < HEADER.size:
+        raise ValueError(f"Packet too short: {len(data)} bytes")
+    magic, version, flags, source, hand_count, seq, timestamp = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a binary gesture packet")
+    if version != VERSION:
+        raise ValueError(f"Unsupported packet version {version}")
+
+    trace = None
+    offset = HEADER.size
+    if flags & FLAG_TRACE:
+        trace = TRACE.unpack_from(data, offset)
+        offset += TRACE.size
+
+    hands = []
+    for _ in range(hand_count):
+        code, hand_flags, phase, x, y = HAND.unpack_from(data, offset)
+        offset += HAND.size
+
+        landmarks = None
+        if hand_flags & HAND_HAS_LANDMARKS:
+            landmarks = LANDMARKS.unpack_from(data, offset)
+            offset += LANDMARKS.size
+
+        if hand_flags & HAND_LEFT:
+            handedness = "Left"
+        elif hand_flags & HAND_RIGHT:
+            handedness = "Right"
+        else:
+            handedness = None
+
+        gesture = GESTURES[code] if code < len(GESTURES) else "none"
+        phase = PHASES[phase] if phase < len(PHASES) else "frame"
+        hands.append(Hand(gesture, x, y, handedness, landmarks, phase))
+    return Packet(hands, seq, timestamp, source, True, trace)
+
+
+def decode_packet(data):
+    """Decode a packet in either format"""
+    if data[:2] == MAGIC:
+        return decode_binary(data)
+    return decode_text(data)
@@ -0,0 +1,109 @@
+"""Temporal gesture state with hysteresis and debouncing.
+
+Raw classifications flicker from frame to frame. A GestureTracker turns
+them into a stable gesture per hand: a gesture only starts after it was
+seen for enter_frames consecutive frames with at least enter_confidence,
+and only ends after exit_frames frames without it (or below
+exit_confidence). Each update reports the lifecycle as a start, hold or
+end event so consumers can do expensive work once per gesture edge.
+"""
+from collections import namedtuple
+
+PHASE_START = "start"
+PHASE_HOLD = "hold"
+PHASE_END = "end"
+
+GestureEvent = namedtuple("GestureEvent", ["phase", "gesture"])
+
+
+class GestureTracker:
+    """Debounced gesture state for a single hand"""
+
+    def __init__(self, enter_frames=3, exit_frames=4, enter_confidence=0.3, exit_confidence=0.1):
+        self.enter_frames = enter_frames
+        self.exit_frames = exit_frames
+        self.enter_confidence = enter_confidence
+        self.exit_confidence = exit_confidence
+        self.gesture = "none"  # Current stable gesture
+        self._candidate = "none"
+        self._candidate_frames = 0
+        self._missed_frames = 0
+
+    def update(self, gesture, confidence=1.0):
+        """Feed one frame's raw classification.
+
+        Returns a GestureEvent for the stable gesture, or None while no
+        gesture is active.
+        """
+        # Count how long a different gesture has been seen, so it can take
+        # over as soon as the current one has ended
+        if gesture == "none" or gesture == self.gesture or confidence < self.enter_confidence:
+            self._candidate = "none"
+            self._candidate_frames = 0
+        elif gesture == self._candidate:
+            self._candidate_frames += 1
+        else:
+            self._candidate = gesture
+            self._candidate_frames = 1
+
+        if self.gesture != "none":
+            if gesture == self.gesture and confidence >= self.exit_confidence:
+                self._missed_frames = 0
+                return GestureEvent(PHASE_HOLD, self.gesture)
+
+            self._missed_frames += 1
+            if self._missed_frames < self.exit_frames:
+                # Ride out short dropouts
+                return GestureEvent(PHASE_HOLD, self.gesture)
+
+            ended = self.gesture
+            self.gesture = "none"
+            self._missed_frames = 0
+            return GestureEvent(PHASE_END, ended)
+
+        if self._candidate_frames >= self.enter_frames:
+            self.gesture = self._candidate
+            self._candidate = "none"
+            self._candidate_frames = 0
+            return GestureEvent(PHASE_START, self.gesture)
+        return None
+
+
+class HandGestureTrackers:
+    """One GestureTracker per hand, keyed by handedness (or detection order)"""
+
+    def __init__(self, **tracker_options):
+        self.tracker_options = tracker_options
+        self.trackers = {}
+        self.last_seen = {}
+
+    def update(self, hands, confidences):
+        """Update every tracker with this frame's hands.
+
+        hands are (gesture, x, y, handedness, ...) tuples. Returns a list of
+        (hand, event) pairs for hands with an active or ending gesture, in
+        detection order followed by hands that just disappeared.
+        """
+        events = []
+        seen = set()
+        for i, (hand, confidence) in enumerate(zip(hands, confidences)):
+            if hand is None:
+                continue
+            # MediaPipe occasionally labels both hands the same
+            key = hand[3] if len(hand) > 3 and hand[3] and hand[3] not in seen else i
+            seen.add(key)
+            tracker = self.trackers.get(key)
+            if tracker is None:
+                tracker = self.trackers[key] = GestureTracker(**self.tracker_options)
+            self.last_seen[key] = hand
+            event = tracker.update(hand[0], confidence)
+            if event is not None:
+                events.append((hand, event))
+
+        # Hands that were not detected this frame count as showing no gesture
+        for key, tracker in self.trackers.items():
+            if key not in seen:
+                event = tracker.update("none", 0.0)
+                if event is not None:
+                    events.append((self.last_seen[key], event))
+        return events
@@ -1,22 +1,51 @@
+import argparse
 import cv2
+import logging
 import mediapipe as mp
 import numpy as np
+import signal
 import socket
+import threading
 import time
+from collections import namedtuple
+
+from capture_sources import Recorder, open_source
+from gesture_classifier import classify, landmarks_to_array
+from gesture_protocol import Hand, encode_binary, encode_text
+from gesture_tracker import HandGestureTrackers
+from inference_roi import (OutputBuffers, ResolutionController, RoiTracker, mirror_handedness, prepare_input,
+                           remap_landmarks)
+from landmark_filter import LandmarkFilterBank
+from latency_trace import LatencyTracer
+from log_setup import EventCounter, get_logger, setup_logging, shutdown_logging
+from overlay import HelpOverlay
+from pipeline import DropOldestQueue, StageStats, ThroughputReporter, start_stage
+from shm_transport import ShmRingLink, ring_name
+
+log = get_logger("tracker")
 
 # Initialize MediaPipe Hands
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 mp_drawing_styles = mp.solutions.drawing_styles
+HANDS_OPTIONS = dict(model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.4, max_num_hands=2)
 
-# Initialize UDP socket for communication with Blender
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# UDP address of the Blender listener; the socket is opened by create_sender(),
+# so worker processes importing this module don't open one each
 blender_address = ('localhost', 5006)  # Make sure this matches Blender's PORT
 
-# Initialize webcam
-cap = cv2.VideoCapture(0)
-width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+# Items passed between the pipeline stages
+# timestamp is the source's capture time (recorded time when replaying),
+# captured_at the wall-clock time the frame was read, for latency tracing
+CapturedFrame = namedtuple("CapturedFrame", ["seq", "timestamp", "image", "captured_at"], defaults=(None,))
+# image is the MediaPipe input (a reused buffer, overwritten by the next frame), region the
+# part of the mirrored frame it covers (None for all of it)
+InferenceResult = namedtuple("InferenceResult", ["frame", "image", "results", "hands", "region"], defaults=(None,))
+# Put in the frame queue when the source has no more frames
+END_OF_STREAM = object()
+
+# Help panel, rendered once per resolution and reused every frame
+help_overlay = HelpOverlay()
 
 # Previous hand position for calculating movement
 prev_index_tip = None
@@ -84,121 +113,466 @@ def detect_gestures(hand_landmarks):
     else:
         return "none", x, y
 
-def main():
+class GestureSender:
+    """Encode hand gestures and send them to Blender over UDP, or a shared-memory ring when one is given"""
+
+    def __init__(self, sock, address, protocol="binary", send_landmarks=False, tracer=None, stats_interval=5.0,
+                 client_id=0, ring=None):
+        self.sock = sock
+        self.address = address
+        self.protocol = protocol
+        self.send_landmarks = send_landmarks
+        # Identifies this tracker to Blender when several share a scene (0: use the address)
+        self.client_id = client_id
+        # With a tracer, binary packets carry capture/inference/send stamps for Blender
+        self.tracer = tracer
+        # ShmRingLink for binary packets; UDP is used while the ring is not there
+        self.ring = ring if protocol == "binary" else None
+        # One line per interval with the gestures sent, instead of one per packet
+        self.sent = EventCounter(log, "packets sent", interval=stats_interval)
+
+    def _deliver(self, message):
+        if self.ring is None or not self.ring.write(message):
+            self.sock.sendto(message, self.address)
+
+    def send(self, hands, frame, inferred_at=None, source=None):
+        """Send gesture data for up to two hands to Blender; source overrides the client ID"""
+        source = self.client_id if source is None else source
+        try:
+            if self.protocol == "text":
+                message = encode_text(hands)
+                self._deliver(message)
+            elif self.tracer is not None and frame.captured_at is not None:
+                sent_at = time.time()
+                message = encode_binary(hands, seq=frame.seq, timestamp=frame.timestamp, source=source,
+                                        trace=(frame.captured_at, inferred_at or sent_at, sent_at))
+                self._deliver(message)
+                self.tracer.record_stamps({"capture": frame.captured_at, "inference": inferred_at,
+                                           "send": time.time()})
+            else:
+                message = encode_binary(hands, seq=frame.seq, timestamp=frame.timestamp, source=source)
+                self._deliver(message)
+            self.sent.add("+".join(hand[0] for hand in hands))
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Sent to Blender: %s", encode_text(hands).decode())
+        except Exception as e:
+            log.error("Error sending data to Blender: %s", e)
+
+def capture_loop(source, frames, stats, stop_event, recorder=None):
+    """Capture stage: read frames from the source and keep only the newest ones"""
+    seq = 0
     try:
-        with mp_hands.Hands(
-            model_complexity=0,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.4,
-            max_num_hands=2) as hands:
-            
+        while not stop_event.is_set() and source.is_open():
+            started = time.perf_counter()
+            image, timestamp = source.read()
+            captured_at = time.time()
+            if image is None:
+                if source.is_open():
+                    log.warning("Ignoring empty camera frame.")
+                continue
+
+            frame = CapturedFrame(seq, timestamp, image, captured_at)
+            if recorder is not None:
+                recorder.write_frame(seq, timestamp, image)
+
+            # A lossless queue (replay at full speed) waits for inference instead of dropping
+            while not frames.put(frame, timeout=0.1):
+                if stop_event.is_set():
+                    return
+            seq += 1
+            stats.record(started)
+
+        # Let inference finish what is queued, then shut everything down
+        if not stop_event.is_set():
+            frames.put(END_OF_STREAM, timeout=2.0)
+    except Exception as e:
+        log.error("Error in capture stage: %s", e)
+        # Without frames the other stages have nothing to do
+        stop_event.set()
+
+def classify_hands(results, aspect, classifier="vectorized", send_landmarks=False,
+                   filter_bank=None, timestamp=0.0):
+    """Classify up to two detected hands and package them for the wire protocol.
+
+    With the vectorized classifier the landmarks are smoothed by
+    filter_bank (if given) first. Returns the hands and a classification
+    confidence for each of them.
+    """
+    multi_hand_landmarks = results.multi_hand_landmarks[:2]
+    handedness = [None] * len(multi_hand_landmarks)
+    if results.multi_handedness:
+        for i, hand_info in enumerate(results.multi_handedness[:len(multi_hand_landmarks)]):
+            handedness[i] = hand_info.classification[0].label
+
+    if classifier == "legacy":
+        hands_data = []
+        for i, hand_landmarks in enumerate(multi_hand_landmarks):
+            try:
+                # Process hand landmarks for gestures
+                gesture, x, y = detect_gestures(hand_landmarks)
+                landmarks = None
+                if send_landmarks:
+                    landmarks = [value for lm in hand_landmarks.landmark for value in (lm.x, lm.y, lm.z)]
+                hands_data.append(Hand(gesture, x, y, handedness[i], landmarks))
+            except Exception as e:
+                log.error("Error processing hand %d: %s", i + 1, e)
+                hands_data.append(None)
+        # The original classifier has no notion of confidence
+        return hands_data, [1.0] * len(hands_data)
+
+    # All hands in one array, smoothed and classified together
+    points = landmarks_to_array(multi_hand_landmarks)
+    if filter_bank is not None:
+        filter_bank.apply(points, handedness, timestamp)
+    gestures, confidences = classify(points, aspect)
+    hands_data = [Hand(gesture, x, y, handedness[i], points[i] if send_landmarks else None)
+                  for i, (gesture, x, y) in enumerate(gestures)]
+    return hands_data, confidences
+
+class InferenceStage:
+    """Turns a captured frame into gestures: MediaPipe, classification, debouncing, sending"""
+
+    def __init__(self, hands, sender, trackers, classifier="vectorized", filter_bank=None, recorder=None,
+                 roi=None, resolution=None, max_side=0, mirror=True):
+        self.hands = hands
+        self.sender = sender
+        self.trackers = trackers
+        self.classifier = classifier
+        self.filter_bank = filter_bank
+        self.recorder = recorder
+        # Optional RoiTracker and ResolutionController, max_side caps the MediaPipe input size
+        self.roi = roi
+        self.resolution = resolution
+        self.max_side = max_side
+        # MediaPipe sees the camera's orientation and the results are mirrored into the
+        # selfie view; recorded results are already mirrored
+        self.mirror = mirror
+        self.buffers = OutputBuffers()
+
+    def process(self, frame):
+        """Process one frame, send its gestures and return the InferenceResult"""
+        height, width = frame.image.shape[:2]
+        region = self.roi.next_region() if self.roi is not None else None
+        scale = self.resolution.scale if self.resolution is not None else 1.0
+
+        # Crop to the hands, downscale and convert to RGB into a reused buffer
+        image = prepare_input(frame.image, region, scale, self.max_side, self.buffers)
+
+        # A read-only image is passed to MediaPipe by reference instead of copied
+        image.flags.writeable = False
+        started = time.perf_counter()
+        try:
+            results = self.hands.process(image)
+        finally:
+            image.flags.writeable = True
+        if self.resolution is not None:
+            self.resolution.update(time.perf_counter() - started)
+
+        # Everything downstream works in mirrored full-frame coordinates
+        if self.mirror:
+            mirror_handedness(results.multi_handedness)
+        remap_landmarks(results.multi_hand_landmarks, region, width, height, self.mirror)
+        if self.roi is not None:
+            self.roi.update(results.multi_hand_landmarks, width, height, full_frame=region is None)
+
+        if self.recorder is not None:
+            self.record(frame, results)
+
+        # Variables to store hand data
+        hands_data, confidences = [], []
+        if results.multi_hand_landmarks:
+            aspect = width / height
+            hands_data, confidences = classify_hands(results, aspect, self.classifier,
+                                                     self.sender.send_landmarks,
+                                                     self.filter_bank, frame.timestamp)
+
+        # Debounce per hand; also runs without hands so held gestures can end
+        events = self.trackers.update(hands_data, confidences)
+        packet_hands = [hand._replace(gesture=event.gesture, phase=event.phase)
+                        for hand, event in events[:2]]
+
+        # Send before any drawing so the packet doesn't wait on the preview
+        if packet_hands:
+            self.sender.send(packet_hands, frame, inferred_at=time.time())
+
+        return InferenceResult(frame, image, results, hands_data, region)
+
+    def record(self, frame, results):
+        """Save the raw (unfiltered) MediaPipe result of a frame"""
+        points = np.zeros((0, 21, 3), dtype=np.float32)
+        handedness = []
+        if results.multi_hand_landmarks:
+            points = landmarks_to_array(results.multi_hand_landmarks)
+            handedness = [hand_info.classification[0].label for hand_info in results.multi_handedness or []]
+        self.recorder.write_landmarks(frame.seq, frame.timestamp, points, handedness)
+
+def create_inference_stage(args, hands, sender, recorder=None, recorded=False):
+    """InferenceStage set up from the command line options; recorded when replaying MediaPipe results"""
+    trackers = HandGestureTrackers(enter_frames=args.enter_frames, exit_frames=args.exit_frames,
+                                   enter_confidence=args.enter_confidence,
+                                   exit_confidence=args.exit_confidence)
+    filter_bank = None
+    if args.filter == "one_euro":
+        filter_bank = LandmarkFilterBank(min_cutoff=args.min_cutoff, beta=args.beta)
+    roi = RoiTracker(margin=args.roi_margin) if args.roi and not recorded else None
+    resolution = ResolutionController(args.target_fps, args.min_scale) if args.target_fps > 0 else None
+    return InferenceStage(hands, sender, trackers, args.classifier, filter_bank, recorder,
+                          roi=roi, resolution=resolution, max_side=args.inference_size, mirror=not recorded)
+
+def inference_loop(stage, frames, results_queue, stats, stop_event, release=None):
+    """Inference stage: run MediaPipe on the newest frame and send gestures right away.
+
+    release is called with the frame's image if no render stage takes the
+    frame over, so its buffer can be reused.
+    """
+    while not stop_event.is_set():
+        frame = frames.get(timeout=0.1, latest=True)
+        if frame is None:
+            continue
+        if frame is END_OF_STREAM:
+            stop_event.set()
+            break
+
+        started = time.perf_counter()
+        rendered = False
+        try:
+            result = stage.process(frame)
+            stats.record(started)
+            if results_queue is not None:
+                results_queue.put(result)
+                rendered = True
+        except Exception as e:
+            log.error("Error in inference stage: %s", e)
+        if not rendered and release is not None:
+            release(frame.image)
+
+def render_frame(result, show_help, out=None):
+    """Render stage: draw the annotations for an inference result.
+
+    The preview is drawn into out when it has the frame's shape, so the
+    render loop can reuse the previous preview array.
+    """
+    if out is not None and out.shape != result.frame.image.shape:
+        out = None
+    # Mirror for a selfie view, the only full-frame copy left per frame
+    image = cv2.flip(result.frame.image, 1, dst=out)
+    if result.region is not None:
+        x0, y0, x1, y1 = result.region
+        cv2.rectangle(image, (x0, y0), (x1 - 1, y1 - 1), (255, 200, 0), 1)
+
+    # Blend the cached help panel over the top band of the frame
+    if show_help:
+        help_overlay.draw(image)
+
+    if result.results.multi_hand_landmarks:
+        for i, hand_landmarks in enumerate(result.results.multi_hand_landmarks[:2]):
+            mp_drawing.draw_landmarks(
+                image,
+                hand_landmarks,
+                mp_hands.HAND_CONNECTIONS,
+                mp_drawing_styles.get_default_hand_landmarks_style(),
+                mp_drawing_styles.get_default_hand_connections_style())
+
+            # Draw hand number and gesture type
+            if i < len(result.hands) and result.hands[i]:
+                hand_label = f"Hand {i+1}: {result.hands[i].gesture}"
+                cv2.putText(image, hand_label, (10, 220+(30*i)),
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    return image
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Hand gesture tracking for the Blender Y2K art project")
+    parser.add_argument("--source", default="0",
+                        help="camera index, video file, or a recording directory to replay instead of the camera")
+    parser.add_argument("--replay-speed", choices=["realtime", "max"], default="realtime",
+                        help="replay paced like the recording, or as fast as possible without dropping frames")
+    parser.add_argument("--replay-landmarks", action="store_true",
+                        help="use the recorded MediaPipe results instead of running inference on replay")
+    parser.add_argument("--record", metavar="DIR",
+                        help="record frames, timestamps and landmark results to this directory")
+    parser.add_argument("--headless", action="store_true",
+                        help="no preview window or overlay drawing, only send gestures to Blender")
+    parser.add_argument("--duration", type=float, default=0,
+                        help="stop after this many seconds (0 = run until stopped)")
+    parser.add_argument("--protocol", choices=["binary", "text"], default="binary",
+                        help="wire format for gesture packets (text for older Blender listeners)")
+    parser.add_argument("--client-id", type=int, default=0,
+                        help="ID (1-65535) of this tracker when several drive one Blender scene; "
+                             "0 identifies it by its address")
+    parser.add_argument("--transport", choices=["udp", "shm"], default="udp",
+                        help="shm writes binary packets to Blender's shared-memory ring (same machine only), "
+                             "falling back to UDP while the ring does not exist")
+    parser.add_argument("--shm-name",
+                        help="name of the shared-memory ring, one per tracker (default rtht_gestures, "
+                             "or rtht_gestures_<id> with --client-id)")
+    parser.add_argument("--send-landmarks", action="store_true",
+                        help="include all 21 landmarks per hand in binary packets")
+    parser.add_argument("--classifier", choices=["vectorized", "legacy"], default="vectorized",
+                        help="gesture classifier: rotation-invariant (default) or the original y-comparison one")
+    parser.add_argument("--filter", choices=["one_euro", "none"], default="one_euro",
+                        help="landmark smoothing before classification (vectorized classifier only)")
+    parser.add_argument("--min-cutoff", type=float, default=1.0,
+                        help="One Euro cutoff at rest in Hz, lower is smoother")
+    parser.add_argument("--beta", type=float, default=20.0,
+                        help="One Euro speed coefficient, higher means less lag on fast moves")
+    parser.add_argument("--enter-frames", type=int, default=3,
+                        help="frames a gesture must be seen before it starts")
+    parser.add_argument("--exit-frames", type=int, default=4,
+                        help="frames a gesture must be missing before it ends")
+    parser.add_argument("--enter-confidence", type=float, default=0.3,
+                        help="minimum classifier confidence for a gesture to start")
+    parser.add_argument("--exit-confidence", type=float, default=0.1,
+                        help="confidence below which a held gesture counts as missing")
+    parser.add_argument("--roi", action="store_true",
+                        help="run inference on a crop around the hands of the previous frame")
+    parser.add_argument("--roi-margin", type=float, default=0.3,
+                        help="padding around the hands in ROI mode, relative to their size")
+    parser.add_argument("--inference-size", type=int, default=0,
+                        help="longest side of the MediaPipe input in pixels (0 keeps the camera resolution)")
+    parser.add_argument("--target-fps", type=float, default=0,
+                        help="lower the inference resolution while inference is slower than this (0 disables)")
+    parser.add_argument("--min-scale", type=float, default=0.4,
+                        help="smallest input scale --target-fps may go down to")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="seconds between pipeline throughput reports")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error"], default="info",
+                        help="console log level; debug logs every packet sent")
+    parser.add_argument("--trace", action="store_true",
+                        help="stamp binary packets for end-to-end latency tracing in Blender")
+    parser.add_argument("--trace-file", metavar="PATH",
+                        help="write the tracker-side latency histograms to this JSON file (implies --trace)")
+    return parser.parse_args(argv)
+
+def create_sender(args, tracer=None):
+    """GestureSender set up from the command line options"""
+    ring = None
+    if args.transport == "shm":
+        if args.protocol != "binary":
+            log.warning("The shared-memory transport carries binary packets only, using UDP")
+        else:
+            name = args.shm_name or ring_name(args.client_id)
+            ring = ShmRingLink(name, on_change=lambda attached: log.info(
+                "Shared-memory ring %s %s", name, "attached" if attached else "gone, using UDP"),
+                on_busy=lambda pid: log.warning(
+                    "Shared-memory ring %s is used by process %d, using UDP (start each tracker with "
+                    "its own --client-id or --shm-name)", name, pid))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    return GestureSender(sock, blender_address, protocol=args.protocol,
+                         send_landmarks=args.send_landmarks and args.protocol == "binary",
+                         tracer=tracer if args.protocol == "binary" else None,
+                         stats_interval=args.stats_interval, client_id=args.client_id, ring=ring)
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log_level)
+
+    # Initialize webcam (or the recording standing in for it)
+    source, recorded_hands = open_source(args.source, args.replay_speed, args.replay_landmarks)
+    recorder = Recorder(args.record) if args.record else None
+
+    # Stages are connected by small drop-oldest queues so a slow stage
+    # never holds back the ones before it
+    stop_event = threading.Event()
+    # Frame buffers go back to the source once a frame is rendered, or dropped
+    release_frame = source.buffers.release
+    frames = DropOldestQueue(maxsize=2, lossless=source.lossless, on_drop=lambda frame: release_frame(frame.image))
+    # Headless mode has no render stage, so inference results go nowhere
+    results_queue = None if args.headless else DropOldestQueue(
+        maxsize=2, on_drop=lambda result: release_frame(result.frame.image))
+    capture_stats = StageStats("capture")
+    inference_stats = StageStats("inference")
+    render_stats = StageStats("render")
+    stages = [capture_stats, inference_stats]
+    queues = {"frames": frames}
+    if not args.headless:
+        stages.append(render_stats)
+        queues["results"] = results_queue
+    reporter = ThroughputReporter(stages, queues=queues, interval=args.stats_interval)
+    tracer = LatencyTracer(("inference", "send", "total")) if args.trace or args.trace_file else None
+    sender = create_sender(args, tracer)
+    threads = []
+
+    # Shut down cleanly on Ctrl+C or a service manager's SIGTERM
+    def request_stop(signum, frame):
+        stop_event.set()
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    deadline = time.perf_counter() + args.duration if args.duration > 0 else None
+
+    try:
+        with recorded_hands or mp_hands.Hands(**HANDS_OPTIONS) as hands:
+            stage = create_inference_stage(args, hands, sender, recorder, recorded=recorded_hands is not None)
+            threads.append(start_stage("capture", capture_loop, source, frames, capture_stats,
+                                       stop_event, recorder))
+            threads.append(start_stage("inference", inference_loop, stage, frames, results_queue,
+                                       inference_stats, stop_event, release_frame))
+
             # Add a help overlay flag
             show_help = True
-            
-            while cap.isOpened():
-                success, image = cap.read()
-                if not success:
-                    print("Ignoring empty camera frame.")
-                    continue
-                    
-                # Flip the image horizontally for a selfie-view display
-                image = cv2.flip(image, 1)
-                
-                # To improve performance, optionally mark the image as not writeable
-                image.flags.writeable = False
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                results = hands.process(image)
-                
-                # Draw the hand annotations on the image
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-                
-                # Create a help overlay
-                if show_help:
-                    # Draw semi-transparent overlay
-                    help_overlay = image.copy()
-                    cv2.rectangle(help_overlay, (0, 0), (width, 180), (0, 0, 0), -1)
-                    image = cv2.addWeighted(help_overlay, 0.7, image, 0.3, 0)
-                    
-                    # Add gesture guide
-                    cv2.putText(image, "GESTURE GUIDE:", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                    cv2.putText(image, "Point (1 finger): Select object", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
-                    cv2.putText(image, "Pinch (thumb+index): Move object", (20, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
-                    cv2.putText(image, "TWO V Signs: Duplicate object", (20, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
-                    cv2.putText(image, "TWO Palms: Create new object", (20, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
-                    cv2.putText(image, "TWO Fists: Delete selected object", (20, 180), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
-                    cv2.putText(image, "Press 'H' to hide help | ESC to exit", (width-300, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
-                
-                # Variables to store hand data
-                hand1_data = None
-                hand2_data = None
-                
-                if results.multi_hand_landmarks:
-                    # Process all detected hands (up to 2)
-                    for i, hand_landmarks in enumerate(results.multi_hand_landmarks[:2]):
-                        mp_drawing.draw_landmarks(
-                            image,
-                            hand_landmarks,
-                            mp_hands.HAND_CONNECTIONS,
-                            mp_drawing_styles.get_default_hand_landmarks_style(),
-                            mp_drawing_styles.get_default_hand_connections_style())
-                        
-                        try:
-                            # Process hand landmarks for gestures
-                            gesture, x, y = detect_gestures(hand_landmarks)
-                            
-                            # Convert normalized coordinates to pixel values
-                            pixel_x, pixel_y = int(x * width), int(y * height)
-                            
-                            # Draw hand number and gesture type
-                            hand_label = f"Hand {i+1}: {gesture}"
-                            cv2.putText(image, hand_label, (10, 220+(30*i)), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                            
-                            # Store hand data
-                            if i == 0:
-                                hand1_data = (gesture, x, y)
-                            elif i == 1:
-                                hand2_data = (gesture, x, y)
-                        except Exception as e:
-                            print(f"Error processing hand {i+1}: {e}")
-                    
-                    try:
-                        # After processing all hands, send data to Blender
-                        message = ""
-                        if hand1_data:
-                            gesture1, x1, y1 = hand1_data
-                            message = f"{gesture1},{x1},{y1}"
-                            
-                            # If we also have hand2 data, append it
-                            if hand2_data:
-                                gesture2, x2, y2 = hand2_data
-                                message += f",{gesture2},{x2},{y2}"
-                        
-                        # Send the message if we have at least one valid hand gesture
-                        if message and hand1_data[0] != "none":
-                            sock.sendto(message.encode(), blender_address)
-                            print(f"Sent to Blender: {message}")
-                    except Exception as e:
-                        print(f"Error sending data to Blender: {e}")
-                
-                # Check for key presses
-                key = cv2.waitKey(5) & 0xFF
-                if key == 27:  # ESC key to exit
-                    break
-                elif key == ord('h') or key == ord('H'):  # 'H' key to toggle help
-                    show_help = not show_help
-                
-                # Display the resulting frame
-                cv2.imshow('Hand Gesture Control', image)
+            preview = None  # Reused by render_frame
+
+            try:
+                while not stop_event.is_set():
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        break
+
+                    if args.headless:
+                        stop_event.wait(0.1)
+                    else:
+                        result = results_queue.get(timeout=0.1, latest=True)
+                        if result is not None:
+                            started = time.perf_counter()
+                            preview = render_frame(result, show_help, preview)
+                            release_frame(result.frame.image)
+
+                            # Display the resulting frame
+                            cv2.imshow('Hand Gesture Control', preview)
+                            render_stats.record(started)
+
+                        # Check for key presses
+                        key = cv2.waitKey(5) & 0xFF
+                        if key == 27:  # ESC key to exit
+                            break
+                        elif key == ord('h') or key == ord('H'):  # 'H' key to toggle help
+                            show_help = not show_help
+
+                    reporter.maybe_report()
+            finally:
+                # Stop the worker stages before the MediaPipe graph is closed
+                stop_event.set()
+                for thread in threads:
+                    thread.join(2.0)
     except Exception as e:
-        print(f"Error in main loop: {e}")
+        log.error("Error in main loop: %s", e)
     finally:
         # Clean up resources
-        cap.release()
-        cv2.destroyAllWindows()
-        sock.close()
-        print("Resources released successfully")
+        stop_event.set()
+        source.release()
+        if recorder is not None:
+            recorder.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
+        sender.sock.close()
+        if sender.ring is not None:
+            sender.ring.close()
+        sender.sent.flush()
+        log.info("Resources released successfully")
+        # Write out the queued log lines before the summary
+        shutdown_logging()
+
+        summary = reporter.summary()
+        mode = "headless" if args.headless else "windowed"
+        fps = " ".join(f"{key}={value:.1f}" for key, value in summary.items() if key.endswith("_fps"))
+        print(f"[summary] mode={mode} seconds={summary['seconds']:.1f} {fps} "
+              f"cpu_percent={summary['cpu_percent']:.0f}")
+        if tracer is not None:
+            for line in tracer.format_lines():
+                print(f"[latency] {line}")
+            if args.trace_file:
+                tracer.dump(args.trace_file)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
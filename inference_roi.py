@@ -0,0 +1,193 @@
+"""Region of interest and input resolution for MediaPipe inference.
+
+When the hands fill a small part of the frame, MediaPipe does not need
+the whole frame: RoiTracker picks a square region around the hands of the
+previous frame (with a margin so they can move) and the frame is cropped
+to it before the color conversion. It falls back to the full
+frame when the hands are lost, and rescans the full frame every so often
+while fewer than two hands are tracked, so a second hand entering outside
+the region is still found. The region only moves when the hands get close
+to its edge, since MediaPipe's own tracking works best on a stable input.
+
+ResolutionController scales the inference input down while inference is
+slower than the target frame rate, and back up when there is headroom.
+
+The camera frame is never flipped for inference: MediaPipe gets the
+camera's own orientation, converted to RGB into a reused buffer
+(OutputBuffers), and the results are mirrored instead. MediaPipe returns
+landmarks normalized to the image it was given; remap_landmarks() turns
+them into mirrored (selfie view) full-frame coordinates and
+mirror_handedness() swaps the Left/Right labels, so the classifiers, the
+preview and the wire protocol never see the crop or the orientation.
+"""
+import cv2
+import numpy as np
+
+from gesture_classifier import landmarks_to_array
+
+
+class RoiTracker:
+    """Chooses the part of the (mirrored) frame to run inference on"""
+
+    def __init__(self, margin=0.3, min_size=0.25, max_area=0.6, refit_ratio=3.0, rescan_interval=30,
+                 max_hands=2):
+        self.margin = margin              # Padding around the hands, relative to their size
+        self.min_size = min_size          # Smallest region side, relative to the frame height
+        self.max_area = max_area          # Above this share of the frame, use the full frame
+        self.refit_ratio = refit_ratio    # Shrink the region when it is this much larger than needed
+        self.rescan_interval = rescan_interval
+        self.max_hands = max_hands
+        self.region = None  # (x0, y0, x1, y1) pixels in the mirrored frame, None for the full frame
+        self._frames_since_rescan = 0
+
+    def reset(self):
+        self.region = None
+
+    def next_region(self):
+        """Region for the next frame, None to use the full frame"""
+        if self.region is not None:
+            self._frames_since_rescan += 1
+            if self._frames_since_rescan >= self.rescan_interval:
+                return None
+        return self.region
+
+    def update(self, multi_hand_landmarks, width, height, full_frame):
+        """Fit the region to the hands found in a frame (full-frame normalized landmarks)"""
+        if full_frame:
+            self._frames_since_rescan = 0
+        if not multi_hand_landmarks:
+            # Tracking lost, look at the whole frame again
+            self.region = None
+            return
+
+        points = landmarks_to_array(multi_hand_landmarks)
+        x0, y0 = points[..., 0].min() * width, points[..., 1].min() * height
+        x1, y1 = points[..., 0].max() * width, points[..., 1].max() * height
+        if len(points) >= self.max_hands:
+            # Nothing left to find outside the region
+            self._frames_since_rescan = 0
+
+        pad = self.margin * max(x1 - x0, y1 - y0)
+        side = max(x1 - x0 + 2 * pad, y1 - y0 + 2 * pad, self.min_size * height)
+        side = min(side, width, height)
+
+        # Keep the current region while the hands stay well inside it
+        if self.region is not None:
+            rx0, ry0, rx1, ry1 = self.region
+            edge = max(pad / 2, 0.1 * (rx1 - rx0))
+            inside = rx0 + edge <= x0 and ry0 + edge <= y0 and x1 <= rx1 - edge and y1 <= ry1 - edge
+            if inside and (rx1 - rx0) * (ry1 - ry0) <= self.refit_ratio * side * side:
+                return
+
+        # Square region centered on the hands, moved inside the frame
+        if side * side > self.max_area * width * height:
+            self.region = None
+            return
+        left = min(max((x0 + x1 - side) / 2, 0), width - side)
+        top = min(max((y0 + y1 - side) / 2, 0), height - side)
+        self.region = (int(left), int(top), int(left + side), int(top + side))
+
+
+class ResolutionController:
+    """Scales the inference input so inference keeps up with target_fps (0 disables it)"""
+
+    def __init__(self, target_fps=0.0, min_scale=0.4, step=0.85, settle_frames=15, smoothing=0.1):
+        self.target_fps = target_fps
+        self.min_scale = min_scale
+        self.step = step
+        self.settle_frames = settle_frames  # Frames to measure after each change
+        self.smoothing = smoothing
+        self.scale = 1.0
+        self.average = None  # Smoothed inference time in seconds
+        self._frames = 0
+
+    def update(self, seconds):
+        """Account for one inference that took seconds, adjust the scale if needed"""
+        if self.target_fps <= 0:
+            return self.scale
+        if self.average is None:
+            self.average = seconds
+        else:
+            self.average += (seconds - self.average) * self.smoothing
+        self._frames += 1
+        if self._frames < self.settle_frames:
+            return self.scale
+
+        budget = 1.0 / self.target_fps
+        if self.average > budget * 1.05 and self.scale > self.min_scale:
+            self.scale = max(self.min_scale, self.scale * self.step)
+            self._frames = 0
+        elif self.average < budget * 0.7 and self.scale < 1.0:
+            self.scale = min(1.0, self.scale / self.step)
+            self._frames = 0
+        return self.scale
+
+
+class OutputBuffers:
+    """Reusable OpenCV output arrays, one per purpose, reallocated only when the shape changes"""
+
+    def __init__(self):
+        self._arrays = {}
+
+    def get(self, name, shape):
+        array = self._arrays.get(name)
+        if array is None or array.shape != shape:
+            array = self._arrays[name] = np.empty(shape, dtype=np.uint8)
+        return array
+
+
+def prepare_input(image, region=None, scale=1.0, max_side=0, buffers=None):
+    """Crop, downscale and convert a BGR camera frame to RGB for MediaPipe.
+
+    region is in mirrored-frame pixels; the result is not mirrored. max_side
+    (if not 0) caps the longest side of the result. Work is done on the crop
+    only, resizing first so the color conversion touches the fewest pixels.
+    With buffers the result is written to a reused array, valid until the
+    next call.
+    """
+    width = image.shape[1]
+    if region is not None:
+        x0, y0, x1, y1 = region
+        # Columns of the mirrored region in the camera frame
+        image = image[y0:y1, width - x1:width - x0]
+
+    height, width = image.shape[:2]
+    if max_side:
+        scale = min(scale, max_side / max(width, height))
+    if scale < 1.0:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        resized = buffers.get("resized", (size[1], size[0], 3)) if buffers is not None else None
+        image = cv2.resize(image, size, dst=resized, interpolation=cv2.INTER_AREA)
+    rgb = buffers.get("rgb", image.shape) if buffers is not None else None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+
+
+def remap_landmarks(multi_hand_landmarks, region, width, height, mirror=True):
+    """Turn landmarks of the (unmirrored) inference input into mirrored full-frame coordinates, in place.
+
+    region is the mirrored-frame region the input covered, None for the
+    whole frame. With mirror=False the input was already mirrored.
+    """
+    if not multi_hand_landmarks or (region is None and not mirror):
+        return multi_hand_landmarks
+    x0, y0, x1, y1 = region if region is not None else (0, 0, width, height)
+    scale_x, scale_y = (x1 - x0) / width, (y1 - y0) / height
+    # The input's left edge is the region's right edge in the mirrored frame
+    offset_x, direction_x = (x1 / width, -scale_x) if mirror else (x0 / width, scale_x)
+    offset_y = y0 / height
+    for hand_landmarks in multi_hand_landmarks:
+        for lm in hand_landmarks.landmark:
+            lm.x = offset_x + lm.x * direction_x
+            lm.y = offset_y + lm.y * scale_y
+            # z uses roughly the same scale as x
+            lm.z *= scale_x
+    return multi_hand_landmarks
+
+
+def mirror_handedness(multi_handedness):
+    """Swap Left/Right labels, in place; MediaPipe assumes a mirrored input when labeling hands"""
+    for hand_info in multi_handedness or ():
+        for classification in hand_info.classification:
+            classification.label = {"Left": "Right", "Right": "Left"}.get(classification.label,
+                                                                          classification.label)
+    return multi_handedness
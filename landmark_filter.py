@@ -0,0 +1,109 @@
+"""One Euro smoothing of hand landmarks, applied before classification.
+
+The One Euro filter (Casiez et al., CHI 2012) is a low-pass filter whose
+cutoff frequency rises with speed: slow movements are smoothed heavily to
+remove jitter, fast ones lightly to keep lag low. min_cutoff (Hz) sets the
+smoothing at rest, beta how quickly the cutoff opens up with speed.
+
+Each filter works on a whole (21, 3) landmark array with preallocated
+buffers, so filtering a frame does not allocate.
+"""
+import math
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+class OneEuroFilter:
+    """One Euro filter over a fixed-shape array of values"""
+
+    def __init__(self, min_cutoff=1.0, beta=20.0, d_cutoff=1.0, shape=(NUM_LANDMARKS, 3)):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = np.zeros(shape, dtype=np.float32)  # Filtered value
+        self._speed = np.zeros(shape, dtype=np.float32)  # Filtered derivative
+        self._delta = np.zeros(shape, dtype=np.float32)
+        self._cutoff = np.zeros(shape, dtype=np.float32)
+        self._last_time = None
+
+    def reset(self):
+        """Start over with the next sample"""
+        self._last_time = None
+
+    def __call__(self, sample, timestamp):
+        """Filter one sample taken at timestamp (seconds), return the filtered array.
+
+        The returned array is owned by the filter and overwritten by the
+        next call.
+        """
+        if self._last_time is None:
+            self.value[...] = sample
+            self._speed.fill(0.0)
+            self._last_time = timestamp
+            return self.value
+
+        dt = timestamp - self._last_time
+        if dt <= 0:
+            # Same frame again (or a clock step), nothing new to learn
+            return self.value
+        self._last_time = timestamp
+
+        # Smoothed speed, using the previous filtered value as reference
+        np.subtract(sample, self.value, out=self._delta)
+        self._delta *= 1.0 / dt
+        self._delta -= self._speed
+        self._delta *= self._alpha(self.d_cutoff, dt)
+        self._speed += self._delta
+
+        # Per-value cutoff from the speed, then alpha = r / (1 + r) with r = 2*pi*cutoff*dt
+        np.abs(self._speed, out=self._cutoff)
+        self._cutoff *= self.beta
+        self._cutoff += self.min_cutoff
+        self._cutoff *= 2.0 * math.pi * dt
+        np.add(self._cutoff, 1.0, out=self._delta)
+        np.divide(self._cutoff, self._delta, out=self._cutoff)
+
+        # Move the filtered value towards the sample by alpha
+        np.subtract(sample, self.value, out=self._delta)
+        self._delta *= self._cutoff
+        self.value += self._delta
+        return self.value
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        r = 2.0 * math.pi * cutoff * dt
+        return r / (1.0 + r)
+
+
+class LandmarkFilterBank:
+    """One OneEuroFilter per hand, keyed by handedness (or detection order)"""
+
+    def __init__(self, min_cutoff=1.0, beta=20.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.filters = {}
+
+    def apply(self, points, handedness, timestamp):
+        """Filter a (hands, 21, 3) array in place.
+
+        Hands that are not in this frame lose their state, so a hand that
+        comes back is not dragged from where it was last seen.
+        """
+        seen = set()
+        for i in range(len(points)):
+            label = handedness[i] if i < len(handedness) else None
+            key = label if label and label not in seen else i
+            seen.add(key)
+
+            hand_filter = self.filters.get(key)
+            if hand_filter is None:
+                hand_filter = self.filters[key] = OneEuroFilter(self.min_cutoff, self.beta, self.d_cutoff)
+            points[i] = hand_filter(points[i], timestamp)
+
+        for key, hand_filter in self.filters.items():
+            if key not in seen:
+                hand_filter.reset()
+        return points
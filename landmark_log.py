@@ -0,0 +1,48 @@
+"""Recorded landmark sequences, one JSON object per frame.
+
+Each line looks like::
+
+    {"seq": 12, "t": 1718000000.123, "hands": [{"handedness": "Right", "landmarks": [[x, y, z], ...]}]}
+
+with 21 normalized MediaPipe landmarks per hand. Frames without hands are
+recorded too (with an empty list) so timing and tracking loss are kept.
+"""
+import json
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+class LandmarkLogWriter:
+    """Append per-frame landmark results to a JSON lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w")
+
+    def write(self, seq, timestamp, points, handedness):
+        """Write one frame: a (hands, 21, 3) array and a handedness label per hand"""
+        hands = [{"handedness": handedness[i] if i < len(handedness) else None,
+                  "landmarks": np.round(np.asarray(points[i], dtype=float), 6).tolist()}
+                 for i in range(len(points))]
+        self._file.write(json.dumps({"seq": seq, "t": timestamp, "hands": hands}) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def read_landmark_log(path):
+    """Yield (seq, timestamp, points, handedness) for every recorded frame.
+
+    points is a (hands, 21, 3) float32 array.
+    """
+    with open(path) as log_file:
+        for line in log_file:
+            if not line.strip():
+                continue
+            frame = json.loads(line)
+            points = np.array([hand["landmarks"] for hand in frame["hands"]],
+                              dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+            handedness = [hand.get("handedness") for hand in frame["hands"]]
+            yield frame["seq"], frame["t"], points, handedness
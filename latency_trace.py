@@ -0,0 +1,120 @@
+"""Latency histograms for the capture-to-Blender chain.
+
+Every traced packet carries the wall-clock time (time.time()) at which its
+frame was captured, inference finished and the packet was sent; Blender
+adds the time it was received, dispatched by the mailbox timer and
+applied to the scene. The difference between consecutive stamps is the
+latency of that stage:
+
+    inference  capture -> inference done
+    send       inference done -> packet sent
+    network    sent -> received by Blender's socket thread
+    queue      received -> dispatched by the mailbox timer
+    apply      dispatched -> scene updated
+    total      capture -> scene updated
+
+The stamps are compared across processes, so both ends have to run on
+the same machine (or on machines with synchronized clocks).
+
+This module only depends on the standard library so Blender can import it.
+"""
+import bisect
+import json
+import math
+import threading
+import time
+
+STAGES = ("inference", "send", "network", "queue", "apply", "total")
+
+# Bucket upper bounds in milliseconds, about 5% apart from 10 us to 100 s
+BUCKET_BOUNDS = tuple(0.01 * 1.05 ** i for i in range(int(math.log(1e7) / math.log(1.05)) + 2))
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of latencies in milliseconds"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (0-100)"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+        }
+
+
+class LatencyTracer:
+    """Per-stage latency histograms, safe to update from several threads"""
+
+    def __init__(self, stages=STAGES):
+        self.stages = tuple(stages)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+            self.started = time.time()
+
+    def record(self, stage, start, end):
+        """Record a stage that went from start to end (seconds); missing stamps are skipped"""
+        if start is None or end is None:
+            return
+        with self._lock:
+            self.histograms[stage].record(max(end - start, 0.0) * 1000)
+
+    def record_stamps(self, stamps):
+        """Record every stage between consecutive stamps.
+
+        stamps maps stage end names to times: {"capture": t0, "inference": t1, ...}.
+        A stage is only recorded if the stamp before it is there too; the
+        total goes from capture to the last stamp.
+        """
+        order = ("capture",) + tuple(stage for stage in self.stages if stage != "total")
+        for previous, stage in zip(order, order[1:]):
+            self.record(stage, stamps.get(previous), stamps.get(stage))
+        last = next((stamps[stage] for stage in reversed(order[1:]) if stage in stamps), None)
+        if "total" in self.stages:
+            self.record("total", stamps.get("capture"), last)
+
+    def summary(self):
+        """{stage: snapshot} for the stages that have samples"""
+        with self._lock:
+            return {stage: histogram.snapshot() for stage, histogram in self.histograms.items()
+                    if histogram.count}
+
+    def format_lines(self):
+        """One "stage p50/p95/p99" line per stage with samples"""
+        return [f"{stage:<9} p50 {s['p50_ms']:6.1f}  p95 {s['p95_ms']:6.1f}  p99 {s['p99_ms']:6.1f} ms"
+                f"  (n={s['count']})" for stage, s in self.summary().items()]
+
+    def dump(self, path):
+        """Write the summary as JSON"""
+        with open(path, "w") as trace_file:
+            json.dump({"started": self.started, "written": time.time(), "stages": self.summary()},
+                      trace_file, indent=2)
@@ -0,0 +1,141 @@
+"""Leveled, rate-limited logging shared by hand_tracking.py and Blender.
+
+print() writes to the console synchronously, and with Blender's console
+(or a slow terminal) attached every line blocks the loop that printed it.
+Loggers from get_logger() only put records on a queue; a background thread
+formats and writes them. Records below the configured level are dropped
+before any formatting, so debug lines in the hot path cost a level check.
+
+Messages are rate limited per logger and message template (log with
+%-style arguments, not f-strings): after `burst` records within
+`interval` seconds the rest are dropped, and the next one that gets
+through says how many were suppressed.
+
+EventCounter turns frequent events (packets sent, gestures applied) into
+one aggregated line per interval instead of one line per event.
+
+This module only depends on the standard library so Blender can import it.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+
+ROOT_LOGGER = "rtht"
+LOG_FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s: %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+
+_listener = None
+_handler = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `burst` records per message template through every `interval` seconds"""
+
+    def __init__(self, burst=5, interval=1.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._windows = {}  # (logger name, template) -> [window start, records, suppressed]
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or record.created - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [record.created, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} [{suppressed} similar suppressed]"
+                return True
+            window[1] += 1
+            if window[1] <= self.burst:
+                return True
+            window[2] += 1
+            return False
+
+
+def get_logger(name):
+    """Logger for one part of the project, e.g. get_logger("tracker")"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def setup_logging(level="INFO", burst=5, interval=1.0, stream=None):
+    """Send the project's loggers through a queue to a background writer.
+
+    Safe to call again (Blender re-runs its script); later calls only
+    change the level and the rate limit.
+    """
+    global _listener, _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    if _handler is not None:
+        for log_filter in _handler.filters:
+            log_filter.burst = burst
+            log_filter.interval = interval
+        return root
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    records = queue.SimpleQueue()
+    # Filtering happens on the logging thread, before the record is queued
+    _handler = logging.handlers.QueueHandler(records)
+    _handler.addFilter(RateLimitFilter(burst, interval))
+    root.addHandler(_handler)
+    _listener = logging.handlers.QueueListener(records, writer)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    """Write out the queued records and stop the background writer"""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+    _listener = None
+    _handler = None
+
+
+class EventCounter:
+    """Counts frequent events by kind and logs one summary line per interval.
+
+    Not thread-safe: use one counter per thread.
+    """
+
+    def __init__(self, logger, label, interval=5.0, level=logging.INFO):
+        self.logger = logger
+        self.label = label
+        self.interval = interval
+        self.level = level
+        self.counts = Counter()
+        self._started = time.perf_counter()
+
+    def add(self, kind, count=1):
+        """Count an event, and log the summary if the interval has elapsed"""
+        self.counts[kind] += count
+        self.maybe_log()
+
+    def maybe_log(self):
+        elapsed = time.perf_counter() - self._started
+        if elapsed >= self.interval:
+            self.flush(elapsed)
+
+    def flush(self, elapsed=None):
+        """Log the counts so far (if any) and start a new interval"""
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._started
+        if self.counts and self.logger.isEnabledFor(self.level):
+            kinds = ", ".join(f"{kind} {count}" for kind, count in self.counts.most_common())
+            self.logger.log(self.level, "%s: %d in %.1fs (%s)", self.label, sum(self.counts.values()),
+                            elapsed, kinds)
+        self.counts.clear()
+        self._started = time.perf_counter()
@@ -0,0 +1,328 @@
+"""Several cameras, one worker process each, merged into one gesture stream.
+
+    python multi_camera.py --source 0 --source 1
+    python multi_camera.py --source 0 --source clip.mp4 --headless --roi
+
+hand_tracking.py runs capture, MediaPipe and drawing in one process, where
+the Python parts share the GIL. This supervisor starts a worker process
+per source (camera index, video file or recording), each with its own
+MediaPipe model and the same capture/inference/render stages as
+hand_tracking.py, so the cameras don't share one interpreter. Whether
+that raises the total frame rate depends on free cores: MediaPipe already
+runs on several threads, and on a single core the workers only split it
+(58 fps for one worker, 46 fps in total for four).
+
+Workers put their debounced hands on a queue and the supervisor sends them
+to Blender through a single GestureSender (UDP or the shared-memory ring),
+with the camera ID as the packet's client ID, so Blender gives every camera
+its own session. Camera IDs count up from --client-id (1 if not given).
+
+Frames stay in the worker that captured them. Only the annotated preview
+crosses processes, through a shared-memory slot per camera (FrameSlot)
+that the supervisor shows, so no pixels are pickled.
+
+All other hand_tracking.py options (--roi, --classifier, --trace, ...)
+apply to every worker, except --record.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+import hand_tracking as tracker
+from capture_sources import open_source
+from latency_trace import LatencyTracer
+from log_setup import get_logger, setup_logging, shutdown_logging
+from pipeline import DropOldestQueue, StageStats, ThroughputReporter, start_stage
+
+log = get_logger("supervisor")
+
+# Hands waiting to be sent; a worker drops its hands when the supervisor falls this far behind
+MESSAGE_QUEUE_SIZE = 256
+# Frame count (odd while a frame is being written), height, width, channels
+PREVIEW_HEADER = struct.Struct("<QIII")
+
+
+class FrameSlot:
+    """Newest frame of one worker in shared memory: the worker writes, the supervisor reads"""
+
+    def __init__(self, segment, owner):
+        self.segment = segment
+        self.name = segment.name
+        self.owner = owner
+        self.count, height, width, channels = PREVIEW_HEADER.unpack_from(segment.buf, 0)
+        self.shape = (height, width, channels)
+        self.pixels = np.ndarray(self.shape, dtype=np.uint8, buffer=segment.buf, offset=PREVIEW_HEADER.size)
+        self.last_read = 0
+        self.frame = None  # Reader's copy, reused
+
+    @classmethod
+    def create(cls, name, shape):
+        size = PREVIEW_HEADER.size + int(np.prod(shape))
+        segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        PREVIEW_HEADER.pack_into(segment.buf, 0, 0, *shape)
+        return cls(segment, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        # Workers share the supervisor's resource tracker, so keep the registration
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def write(self, image):
+        self.count += 1
+        PREVIEW_HEADER.pack_into(self.segment.buf, 0, self.count, *self.shape)
+        self.pixels[...] = image
+        self.count += 1
+        PREVIEW_HEADER.pack_into(self.segment.buf, 0, self.count, *self.shape)
+
+    def read(self):
+        """Copy of the newest frame, None if there is no new complete one"""
+        count = PREVIEW_HEADER.unpack_from(self.segment.buf, 0)[0]
+        if count == self.last_read or count % 2:
+            return None
+        if self.frame is None:
+            self.frame = np.empty(self.shape, dtype=np.uint8)
+        self.frame[...] = self.pixels
+        if PREVIEW_HEADER.unpack_from(self.segment.buf, 0)[0] != count:
+            return None  # Overwritten while copying, the next one will do
+        self.last_read = count
+        return self.frame
+
+    def close(self):
+        # The array must go before the mapping can be closed
+        self.pixels = None
+        self.segment.close()
+        if self.owner:
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class QueueSender:
+    """Stands in for GestureSender in a worker: hands go to the supervisor instead of Blender"""
+
+    def __init__(self, camera_id, messages, send_landmarks=False):
+        self.camera_id = camera_id
+        self.messages = messages
+        self.send_landmarks = send_landmarks
+        self.dropped = 0
+
+    def send(self, hands, frame, inferred_at=None):
+        try:
+            self.messages.put_nowait(("hands", self.camera_id, hands, frame._replace(image=None), inferred_at))
+        except queue.Full:
+            self.dropped += 1
+
+
+def camera_worker(camera_id, source_name, args, messages, shutdown, preview):
+    """Worker process: capture, inference and preview drawing for one source"""
+    # Ctrl+C reaches every process of the terminal; the supervisor says when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging(args.log_level)
+    worker_log = get_logger(f"camera{camera_id}")
+
+    stop_event = threading.Event()
+    source, recorded_hands = open_source(source_name, args.replay_speed, args.replay_landmarks)
+    release_frame = source.buffers.release
+    frames = DropOldestQueue(maxsize=2, lossless=source.lossless, on_drop=lambda frame: release_frame(frame.image))
+    results_queue = None
+    if preview:
+        results_queue = DropOldestQueue(maxsize=2, on_drop=lambda result: release_frame(result.frame.image))
+    capture_stats = StageStats("capture")
+    inference_stats = StageStats("inference")
+    render_stats = StageStats("render")
+    stages = [capture_stats, inference_stats] + ([render_stats] if preview else [])
+    reporter = ThroughputReporter(stages, queues={"frames": frames}, interval=args.stats_interval,
+                                  logger=get_logger(f"pipeline.camera{camera_id}"))
+    sender = QueueSender(camera_id, messages,
+                         send_landmarks=args.send_landmarks and args.protocol == "binary")
+    slot = None
+    threads = []
+
+    try:
+        with recorded_hands or tracker.mp_hands.Hands(**tracker.HANDS_OPTIONS) as hands:
+            stage = tracker.create_inference_stage(args, hands, sender, recorded=recorded_hands is not None)
+            threads.append(start_stage("capture", tracker.capture_loop, source, frames, capture_stats,
+                                       stop_event))
+            threads.append(start_stage("inference", tracker.inference_loop, stage, frames, results_queue,
+                                       inference_stats, stop_event, release_frame))
+            image = None  # Reused by render_frame
+            try:
+                while not stop_event.is_set() and not shutdown.is_set():
+                    if results_queue is None:
+                        stop_event.wait(0.1)
+                    else:
+                        result = results_queue.get(timeout=0.1, latest=True)
+                        if result is not None:
+                            started = time.perf_counter()
+                            image = tracker.render_frame(result, show_help=False, out=image)
+                            release_frame(result.frame.image)
+                            if slot is None:
+                                slot = FrameSlot.create(f"rtht_preview_{os.getpid()}", image.shape)
+                                messages.put(("preview", camera_id, slot.name))
+                            if image.shape == slot.shape:
+                                slot.write(image)
+                            render_stats.record(started)
+                    reporter.maybe_report()
+            finally:
+                stop_event.set()
+                for thread in threads:
+                    thread.join(2.0)
+    except Exception as e:
+        worker_log.error("Error in camera worker: %s", e)
+    finally:
+        stop_event.set()
+        source.release()
+        summary = reporter.summary()
+        summary["dropped_hands"] = sender.dropped
+        messages.put(("done", camera_id, summary))
+        if slot is not None:
+            slot.close()
+        shutdown_logging()
+
+
+def handle_message(message, sender, previews, summaries):
+    """Forward a worker's hands to Blender, or take note of its preview slot or its end"""
+    kind, camera_id = message[:2]
+    if kind == "hands":
+        _, _, hands, frame, inferred_at = message
+        sender.send(hands, frame, inferred_at, source=camera_id)
+    elif kind == "preview":
+        try:
+            previews[camera_id] = FrameSlot.attach(message[2])
+        except FileNotFoundError:
+            pass  # The worker stopped in the meantime
+    elif kind == "done":
+        summaries[camera_id] = message[2]
+
+
+def parse_args(argv=None):
+    """Split the options into the sources and the hand_tracking.py options for the workers"""
+    parser = argparse.ArgumentParser(
+        description="Run one hand tracking worker process per camera, merged into one gesture stream",
+        epilog="Other options are passed to every worker, see hand_tracking.py --help.")
+    parser.add_argument("--source", action="append", required=True,
+                        help="camera index, video file or recording directory; repeat for each camera")
+    args, rest = parser.parse_known_args(argv)
+    return args.source, tracker.parse_args(rest)
+
+
+def main(argv=None):
+    sources, args = parse_args(argv)
+    setup_logging(args.log_level)
+    if args.record:
+        log.warning("--record is not supported with several cameras, ignoring it")
+        args.record = None
+
+    first_id = args.client_id or 1
+    camera_ids = [first_id + i for i in range(len(sources))]
+    tracer = LatencyTracer(("inference", "send", "total")) if args.trace or args.trace_file else None
+    sender = tracker.create_sender(args, tracer)
+
+    # Spawned workers start without the supervisor's threads and MediaPipe state
+    context = multiprocessing.get_context("spawn")
+    messages = context.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+    shutdown = context.Event()
+    workers = {camera_id: context.Process(target=camera_worker, name=f"camera{camera_id}", daemon=True,
+                                          args=(camera_id, source, args, messages, shutdown, not args.headless))
+               for camera_id, source in zip(camera_ids, sources)}
+    for camera_id, worker in workers.items():
+        worker.start()
+        log.info("Camera %d: %s (process %d)", camera_id, sources[camera_ids.index(camera_id)], worker.pid)
+
+    # Shut down cleanly on Ctrl+C or a service manager's SIGTERM
+    def request_stop(signum, frame):
+        shutdown.set()
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration > 0 else None
+    previews = {}
+    summaries = {}
+
+    try:
+        while len(summaries) < len(workers) and not shutdown.is_set():
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            try:
+                # Send everything that is waiting, then show the previews
+                message = messages.get(timeout=0.005 if previews else 0.1)
+                while True:
+                    handle_message(message, sender, previews, summaries)
+                    message = messages.get_nowait()
+            except queue.Empty:
+                pass
+
+            for camera_id, slot in previews.items():
+                frame = slot.read()
+                if frame is not None:
+                    cv2.imshow(f"Camera {camera_id}", frame)
+            if previews and cv2.waitKey(1) & 0xFF == 27:  # ESC key to exit
+                break
+
+            for camera_id, worker in workers.items():
+                if camera_id not in summaries and not worker.is_alive():
+                    log.error("Camera %d worker exited with code %s", camera_id, worker.exitcode)
+                    summaries[camera_id] = None
+    except Exception as e:
+        log.error("Error in supervisor loop: %s", e)
+    finally:
+        shutdown.set()
+        # Workers report their summary on the way out; their hands are no longer sent
+        wait_until = time.perf_counter() + 5.0
+        while len(summaries) < len(workers) and time.perf_counter() < wait_until:
+            try:
+                message = messages.get(timeout=0.1)
+            except queue.Empty:
+                if all(not worker.is_alive() for worker in workers.values()):
+                    break
+                continue
+            if message[0] == "done":
+                summaries[message[1]] = message[2]
+        for worker in workers.values():
+            worker.join(2.0)
+            if worker.is_alive():
+                worker.terminate()
+        for slot in previews.values():
+            slot.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
+        sender.sock.close()
+        if sender.ring is not None:
+            sender.ring.close()
+        sender.sent.flush()
+        log.info("Resources released successfully")
+        shutdown_logging()
+
+        mode = "headless" if args.headless else "windowed"
+        seconds = time.perf_counter() - started
+        total = 0.0
+        for camera_id in camera_ids:
+            summary = summaries.get(camera_id)
+            if not summary:
+                print(f"[summary] camera={camera_id} failed")
+                continue
+            total += summary["inference_fps"]
+            fps = " ".join(f"{key}={value:.1f}" for key, value in summary.items() if key.endswith("_fps"))
+            print(f"[summary] camera={camera_id} mode={mode} seconds={summary['seconds']:.1f} {fps} "
+                  f"cpu_percent={summary['cpu_percent']:.0f} dropped_hands={summary['dropped_hands']}")
+        print(f"[summary] cameras={len(camera_ids)} mode={mode} seconds={seconds:.1f} inference_fps={total:.1f}")
+        if tracer is not None:
+            for line in tracer.format_lines():
+                print(f"[latency] {line}")
+            if args.trace_file:
+                tracer.dump(args.trace_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+
+# Help panel layout: (text, origin, font scale, thickness). A negative x is
+# measured from the right edge of the frame.
+HELP_LINES = (
+    ("GESTURE GUIDE:", (10, 30), 0.7, 2),
+    ("Point (1 finger): Select object", (20, 60), 0.6, 1),
+    ("Pinch (thumb+index): Move object", (20, 90), 0.6, 1),
+    ("TWO V Signs: Duplicate object", (20, 120), 0.6, 1),
+    ("TWO Palms: Create new object", (20, 150), 0.6, 1),
+    ("TWO Fists: Delete selected object", (20, 180), 0.6, 1),
+    ("Press 'H' to hide help | ESC to exit", (-300, 30), 0.6, 1),
+)
+HELP_PANEL_HEIGHT = 180
+HELP_PANEL_OPACITY = 0.7
+HELP_TEXT_COLOR = (0, 255, 255)
+
+
+class HelpOverlay:
+    """Help panel pre-rendered into a sprite and blended over the top band of a frame.
+
+    The panel background and text never change, so they are rasterized once
+    together with a per-pixel alpha mask. Each frame then only blends the
+    band covered by the panel, in place, instead of copying and blending
+    the whole frame and drawing the text again.
+    """
+
+    def __init__(self, lines=HELP_LINES, panel_height=HELP_PANEL_HEIGHT,
+                 opacity=HELP_PANEL_OPACITY, color=HELP_TEXT_COLOR):
+        self.lines = tuple(lines)
+        self.panel_height = panel_height
+        self.opacity = opacity
+        self.color = color
+        self._key = None
+        self._sprite = None
+        self._alpha = None
+        self._inv_alpha = None
+
+    def set_lines(self, lines):
+        """Replace the help text, the sprite is rebuilt on the next draw"""
+        self.lines = tuple(lines)
+
+    def _band_height(self):
+        """Panel height plus whatever text hangs below it"""
+        bottom = self.panel_height + 1
+        for text, (_, y), scale, thickness in self.lines:
+            _, baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+            bottom = max(bottom, y + baseline + thickness)
+        return bottom
+
+    def _build(self, width, height):
+        band_height = min(self._band_height(), height)
+        text = np.zeros((band_height, width, 3), dtype=np.uint8)
+        coverage = np.zeros((band_height, width), dtype=np.uint8)
+
+        for line, (x, y), scale, thickness in self.lines:
+            origin = (width + x if x < 0 else x, y)
+            cv2.putText(text, line, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, self.color, thickness)
+            cv2.putText(coverage, line, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness)
+
+        # Weight kept from the frame: the dark translucent panel, then the
+        # (possibly anti-aliased) text drawn over it
+        coverage = coverage.astype(np.float32) / 255.0
+        panel = np.zeros((band_height, width), dtype=np.float32)
+        panel[:self.panel_height + 1] = self.opacity
+        inv_alpha = (1.0 - panel) * (1.0 - coverage)
+        alpha = 1.0 - inv_alpha
+
+        # Text was rasterized onto black, i.e. already multiplied by its
+        # coverage; undo the division blendLinear does by the sprite weight
+        safe_alpha = np.maximum(alpha, 1e-6)[..., None]
+        sprite = np.clip(text.astype(np.float32) / safe_alpha + 0.5, 0, 255).astype(np.uint8)
+
+        self._sprite = sprite
+        self._alpha = alpha
+        self._inv_alpha = inv_alpha
+
+    def draw(self, image):
+        """Blend the help panel over the top of a BGR image, in place"""
+        height, width = image.shape[:2]
+        key = (width, height, self.lines)
+        if key != self._key:
+            self._build(width, height)
+            self._key = key
+
+        band = image[:self._sprite.shape[0]]
+        cv2.blendLinear(band, self._sprite, self._inv_alpha, self._alpha, dst=band)
+        return image
@@ -0,0 +1,173 @@
+import collections
+import threading
+import time
+
+from log_setup import get_logger
+
+log = get_logger("pipeline")
+
+
+class DropOldestQueue:
+    """Bounded hand-off queue between pipeline stages.
+
+    When the queue is full the oldest item is discarded to make room, so a
+    slow consumer never stalls its producer and never works on stale data.
+
+    A lossless queue instead makes the producer wait for room and never
+    drops anything, which is what a replay at maximum speed needs to give
+    the same results on every run.
+
+    on_drop, if given, is called with every discarded item, e.g. to give
+    its frame buffer back.
+    """
+
+    def __init__(self, maxsize=2, lossless=False, on_drop=None):
+        self._items = collections.deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.lossless = lossless
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item, timeout=None):
+        """Add an item, dropping the oldest one if the queue is full.
+
+        A lossless queue waits for room instead and returns False if there
+        was none within the timeout.
+        """
+        discarded = []
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                if self.lossless:
+                    self._cond.wait_for(lambda: len(self._items) < self._items.maxlen, timeout)
+                    if len(self._items) == self._items.maxlen:
+                        return False
+                else:
+                    self.dropped += 1
+                    discarded.append(self._items.popleft())
+            self._items.append(item)
+            self._cond.notify_all()
+        self._discard(discarded)
+        return True
+
+    def get(self, timeout=None, latest=False):
+        """Wait for an item and return it (None on timeout).
+
+        With latest=True only the newest item is returned and any older
+        ones are discarded, which turns the queue into a newest-frame ring.
+        A lossless queue always returns the oldest item.
+        """
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+                if not self._items:
+                    return None
+            if latest and not self.lossless:
+                item = self._items.pop()
+                self.dropped += len(self._items)
+                discarded = list(self._items)
+                self._items.clear()
+            else:
+                item = self._items.popleft()
+                discarded = []
+                # Wake a producer waiting for room
+                self._cond.notify_all()
+        self._discard(discarded)
+        return item
+
+    def _discard(self, items):
+        # Outside the lock, so the callback never holds up the other stage
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class StageStats:
+    """Throughput counters for a single pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.busy_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, started):
+        """Count one processed item that started at the given perf_counter()"""
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.count += 1
+            self.busy_time += elapsed
+
+    def snapshot(self):
+        with self._lock:
+            return self.count, self.busy_time
+
+
+class ThroughputReporter:
+    """Periodically log the per-stage rate so the limiting stage is visible"""
+
+    def __init__(self, stages, queues=None, interval=5.0, logger=None):
+        self.stages = stages
+        self.queues = queues or {}
+        self.interval = interval
+        self.log = logger or log
+        self._start_time = self._last_time = time.perf_counter()
+        self._start_cpu = self._last_cpu = time.process_time()
+        self._last = {stage.name: stage.snapshot() for stage in stages}
+        self._first = dict(self._last)
+
+    def maybe_report(self):
+        """Log a report if the interval has elapsed, return True if logged"""
+        now = time.perf_counter()
+        elapsed = now - self._last_time
+        if elapsed < self.interval:
+            return False
+        cpu = time.process_time()
+
+        parts = []
+        slowest = None
+        for stage in self.stages:
+            count, busy = stage.snapshot()
+            prev_count, prev_busy = self._last[stage.name]
+            done = count - prev_count
+            fps = done / elapsed
+            # Average time spent per item, i.e. the rate this stage could sustain on its own
+            per_item_ms = (busy - prev_busy) / done * 1000.0 if done else 0.0
+            parts.append(f"{stage.name} {fps:.1f} fps ({per_item_ms:.1f} ms/item)")
+            if slowest is None or per_item_ms > slowest[1]:
+                slowest = (stage.name, per_item_ms)
+            self._last[stage.name] = (count, busy)
+
+        for name, queue in self.queues.items():
+            parts.append(f"{name} dropped {queue.dropped}")
+
+        # Process CPU time over wall time, 100% means one full core
+        parts.append(f"cpu {(cpu - self._last_cpu) / elapsed * 100.0:.0f}%")
+
+        line = " | ".join(parts)
+        if slowest:
+            line += f" | limiting stage: {slowest[0]}"
+        self.log.info("%s", line)
+
+        self._last_time = now
+        self._last_cpu = cpu
+        return True
+
+    def summary(self):
+        """Return average fps per stage and CPU usage since the reporter was created"""
+        elapsed = max(time.perf_counter() - self._start_time, 1e-9)
+        summary = {"seconds": elapsed}
+        for stage in self.stages:
+            count, _ = stage.snapshot()
+            summary[f"{stage.name}_fps"] = (count - self._first[stage.name][0]) / elapsed
+        summary["cpu_percent"] = (time.process_time() - self._start_cpu) / elapsed * 100.0
+        return summary
+
+
+def start_stage(name, target, *args):
+    """Run a pipeline stage loop in a daemon thread"""
+    thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+    thread.start()
+    return thread
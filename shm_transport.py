@@ -0,0 +1,268 @@
+"""Shared-memory transport for a tracker and Blender on the same machine.
+
+A ring of fixed-size slots in a multiprocessing.shared_memory segment,
+with one writer (the tracker) and one reader (Blender's timer). Each slot
+holds one binary gesture packet (see gesture_protocol.py), so both
+transports carry exactly the same data. Reading is a few memory loads:
+no system call, no socket and no thread waiting for packets.
+
+Layout (little endian):
+
+    header  64 bytes   magic "RTSM", version u16, reserved u16,
+                       slot size u32, slot count u32, instance u32,
+                       writer pid u32 (0 = none),
+                       write sequence u64 (last published slot, 0 = none),
+                       writer heartbeat f64 (time of its last packet)
+    slot    slot size  sequence u64, payload length u32, reserved u32,
+                       payload
+
+The writer clears a slot's sequence, writes the payload, then sets the
+slot's sequence and finally the header's write sequence. The reader
+checks the slot sequence before and after copying the payload, so a slot
+overwritten while it was being read (the reader fell a whole ring behind)
+is counted as dropped instead of returned torn.
+
+Blender creates the ring when its listener starts and removes it when it
+stops; the tracker attaches to it by name and falls back to UDP while it
+does not exist. The instance number is random per ring, so a tracker
+notices when Blender restarted and recreated the ring under the same
+name.
+
+A ring has a single writer. A tracker claims the ring by storing its
+process ID in the header and refreshes the heartbeat with every packet; a
+second tracker attaching while that heartbeat is recent gets
+RingBusyError and stays on UDP. A writer that has been silent for
+WRITER_TIMEOUT seconds can be replaced, and notices at its next check
+that it lost the ring. Two trackers attaching at the same moment both
+write until the next check of the link, at most retry_interval later.
+The default ring name includes the tracker's client ID (see ring_name),
+so trackers with different IDs use different rings.
+
+This module only depends on the standard library so Blender can import it.
+"""
+import os
+import random
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+MAGIC = b"RTSM"
+VERSION = 2
+DEFAULT_NAME = "rtht_gestures"
+WRITER_TIMEOUT = 2.0  # Seconds without packets before another tracker may take the ring over
+SLOT_SIZE = 1024  # Fits a packet with two hands and all their landmarks
+SLOT_COUNT = 64
+
+HEADER = struct.Struct("<4sHxxIIIIQd")
+WRITER_PID = struct.Struct("<I")
+WRITER_PID_OFFSET = 20
+WRITE_SEQ = struct.Struct("<Q")
+WRITE_SEQ_OFFSET = 24
+HEARTBEAT = struct.Struct("<d")
+HEARTBEAT_OFFSET = 32
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct("<QIxxxx")
+
+
+class RingBusyError(ValueError):
+    """Another tracker is writing to the ring"""
+
+    def __init__(self, name, pid):
+        super().__init__(f"{name} is in use by process {pid}")
+        self.pid = pid
+
+
+def ring_name(client_id=0):
+    """Default ring name of a tracker: DEFAULT_NAME, suffixed with the client ID if it has one"""
+    return f"{DEFAULT_NAME}_{client_id}" if client_id else DEFAULT_NAME
+
+
+def attach_segment(name):
+    """Open an existing segment without letting this process remove it at exit"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        # Before 3.13 the resource tracker unlinks every segment a process opened.
+        # The reader and writer are separate processes with their own trackers.
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment
+
+
+class ShmRingReader:
+    """Consumer side, owns the segment (Blender)"""
+
+    def __init__(self, name=DEFAULT_NAME, slot_size=SLOT_SIZE, slot_count=SLOT_COUNT):
+        size = HEADER_SIZE + slot_size * slot_count
+        try:
+            self.segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over by a previous run that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        self.slot_size = slot_size
+        self.slot_count = slot_count
+        self.buf = self.segment.buf
+        self.instance = random.getrandbits(32)
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, slot_size, slot_count, self.instance, 0, 0, 0.0)
+        self.read_seq = 0
+        self.received = 0
+        self.dropped = 0  # Packets overwritten before they were read
+
+    def poll(self):
+        """Return the payloads published since the last poll, oldest first"""
+        write_seq = WRITE_SEQ.unpack_from(self.buf, WRITE_SEQ_OFFSET)[0]
+        if write_seq == self.read_seq:
+            return []
+        if write_seq - self.read_seq > self.slot_count:
+            # The writer lapped us, the oldest packets are gone
+            self.dropped += write_seq - self.read_seq - self.slot_count
+            self.read_seq = write_seq - self.slot_count
+
+        payloads = []
+        for seq in range(self.read_seq + 1, write_seq + 1):
+            offset = HEADER_SIZE + (seq - 1) % self.slot_count * self.slot_size
+            slot_seq, length = SLOT_HEADER.unpack_from(self.buf, offset)
+            if slot_seq != seq:
+                self.dropped += 1
+                continue
+            start = offset + SLOT_HEADER.size
+            payload = bytes(self.buf[start:start + length])
+            if SLOT_HEADER.unpack_from(self.buf, offset)[0] != seq:
+                self.dropped += 1
+                continue
+            payloads.append(payload)
+        self.read_seq = write_seq
+        self.received += len(payloads)
+        return payloads
+
+    def close(self):
+        """Release and remove the segment"""
+        self.buf = None
+        self.segment.close()
+        try:
+            self.segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ShmRingWriter:
+    """Producer side, attaches to the reader's segment (the tracker)"""
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.segment = attach_segment(name)
+        self.name = name
+        self.pid = os.getpid()
+        self.buf = self.segment.buf
+        (magic, version, self.slot_size, self.slot_count, self.instance,
+         writer, write_seq, heartbeat) = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{name} is not a gesture ring (version {VERSION})")
+        if writer not in (0, self.pid) and time.time() - heartbeat < WRITER_TIMEOUT:
+            self.close()
+            raise RingBusyError(name, writer)
+        WRITER_PID.pack_into(self.buf, WRITER_PID_OFFSET, self.pid)
+        HEARTBEAT.pack_into(self.buf, HEARTBEAT_OFFSET, time.time())
+        self.write_seq = write_seq
+        self.max_payload = self.slot_size - SLOT_HEADER.size
+
+    def write(self, payload):
+        """Publish one packet; the oldest unread one is overwritten when the ring is full"""
+        if len(payload) > self.max_payload:
+            raise ValueError(f"Packet of {len(payload)} bytes does not fit a {self.slot_size} byte slot")
+        seq = self.write_seq + 1
+        offset = HEADER_SIZE + (seq - 1) % self.slot_count * self.slot_size
+        # Invalidate the slot while it is rewritten
+        SLOT_HEADER.pack_into(self.buf, offset, 0, 0)
+        start = offset + SLOT_HEADER.size
+        self.buf[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self.buf, offset, seq, len(payload))
+        WRITE_SEQ.pack_into(self.buf, WRITE_SEQ_OFFSET, seq)
+        HEARTBEAT.pack_into(self.buf, HEARTBEAT_OFFSET, time.time())
+        self.write_seq = seq
+
+    def is_alive(self):
+        """False once Blender removed the segment (it stopped or restarted) or another tracker took the ring over.
+
+        Opens the segment again, so call it now and then, not per packet.
+        """
+        try:
+            probe = attach_segment(self.name)
+        except FileNotFoundError:
+            return False
+        try:
+            return (HEADER.unpack_from(probe.buf, 0)[4] == self.instance
+                    and WRITER_PID.unpack_from(probe.buf, WRITER_PID_OFFSET)[0] == self.pid)
+        finally:
+            probe.close()
+
+    def close(self):
+        """Detach, releasing the ring at once if this writer still owns it"""
+        if self.buf is not None and WRITER_PID.unpack_from(self.buf, WRITER_PID_OFFSET)[0] == self.pid:
+            WRITER_PID.pack_into(self.buf, WRITER_PID_OFFSET, 0)
+        self.buf = None
+        self.segment.close()
+
+
+class ShmRingLink:
+    """Tracker-side link that writes to the ring while it exists.
+
+    write() returns False when there is no ring to write to (Blender not
+    running, or running without the shared-memory transport) so the caller
+    can send the packet over UDP instead. Attaching and checking that the
+    ring is still the one Blender reads are retried every retry_interval
+    seconds, not per packet.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, retry_interval=1.0, on_change=None, on_busy=None):
+        self.name = name
+        self.retry_interval = retry_interval
+        self.on_change = on_change  # Called with True/False when the ring comes or goes
+        self.on_busy = on_busy  # Called with the PID of the tracker using the ring when it is found busy
+        self.writer = None
+        self.busy_with = None
+        self._next_check = 0.0
+
+    def write(self, payload):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.retry_interval
+            self._check()
+        if self.writer is None:
+            return False
+        self.writer.write(payload)
+        return True
+
+    def _check(self):
+        if self.writer is not None:
+            if self.writer.is_alive():
+                return
+            self.writer.close()
+            self.writer = None
+            if self.on_change:
+                self.on_change(False)
+        try:
+            self.writer = ShmRingWriter(self.name)
+        except RingBusyError as e:
+            if e.pid != self.busy_with and self.on_busy:
+                self.on_busy(e.pid)
+            self.busy_with = e.pid
+            return
+        except (FileNotFoundError, ValueError):
+            return
+        self.busy_with = None
+        if self.on_change:
+            self.on_change(True)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,174 @@
+"""Background decoding of library images into a cached thumbnail pyramid.
+
+Large photos take long to decode and upload, which stalls Blender's main
+thread when a plane is created. A PyramidBuilder decodes images in worker
+threads ahead of time and writes downscaled levels (halving down to
+MIN_LEVEL pixels) to a cache directory, keyed by a hash of the file
+content so renamed or copied files reuse their levels and edited files
+get new ones. Blender then only loads a small, ready-sized file.
+
+Decoding uses OpenCV or Pillow, whichever is installed (both release the
+GIL while decoding). This module does not import bpy, so it can run
+inside or outside Blender.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from log_setup import get_logger
+
+try:
+    import cv2
+    has_cv2 = True
+except ImportError:
+    has_cv2 = False
+
+try:
+    from PIL import Image
+    has_pil = True
+except ImportError:
+    has_pil = False
+
+has_decoder = has_cv2 or has_pil
+
+log = get_logger("texture_cache")
+
+MAX_LEVEL = 4096  # Largest level kept, bigger images start halving from here
+MIN_LEVEL = 64
+CACHE_DIR_NAME = ".texture_cache"
+
+
+def content_hash(path, chunk_size=1 << 20):
+    """Hash of the file content, used as cache key"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def level_sizes(width, height):
+    """Longest-side sizes of the pyramid levels for an image, largest first"""
+    size = 1
+    while size * 2 < max(width, height):
+        size *= 2
+    size = min(size, MAX_LEVEL)
+    sizes = []
+    while size >= MIN_LEVEL:
+        sizes.append(size)
+        size //= 2
+    return sizes
+
+
+def write_level(cache_dir, key, size, save):
+    """Write one level through save(path), renamed into place once complete"""
+    level_path = os.path.join(cache_dir, f"{key}_{size}.png")
+    tmp_path = os.path.join(cache_dir, f"{key}_{size}.tmp.png")
+    save(tmp_path)
+    os.replace(tmp_path, level_path)
+    return level_path
+
+
+def build_levels(path, cache_dir, key):
+    """Decode an image and write its pyramid levels, return {size: level path}"""
+    levels = {}
+    if has_cv2:
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError(f"Could not decode {path}")
+        height, width = image.shape[:2]
+        for size in level_sizes(width, height):
+            scale = size / max(width, height)
+            # Each level is resized from the previous one, INTER_AREA averages the pixels
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+            levels[size] = write_level(cache_dir, key, size, lambda tmp_path: cv2.imwrite(tmp_path, image))
+        return levels
+
+    with Image.open(path) as image:
+        width, height = image.size
+        sizes = level_sizes(width, height)
+        if sizes:
+            # Let JPEG decode at a reduced scale when possible
+            image.draft(image.mode, (sizes[0], sizes[0]))
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for size in sizes:
+            image.thumbnail((size, size), Image.LANCZOS)
+            levels[size] = write_level(cache_dir, key, size, image.save)
+    return levels
+
+
+class PyramidBuilder:
+    """Builds pyramid levels for image files in a pool of worker threads"""
+
+    def __init__(self, cache_dir, workers=2):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="texture-cache")
+        self._lock = threading.Lock()
+        self._jobs = {}    # (path, mtime) -> future
+        self._levels = {}  # (path, mtime) -> {size: level path}
+
+    def prefetch(self, paths):
+        """Queue images for decoding, already built or queued ones are skipped"""
+        for path in paths:
+            try:
+                job = (path, os.stat(path).st_mtime)
+            except OSError:
+                continue
+            with self._lock:
+                if job not in self._jobs:
+                    self._jobs[job] = self._pool.submit(self._build, job)
+
+    def _build(self, job):
+        path, _ = job
+        try:
+            key = content_hash(path)
+            levels = self._cached_levels(key)
+            if not levels:
+                levels = build_levels(path, self.cache_dir, key)
+        except Exception as e:
+            log.error("Error pre-decoding %s: %s", path, e)
+            levels = {}
+        with self._lock:
+            self._levels[job] = levels
+        return levels
+
+    def _cached_levels(self, key):
+        """Levels written by an earlier run for the same content"""
+        levels = {}
+        prefix = f"{key}_"
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith(".png"):
+                try:
+                    levels[int(name[len(prefix):-4])] = os.path.join(self.cache_dir, name)
+                except ValueError:
+                    continue
+        return levels
+
+    def level(self, path, size):
+        """Path of the smallest ready level at least size pixels (or the largest one).
+
+        Returns None if the image has not been decoded yet; never blocks.
+        """
+        try:
+            job = (path, os.stat(path).st_mtime)
+        except OSError:
+            return None
+        with self._lock:
+            levels = self._levels.get(job)
+        if not levels:
+            self.prefetch([path])
+            return None
+        larger = [level for level in levels if level >= size]
+        return levels[min(larger)] if larger else levels[max(levels)]
+
+    def pending(self):
+        """Number of images still being decoded"""
+        with self._lock:
+            return sum(not future.done() for future in self._jobs.values())
+
+    def close(self):
+        """Stop the workers, queued images are dropped"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
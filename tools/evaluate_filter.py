@@ -0,0 +1,124 @@
+"""Latency vs jitter evaluation of the landmark filter on recorded sequences.
+
+Runs the One Euro filter with a grid of min_cutoff / beta settings over a
+landmark log (see landmark_log.py) and reports for the index finger tip:
+
+* jitter: RMS of the frame-to-frame acceleration, which is dominated by
+  tracking noise (lower is smoother)
+* lag: the delay, in ms, that best aligns the filtered path with the raw one
+* error: RMS distance to ground truth, only for synthetic sequences
+
+    python tools/evaluate_filter.py --log recording/landmarks.jsonl
+    python tools/evaluate_filter.py --synthetic
+"""
+import argparse
+import itertools
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from landmark_filter import LandmarkFilterBank  # noqa: E402
+from landmark_log import LandmarkLogWriter, read_landmark_log  # noqa: E402
+
+INDEX_TIP = 8
+MIN_CUTOFFS = (0.3, 0.5, 1.0, 2.0, 4.0)
+BETAS = (0.0, 1.0, 5.0, 20.0, 50.0)
+
+
+def synthetic_sequence(seconds=20.0, fps=30.0, noise=0.003, seed=0):
+    """A hand that alternates between resting and quick sweeps, plus noise.
+
+    Returns (frames, truth) where frames are (seq, t, points, handedness)
+    tuples like read_landmark_log() yields and truth is the noiseless
+    index tip position per frame.
+    """
+    rng = np.random.default_rng(seed)
+    shape = rng.uniform(-0.05, 0.05, (21, 3)).astype(np.float32)
+    frames, truth = [], []
+    t = 0.0
+    for seq in range(int(seconds * fps)):
+        # 2 s cycles: 1 s at rest, then a 1 s sweep across the image
+        phase = (t % 2.0) - 1.0
+        sweep = 0.5 - 0.5 * math.cos(math.pi * phase) if phase > 0 else 0.0
+        direction = 1.0 if int(t // 2.0) % 2 == 0 else -1.0
+        center = np.array([0.5 + direction * (0.3 * sweep - 0.15), 0.5 + 0.1 * math.sin(t), 0.0])
+        clean = shape + center
+        points = (clean + rng.normal(0.0, noise, clean.shape)).astype(np.float32)[None]
+        frames.append((seq, t, points, ["Right"]))
+        truth.append(clean[INDEX_TIP, :2])
+        # Real cameras do not deliver frames on a perfect clock
+        t += (1.0 / fps) * rng.uniform(0.8, 1.2)
+    return frames, np.array(truth)
+
+
+def tip_track(frames, filter_bank=None):
+    """Index tip positions of the first hand, filtered if a bank is given"""
+    track, times = [], []
+    for _, timestamp, points, handedness in frames:
+        if len(points) == 0:
+            continue
+        points = points.copy()
+        if filter_bank is not None:
+            filter_bank.apply(points, handedness, timestamp)
+        track.append(points[0, INDEX_TIP, :2])
+        times.append(timestamp)
+    return np.array(track), np.array(times)
+
+
+def jitter(track):
+    return float(np.sqrt(np.mean(np.sum(np.diff(track, n=2, axis=0) ** 2, axis=1))))
+
+
+def lag_ms(track, raw, times, max_shift=15):
+    """Delay that best aligns the filtered track with the raw one"""
+    errors = [np.mean(np.sum((track[shift:] - raw[:len(raw) - shift]) ** 2, axis=1))
+              for shift in range(max_shift)]
+    return float(np.argmin(errors) * np.median(np.diff(times)) * 1000.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", help="landmark log recorded with hand_tracking.py --record")
+    parser.add_argument("--synthetic", action="store_true", help="use a generated sequence with ground truth")
+    parser.add_argument("--write-synthetic", metavar="PATH", help="save the generated sequence as a landmark log")
+    parser.add_argument("--d-cutoff", type=float, default=1.0)
+    args = parser.parse_args()
+
+    truth = None
+    if args.log:
+        frames = list(read_landmark_log(args.log))
+    else:
+        frames, truth = synthetic_sequence()
+        if args.write_synthetic:
+            writer = LandmarkLogWriter(args.write_synthetic)
+            for seq, timestamp, points, handedness in frames:
+                writer.write(seq, timestamp, points, handedness)
+            writer.close()
+
+    raw, times = tip_track(frames)
+    if len(raw) < 20:
+        sys.exit("Not enough frames with hands to evaluate")
+
+    header = f"{'min_cutoff':>10}{'beta':>8}{'jitter':>10}{'lag ms':>8}"
+    if truth is not None:
+        header += f"{'error':>10}"
+    print(header)
+
+    def report(label_cutoff, label_beta, track):
+        line = f"{label_cutoff:>10}{label_beta:>8}{jitter(track):>10.5f}{lag_ms(track, raw, times):>8.0f}"
+        if truth is not None:
+            line += f"{np.sqrt(np.mean(np.sum((track - truth) ** 2, axis=1))):>10.5f}"
+        print(line)
+
+    report("raw", "-", raw)
+    for min_cutoff, beta in itertools.product(MIN_CUTOFFS, BETAS):
+        bank = LandmarkFilterBank(min_cutoff=min_cutoff, beta=beta, d_cutoff=args.d_cutoff)
+        track, _ = tip_track(frames, bank)
+        report(min_cutoff, beta, track)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Synthetic gesture streams for load testing the Blender listener over UDP.
+
+    python tools/load_generator.py --clients 4 --rate 120 --duration 30
+    python tools/load_generator.py --loopback --clients 8 --burst 20 --malformed 0.05
+    python tools/load_generator.py --receive --duration 60
+
+Each client is a UDP socket of its own (so Blender gives it its own
+session, like a separate tracker) sending a scripted trajectory in the
+text format "gesture,x,y[,gesture,x,y]" at --rate packets per second:
+
+    drag     point to select, then a pinch drag in circles
+    rotate   point to select, then two pinches turning and spreading
+    paint    fist + point to toggle painting, a painted loop, toggle off
+    toggle   point to select, then pinch + palm and fist + point in turn,
+             switching every 100 ms
+    select   point at a new spot five times per second
+    mix      client i runs the i-th of the scripts above
+
+--burst sends that many extra packets back to back every --burst-interval
+seconds, as a tracker does after a stall, and --malformed replaces that
+fraction of the packets with ones the listener cannot decode.
+
+By default the packets go to --host/--port, e.g. a running Blender, whose
+overlay shows the packet counters. --receive runs the listener itself in
+this process instead (Blender/blender_listener.py on benchmarks/fake_bpy.py,
+with its own socket thread and mailbox, its timer called like Blender
+calls it) and reports what happened to the packets and how late the timer
+ran. --loopback does both: the clients run in a child process and this
+process receives.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+from gesture_protocol import encode_binary, encode_text  # noqa: E402
+from latency_trace import LatencyHistogram  # noqa: E402
+
+
+# Scripts: hands at t seconds for a client working around (cx, cy)
+
+def drag(t, cx, cy):
+    phase = t % 4.0
+    if phase < 0.3:
+        return [("point", cx, cy)]
+    if phase < 3.7:
+        angle = (phase - 0.3) * 2.0
+        return [("pinch", cx + 0.1 * math.cos(angle), cy + 0.1 * math.sin(angle))]
+    return [("none", cx, cy)]
+
+
+def rotate(t, cx, cy):
+    phase = t % 4.0
+    if phase < 0.3:
+        return [("point", cx, cy)]
+    if phase < 3.7:
+        angle = phase - 0.3
+        spread = 0.15 + 0.05 * math.sin(2.0 * angle)
+        dx, dy = spread * math.cos(angle), spread * math.sin(angle)
+        return [("pinch", cx - dx, cy - dy), ("pinch", cx + dx, cy + dy)]
+    return [("none", cx, cy)]
+
+
+def paint(t, cx, cy):
+    phase = t % 6.0
+    if phase < 0.2 or 5.4 <= phase < 5.6:
+        return [("fist", cx - 0.1, cy), ("point", cx + 0.1, cy)]
+    if 0.4 <= phase < 5.4:
+        angle = phase * 2.0
+        return [("point", cx + 0.2 * math.sin(angle), cy + 0.15 * math.sin(2.0 * angle))]
+    # Both gestures end, as the tracker reports it, so the next fist + point toggles again
+    return [("none", cx - 0.1, cy), ("none", cx + 0.1, cy)]
+
+
+def toggle(t, cx, cy):
+    phase = t % 4.0
+    if phase < 0.2:
+        return [("point", cx, cy)]
+    pair = (("pinch", "palm"), None, ("fist", "point"), None)[int((phase - 0.2) / 0.1) % 4]
+    if pair is None:
+        pair = ("none", "none")
+    return [(pair[0], cx - 0.1, cy), (pair[1], cx + 0.1, cy)]
+
+
+def select(t, cx, cy):
+    spot = int(t / 0.2)
+    x = min(max(cx + 0.3 * math.sin(spot * 2.4), 0.0), 1.0)
+    y = min(max(cy + 0.3 * math.cos(spot * 1.7), 0.0), 1.0)
+    return [("point" if t % 0.2 < 0.1 else "none", x, y)]
+
+
+SCRIPTS = {"drag": drag, "rotate": rotate, "paint": paint, "toggle": toggle, "select": select}
+
+# Packets the listener cannot decode
+MALFORMED = (
+    lambda rng: b"",
+    lambda rng: b"pinch,0.5",  # Truncated
+    lambda rng: b"pinch,abc,0.5",  # Not a number
+    lambda rng: b"\xff\xfe,0.5,0.5",  # Not UTF-8
+    lambda rng: bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 64))),  # Noise
+)
+
+
+class Client:
+    """One simulated tracker: its own socket, script and frame counter"""
+
+    def __init__(self, client_id, script, center, args, rng):
+        self.client_id = client_id
+        self.script = script
+        self.center = center
+        self.rate = args.rate
+        self.protocol = args.protocol
+        self.malformed_fraction = args.malformed
+        self.address = (args.host, args.port)
+        self.rng = rng
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.frame = 0
+        self.sent = 0
+        self.malformed = 0
+
+    def send_next(self):
+        """Send the next frame of the script"""
+        hands = self.script(self.frame / self.rate, *self.center)
+        if self.rng.random() < self.malformed_fraction:
+            data = self.rng.choice(MALFORMED)(self.rng)
+            self.malformed += 1
+        elif self.protocol == "binary":
+            data = encode_binary(hands, seq=self.frame, timestamp=time.time(), source=self.client_id)
+        else:
+            data = encode_text(hands)
+        self.frame += 1
+        try:
+            self.sock.sendto(data, self.address)
+            self.sent += 1
+        except OSError:
+            pass  # Refused because nothing listens on the port yet
+
+    def close(self):
+        self.sock.close()
+
+
+def send_load(args):
+    """Run the clients for --duration seconds; returns {"sent", "malformed", "bursts", "clients"}"""
+    rng = random.Random(args.seed)
+    names = list(SCRIPTS)
+    clients = []
+    for i in range(args.clients):
+        script = SCRIPTS[names[i % len(names)] if args.script == "mix" else args.script]
+        # Clients work on different parts of the screen
+        center = (0.25 + 0.5 * (i * 0.618 % 1.0), 0.4 + 0.2 * (i * 0.382 % 1.0))
+        clients.append(Client(i + 1, script, center, args, random.Random(rng.getrandbits(32))))
+
+    interval = 1.0 / args.rate
+    started = time.perf_counter()
+    next_send = started
+    next_burst = started + args.burst_interval if args.burst else None
+    bursts = 0
+    try:
+        while time.perf_counter() - started < args.duration:
+            for client in clients:
+                client.send_next()
+            if next_burst is not None and time.perf_counter() >= next_burst:
+                for client in clients:
+                    for _ in range(args.burst):
+                        client.send_next()
+                bursts += 1
+                next_burst += args.burst_interval
+            next_send += interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for client in clients:
+            client.close()
+    return {"sent": sum(client.sent for client in clients),
+            "malformed": sum(client.malformed for client in clients),
+            "bursts": bursts,
+            "clients": {client.client_id: {"script": client.script.__name__, "sent": client.sent,
+                                           "malformed": client.malformed} for client in clients}}
+
+
+def receive(args, finished):
+    """Run the listener in this process until finished() is true; returns the receiving side's report"""
+    sys.path.insert(0, os.path.join(PROJECT_DIR, "benchmarks"))
+    import bench_listener as bench
+
+    with tempfile.TemporaryDirectory() as blend_dir:
+        bench.load_listener(args.bpy, blend_dir, cooldowns=True)
+        listener, bpy = bench.listener, bench.bpy
+        # Malformed packets are counted in the report instead of logged
+        listener.log.setLevel(logging.ERROR)
+        bench.build_scene(args.objects)
+        listener.HOST, listener.PORT = args.host, args.port
+        listener.shm_rings = []
+        listener.running = True
+        if listener.latency_tracer is not None:
+            listener.latency_tracer.reset()
+        thread = listener.start_listener()
+        time.sleep(0.2)  # Let the socket thread bind
+
+        # Blender calls the timer again the returned interval after it finished
+        tick_lag, tick = LatencyHistogram(), LatencyHistogram()
+        next_tick = time.perf_counter()
+        try:
+            while not finished():
+                now = time.perf_counter()
+                if now < next_tick:
+                    time.sleep(next_tick - now)
+                    now = time.perf_counter()
+                tick_lag.record((now - next_tick) * 1000)
+                interval = listener.drain_mailbox()
+                bpy.context.view_layer.update()
+                done = time.perf_counter()
+                tick.record((done - now) * 1000)
+                next_tick = done + interval
+        except KeyboardInterrupt:
+            pass
+        finally:
+            time.sleep(0.1)
+            listener.drain_mailbox()
+            listener.stop_listener()
+            thread.join(2.0)
+            if listener.pyramid_builder is not None:
+                listener.pyramid_builder.close()
+
+        stats = listener.mailbox.stats()
+        stats["sessions"] = len(listener.sessions.sessions)
+        stats["tick_lag"] = tick_lag.snapshot()
+        stats["tick"] = tick.snapshot()
+        stats["latency"] = listener.latency_tracer.summary() if listener.latency_tracer is not None else {}
+        return stats
+
+
+def print_sent(sent, args):
+    for client_id, client in sent["clients"].items():
+        print(f"[sent] client={client_id} script={client['script']} packets={client['sent']} "
+              f"malformed={client['malformed']}")
+    print(f"[sent] clients={args.clients} rate={args.rate:g}/s packets={sent['sent']} "
+          f"malformed={sent['malformed']} bursts={sent['bursts']}")
+
+
+def print_received(stats, sent=None):
+    def ms(snapshot):
+        return f"p50 {snapshot['p50_ms']:.2f}  p95 {snapshot['p95_ms']:.2f}  max {snapshot['max_ms']:.2f} ms"
+
+    print(f"[received] decoded={stats['received']} malformed={stats['malformed']} sessions={stats['sessions']}")
+    if sent is not None:
+        # Everything sent either reached the socket thread or was lost on the way
+        print(f"[received] lost_in_socket={max(sent['sent'] - stats['received'] - stats['malformed'], 0)}")
+    print(f"[mailbox] processed={stats['processed']} coalesced={stats['coalesced']} dropped={stats['dropped']} "
+          f"rate_limited={stats['rate_limited']}")
+    print(f"[main thread] timer lag {ms(stats['tick_lag'])}  (n={stats['tick_lag']['count']})")
+    print(f"[main thread] timer run {ms(stats['tick'])}")
+    for stage in ("queue", "apply"):
+        if stage in stats["latency"]:
+            print(f"[main thread] {stage:<9} {ms(stats['latency'][stage])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5006)
+    parser.add_argument("--clients", type=int, default=1, help="simulated trackers, one socket each")
+    parser.add_argument("--rate", type=float, default=120.0, help="packets per second per client")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to send (or receive)")
+    parser.add_argument("--script", choices=list(SCRIPTS) + ["mix"], default="mix")
+    parser.add_argument("--protocol", choices=["text", "binary"], default="text",
+                        help="binary packets carry client IDs 1..N instead of relying on the socket address")
+    parser.add_argument("--burst", type=int, default=0, help="extra packets per client sent back to back")
+    parser.add_argument("--burst-interval", type=float, default=2.0, help="seconds between bursts")
+    parser.add_argument("--malformed", type=float, default=0.0, help="fraction of undecodable packets")
+    parser.add_argument("--seed", type=int, default=1)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--receive", action="store_true", help="run the listener here instead of sending")
+    mode.add_argument("--loopback", action="store_true", help="send from a child process and receive here")
+    parser.add_argument("--objects", type=int, default=100, help="planes in the receiving scene")
+    parser.add_argument("--bpy", choices=["fake", "real"], default="fake",
+                        help="bpy the receiving listener runs on")
+    parser.add_argument("--json", action="store_true", help="print the results as one JSON line")
+    args = parser.parse_args()
+
+    if args.receive:
+        deadline = time.perf_counter() + args.duration
+        stats = receive(args, lambda: time.perf_counter() >= deadline)
+        if args.json:
+            print(json.dumps(stats))
+        else:
+            print_received(stats)
+    elif args.loopback:
+        argv = [arg for arg in sys.argv[1:] if arg != "--loopback"]
+        child = None
+        child_done = []
+
+        def finished():
+            nonlocal child
+            if child is None:
+                child = subprocess.Popen([sys.executable, os.path.abspath(__file__), *argv, "--json"],
+                                         stdout=subprocess.PIPE, text=True)
+            if child.poll() is None:
+                return False
+            # Give the last packets a few timer ticks
+            child_done.append(time.perf_counter())
+            return child_done[-1] - child_done[0] >= 0.2
+
+        stats = receive(args, finished)
+        sent = json.loads(child.stdout.read().strip().splitlines()[-1])
+        if args.json:
+            print(json.dumps({"sent": sent, "received": stats}))
+        else:
+            print_sent(sent, args)
+            print_received(stats, sent)
+    else:
+        sent = send_load(args)
+        if args.json:
+            print(json.dumps(sent))
+        else:
+            print_sent(sent, args)
+
+
+if __name__ == "__main__":
+    main()